@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Benchmark simulation, feature extraction, inference, rendering and training on synthetic workloads"""
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config import VISUALIZATIONS_DIR, WAVEFORM_PREVIEW_DPI, RANDOM_STATE
+
+AND_GATE = "module and_gate(input a, b, output y);\n  assign y = a & b;\nendmodule"
+AND_TB = ("module tb;\n  reg a, b; wire y;\n  and_gate uut(.a(a), .b(b), .y(y));\n"
+          "  initial begin\n    a=0;b=0;#10;\n    a=1;b=1;#10;\n    $finish;\n  end\nendmodule")
+
+# Metric -> True when larger is better; compared against the baseline with --threshold
+METRICS = {'latency_ms_p50': False, 'latency_ms_p95': False, 'throughput': True}
+
+
+def traces(n, error_rate=0.05, seed=RANDOM_STATE):
+    rng = np.random.default_rng(seed)
+    expected = rng.integers(0, 2, n)
+    actual = np.where(rng.random(n) < error_rate, 1 - expected, expected)
+    return ''.join(map(str, expected)), ''.join(map(str, actual))
+
+
+def vcd_lines(n_signals, n_changes, seed=RANDOM_STATE):
+    # Random single-bit activity: n_changes value changes spread over the signals
+    rng = np.random.default_rng(seed)
+    codes = [chr(33 + i) for i in range(n_signals)]
+    lines = ['$timescale 1ns $end', '$scope module tb $end']
+    lines += [f'$var wire 1 {c} s{i} $end' for i, c in enumerate(codes)]
+    lines += ['$upscope $end', '$enddefinitions $end', '#0']
+    lines += [f'0{c}' for c in codes]
+    which = rng.integers(0, n_signals, n_changes)
+    state = np.zeros(n_signals, dtype=int)
+    for t, s in enumerate(which, 1):
+        state[s] ^= 1
+        lines += [f'#{t * 5}', f'{state[s]}{codes[s]}']
+    return lines
+
+
+def bench_extract_features(trace_len):
+    from src.feature_extractor import FeatureExtractor
+    expected, actual = traces(trace_len)
+    return (lambda: FeatureExtractor.extract_features(AND_GATE, AND_TB, expected, actual)), trace_len, 'bits/s'
+
+
+def bench_vcd_parse(signals, changes):
+    from src.vcd_reader import parse_vcd
+    lines = vcd_lines(signals, changes)
+    return (lambda: parse_vcd(lines)), changes, 'changes/s'
+
+
+def bench_waveform(signals, changes):
+    from src.vcd_reader import parse_vcd
+    from src.waveform_generator import WaveformGenerator
+    vcd = parse_vcd(vcd_lines(signals, changes))
+    render = lambda: WaveformGenerator.generate_from_vcd(vcd, 'bench', dpi=WAVEFORM_PREVIEW_DPI)
+    return render, 1, 'renders/s'
+
+
+def bench_simulate(circuits):
+    from src.simulator import VerilogSimulator
+    sim = VerilogSimulator()
+    jobs = [(AND_GATE, AND_TB, 'and_gate')] * circuits
+    return (lambda: sim.simulate_many(jobs)), circuits, 'circuits/s'
+
+
+def bench_logic_sim(input_bits):
+    # Exhaustive sweep of an adder/comparator through the built-in bit-parallel engine
+    from src.logic_sim import LogicSimulator
+    n = input_bits // 2
+    design = LogicSimulator(f"module addcmp(input [{n - 1}:0] a, b, output [{n}:0] s, output lt);\n"
+                            "  assign s = a + b;\n  assign lt = a < b;\nendmodule")
+    return (lambda: design.sweep(max_patterns=2 ** input_bits)), 2 ** input_bits, 'patterns/s'
+
+
+def bench_fault_dictionary(entries, queries=64, n_bits=256):
+    # Nearest-signature lookups of noisy known-fault responses in a synthetic dictionary
+    from src.fault_dictionary import SignatureIndex, pack
+    rng = np.random.default_rng(RANDOM_STATE)
+    # Fault responses differ from golden in a few clustered-to-scattered bits
+    bits = rng.random((entries, n_bits)) < rng.uniform(0.005, 0.2, (entries, 1))
+    index = SignatureIndex(pack(bits), n_bits, ['fault'] * entries, [str(i) for i in range(entries)])
+    noisy = bits[rng.integers(0, entries, queries)] ^ (rng.random((queries, n_bits)) < 0.01)
+    packed = pack(noisy)
+    return (lambda: [index.search(q) for q in packed]), queries, 'lookups/s'
+
+
+def bench_inference(backend, batch):
+    from src.compact_model import CompactForest
+    from src.fault_detector import VLSIFaultDetector
+    detector = VLSIFaultDetector()
+    # Needs a trained model on disk (train_model.py); skipped otherwise
+    if not detector.load_model(prefer_compact=backend == 'compact'):
+        return None
+    if isinstance(detector.best_model, CompactForest) != (backend == 'compact'):
+        return None
+    X = detector.generate_training_data_batched(batch, seed=RANDOM_STATE + 1)[detector.feature_names].values
+    if batch == 1:
+        row = dict(zip(detector.feature_names, X[0]))
+        return (lambda: detector.detect_faults(row)), 1, 'samples/s'
+    return (lambda: detector.detect_faults_batch(X)), batch, 'samples/s'
+
+
+def bench_adaptive_inference(mode, batch):
+    # Early-exit vs full forest evaluation on the compact model; agreement is with full evaluation
+    from src.compact_model import CompactForest
+    from src.fault_detector import VLSIFaultDetector
+    detector = VLSIFaultDetector()
+    if not detector.load_model(prefer_compact=True) or not isinstance(detector.best_model, CompactForest):
+        return None
+    X = detector.generate_training_data_batched(batch, seed=RANDOM_STATE + 1)[detector.feature_names].values
+    adaptive = mode == 'adaptive'
+    full = detector.detect_faults_batch(X, adaptive=False)
+    result = detector.detect_faults_batch(X, adaptive=adaptive)
+    extra = {'agreement': float(np.mean(result['fault_type'] == full['fault_type'])),
+             'mean_trees': float(result['trees_used'].mean())}
+    if batch == 1:
+        row = dict(zip(detector.feature_names, X[0]))
+        return (lambda: detector.detect_faults_batch([row], adaptive=adaptive)), 1, 'samples/s', extra
+    return (lambda: detector.detect_faults_batch(X, adaptive=adaptive)), batch, 'samples/s', extra
+
+
+def bench_training_data(samples):
+    from src.fault_detector import VLSIFaultDetector
+    detector = VLSIFaultDetector()
+    return (lambda: detector.generate_training_data_batched(samples)), samples, 'rows/s'
+
+
+def bench_train(samples):
+    # Same data, scaling and forest as VLSIFaultDetector.train(), without writing the model
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    from src.fault_detector import VLSIFaultDetector
+    detector = VLSIFaultDetector()
+    
+    def train():
+        df = detector.generate_training_data_batched(samples)
+        X = StandardScaler().fit_transform(df[detector.feature_names].values)
+        RandomForestClassifier(n_estimators=150, max_depth=15, random_state=RANDOM_STATE,
+                               n_jobs=-1).fit(X, np.asarray(df['fault_type'], dtype=object))
+    return train, samples, 'rows/s'
+
+
+# workload -> (setup, full parameter grid, --quick grid)
+WORKLOADS = {
+    'extract_features': (bench_extract_features, {'trace_len': [1_000, 100_000, 1_000_000]},
+                         {'trace_len': [1_000, 100_000]}),
+    'vcd_parse': (bench_vcd_parse, {'signals': [4, 32], 'changes': [10_000, 200_000]},
+                  {'signals': [4], 'changes': [10_000]}),
+    'waveform': (bench_waveform, {'signals': [4, 16], 'changes': [1_000, 200_000]},
+                 {'signals': [4], 'changes': [1_000]}),
+    'simulate': (bench_simulate, {'circuits': [1, 16]}, {'circuits': [1]}),
+    'logic_sim': (bench_logic_sim, {'input_bits': [8, 16, 20]}, {'input_bits': [8, 16]}),
+    'fault_dictionary': (bench_fault_dictionary, {'entries': [100_000, 1_000_000]},
+                         {'entries': [100_000]}),
+    'inference': (bench_inference, {'backend': ['compact', 'sklearn'], 'batch': [1, 64, 1024]},
+                  {'backend': ['compact'], 'batch': [1, 1024]}),
+    'adaptive_inference': (bench_adaptive_inference, {'mode': ['full', 'adaptive'], 'batch': [1, 64, 1024, 16_384]},
+                           {'mode': ['full', 'adaptive'], 'batch': [1, 1024]}),
+    'training_data': (bench_training_data, {'samples': [5_000, 100_000]}, {'samples': [5_000]}),
+    'train': (bench_train, {'samples': [2_000, 5_000]}, {'samples': [2_000]}),
+}
+
+
+def case_id(workload, params):
+    return workload + ''.join(f'[{k}={v}]' for k, v in params.items())
+
+
+def measure(fn, items, min_repeat=3, min_time=1.0, max_repeat=1000):
+    fn()  # warm-up: imports, caches, lazy model loading
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < min_repeat or (time.perf_counter() - start < min_time and len(latencies) < max_repeat):
+        t = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t)
+    # Peak memory from one extra call; tracemalloc overhead would skew the timed runs
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    lat = np.array(latencies) * 1000
+    return {
+        'runs': len(latencies),
+        'latency_ms_p50': float(np.percentile(lat, 50)),
+        'latency_ms_p95': float(np.percentile(lat, 95)),
+        'latency_ms_p99': float(np.percentile(lat, 99)),
+        'throughput': float(items / np.median(latencies)),
+        'peak_mb': peak / 2**20,
+    }
+
+
+def run(workloads, quick=False, min_time=1.0, log=print):
+    results = {}
+    for name in workloads:
+        setup, grid, quick_grid = WORKLOADS[name]
+        grid = quick_grid if quick else grid
+        keys = list(grid)
+        for values in itertools.product(*(grid[k] for k in keys)):
+            params = dict(zip(keys, values))
+            cid = case_id(name, params)
+            case = setup(**params)
+            if case is None:
+                log(f"SKIP {cid}")
+                continue
+            # Optional 4th element: case-specific figures recorded alongside the timings
+            fn, items, unit, extra = case if len(case) == 4 else (*case, {})
+            r = measure(fn, items, min_time=min_time)
+            results[cid] = {'workload': name, 'params': params, 'unit': unit, **r, **extra}
+            log(f"     {cid:<50} p50 {r['latency_ms_p50']:10.3f} ms  p95 {r['latency_ms_p95']:10.3f} ms"
+                f"  {r['throughput']:14,.1f} {unit}  peak {r['peak_mb']:8.2f} MB"
+                + ''.join(f"  {k} {v:.4g}" for k, v in extra.items()))
+    for path in VISUALIZATIONS_DIR.glob('bench_waveform*.png'):
+        path.unlink()
+    return results
+
+
+def compare(results, baseline, threshold=0.15, memory_threshold=0.25):
+    # Relative change per metric; a regression is a move in the bad direction beyond the threshold
+    regressions = []
+    for cid, r in results.items():
+        base = baseline.get(cid)
+        if base is None:
+            continue
+        checks = [(m, higher, threshold) for m, higher in METRICS.items()]
+        checks.append(('peak_mb', False, memory_threshold))
+        for metric, higher_is_better, limit in checks:
+            old, new = base.get(metric), r.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            if worse > limit:
+                regressions.append({'case': cid, 'metric': metric, 'baseline': old, 'current': new,
+                                    'change': change})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('workloads', nargs='*',
+                        help=f"workloads to run (default: all): {', '.join(WORKLOADS)}")
+    parser.add_argument('--quick', action='store_true', help="smaller parameter grid")
+    parser.add_argument('--min-time', type=float, default=1.0, help="seconds of timed runs per case")
+    parser.add_argument('--json', help="write results to this path")
+    parser.add_argument('--baseline', help="compare against results saved earlier with --json")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="allowed relative slowdown in latency/throughput")
+    parser.add_argument('--memory-threshold', type=float, default=0.25,
+                        help="allowed relative growth in peak memory")
+    args = parser.parse_args()
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(sorted(unknown))}")
+    
+    results = run(args.workloads or list(WORKLOADS), args.quick, args.min_time)
+    if args.json:
+        meta = {'python': platform.python_version(), 'numpy': np.__version__,
+                'machine': platform.machine(), 'platform': platform.platform(), 'time': time.time()}
+        Path(args.json).write_text(json.dumps({'meta': meta, 'results': results}, indent=2))
+    if not args.baseline:
+        return 0
+    
+    baseline = json.loads(Path(args.baseline).read_text())['results']
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+    for r in regressions:
+        print(f"FAIL {r['case']:<50} {r['metric']:<16} {r['baseline']:.4g} -> {r['current']:.4g} "
+              f"({r['change']*100:+.1f}%)")
+    missing = sorted(set(results) - set(baseline))
+    if missing:
+        print(f"     {len(missing)} case(s) not in baseline: {', '.join(missing)}")
+    print(f"{'OK' if not regressions else 'REGRESSED'}: {len(regressions)} regression(s) "
+          f"across {len(set(results) & set(baseline))} compared case(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
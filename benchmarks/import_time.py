@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Check start-up import time of the main entry points against a budget"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# entry point -> (import statement, budget in seconds for that statement alone in a fresh
+#                 interpreter (start-up itself is not timed), heavy modules that must not be imported)
+ENTRY_POINTS = {
+    'train_model': ('import train_model', 0.5, ['pandas', 'sklearn', 'matplotlib', 'joblib']),
+    'score': ('import score', 0.5, ['pandas', 'sklearn', 'matplotlib', 'joblib']),
+    'analyzer': ('from src.analyzer import CircuitAnalyzer', 0.5, ['pandas', 'sklearn', 'matplotlib', 'joblib']),
+    'feature_extractor': ('from src import FeatureExtractor', 0.3, ['pandas', 'sklearn', 'matplotlib', 'joblib']),
+}
+
+PROBE = '''
+import sys, time, json
+t = time.perf_counter()
+{stmt}
+elapsed = time.perf_counter() - t
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+def measure(stmt, heavy, repeat):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', PROBE.format(stmt=stmt, heavy=heavy)],
+                             cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out))
+    return min(r['seconds'] for r in runs), runs[0]['loaded']
+
+def run(repeat=3, scale=1.0):
+    results, ok = {}, True
+    for name, (stmt, budget, heavy) in ENTRY_POINTS.items():
+        seconds, loaded = measure(stmt, heavy, repeat)
+        passed = seconds <= budget * scale and not loaded
+        ok &= passed
+        results[name] = {'seconds': seconds, 'budget': budget * scale, 'heavy_loaded': loaded, 'passed': passed}
+    return results, ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per entry point (best is kept)")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply every budget, e.g. on slow CI")
+    parser.add_argument('--json', help="write results to this path")
+    args = parser.parse_args()
+    
+    results, ok = run(args.repeat, args.scale)
+    for name, r in results.items():
+        status = 'OK  ' if r['passed'] else 'FAIL'
+        extra = f"  heavy: {', '.join(r['heavy_loaded'])}" if r['heavy_loaded'] else ''
+        print(f"{status} {name:<20} {r['seconds']*1000:8.1f} ms  (budget {r['budget']*1000:.0f} ms){extra}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,120 @@ PROJECT_ROOT = Path(__file__).parent
 MODELS_DIR = PROJECT_ROOT / 'models'
 REPORTS_DIR = PROJECT_ROOT / 'reports'
 VISUALIZATIONS_DIR = PROJECT_ROOT / 'visualizations'
+CACHE_DIR = PROJECT_ROOT / 'cache'
 
 MODEL_FILE = MODELS_DIR / 'best_model.pkl'
+COMPACT_MODEL_DIR = MODELS_DIR / 'compact'
+SNAPSHOTS_DIR = MODELS_DIR / 'snapshots'
+TRAINING_STORE_DIR = PROJECT_ROOT / 'training_store'
 TRAINING_SAMPLES = 5000
+TRAINING_CHUNK_SIZE = 100_000
+STREAM_CHUNK_SIZE = 1 << 20  # bytes read per chunk by streaming feature extraction
 TEST_SIZE = 0.2
 RANDOM_STATE = 42
 
+# Families/grids evaluated by `train_model.py --search`
+MODEL_SEARCH_SPACE = {
+    'RandomForest': {'n_estimators': [100, 150], 'max_depth': [10, 15]},
+    'ExtraTrees': {'n_estimators': [150], 'max_depth': [15, None]},
+    'GradientBoosting': {'n_estimators': [100], 'max_depth': [3]},
+    'HistGradientBoosting': {'max_iter': [200], 'learning_rate': [0.05]},
+    'LogisticRegression': {'C': [1.0, 10.0]},
+}
+SEARCH_CV_FOLDS = 3
+SEARCH_MAX_WORKERS = None
+# Accuracy traded away per 10x increase in per-sample latency (0.5% better but 10x slower loses)
+SEARCH_LATENCY_PENALTY = 0.01
+
+# Incremental updates (update_model.py): trees added per update, synthetic replay rows per
+# class mixed in so every class stays represented, and the cap before old trees are retired
+INCREMENTAL_TREES = 20
+INCREMENTAL_REPLAY_PER_CLASS = 20
+MAX_FOREST_TREES = 300
+
+SUITE_CHUNK_SIZE = 256
+
+# Adaptive inference (CompactForest.predict_proba_adaptive): off by default; size of the first
+# tree chunk, the accepted chance that stopping early picks a different class than the full
+# forest, and the batch size below which per-chunk overhead outweighs the trees saved
+ADAPTIVE_INFERENCE = False
+ADAPTIVE_CHUNK_TREES = 10
+ADAPTIVE_TOLERANCE = 0.01
+ADAPTIVE_MIN_BATCH = 128
+
+SIM_CACHE_DIR = CACHE_DIR / 'sim'
+SIM_TIMEOUT = 30
+SIM_MAX_WORKERS = 4
+# 'auto': iverilog when installed, else the built-in bit-parallel engine (src/logic_sim.py)
+# for designs in its subset, else the demo mock; or force 'iverilog', 'logic' or 'mock'
+SIM_ENGINE = 'auto'
+# Built-in engine: exhaustive sweep up to this many input patterns (random lanes beyond),
+# and clock cycles per lane for designs with registers
+LOGIC_SIM_MAX_PATTERNS = 1 << 16
+LOGIC_SIM_CYCLES = 16
+
+WAVEFORM_DPI = 300
+WAVEFORM_PREVIEW_DPI = 72
+
+RESULT_CACHE_DIR = CACHE_DIR / 'results'
+# Parsed netlists: in-process LRU size; sources at least this large are also pickled to disk
+NETLIST_CACHE_DIR = CACHE_DIR / 'netlist'
+NETLIST_MEMORY_ITEMS = 256
+NETLIST_DISK_MIN_BYTES = 64 * 1024
+RESULT_CACHE_MEMORY_ENTRIES = 256
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Per-stage profiling (src/profiler.py); disabled profilers cost one call per stage
+PROFILE_ENABLED = False
+PROFILE_TRACE_MEMORY = True
+PROFILE_MAX_SPANS = 10_000
+PROFILE_DIR = REPORTS_DIR / 'profiles'
+
+# Background analysis jobs for the web app: concurrent analyses, queued jobs accepted beyond
+# those, processes rendering waveforms, and how long finished jobs stay pollable
+JOB_MAX_WORKERS = 4
+JOB_MAX_PENDING = 32
+JOB_RENDER_WORKERS = 2
+JOB_RETENTION_SECONDS = 900
+JOB_POLL_SECONDS = 0.5
+
+# Bulk mode in the web app: worker processes per uploaded batch, limit on unpacked upload size,
+# and table rows per page
+BULK_MAX_WORKERS = 4
+BULK_MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+BULK_PAGE_SIZES = [25, 50, 100]
+
+# Local scoring service (serve.py): requests arriving within SERVE_MAX_WAIT_MS of each other are
+# scored in one model call of at most SERVE_MAX_BATCH rows
+SERVE_HOST = '127.0.0.1'
+SERVE_PORT = 8008
+SERVE_MAX_BATCH = 256
+SERVE_MAX_WAIT_MS = 5
+SERVE_MAX_BODY_BYTES = 16 * 1024 * 1024
+
+# Fault-injection campaigns (run_campaign.py): injected fault models, delay inserted by
+# delay_fault, cap on bridged net pairs per design, and variants per worker task
+CAMPAIGN_MODELS = ['stuck_at_0', 'stuck_at_1', 'bridging_fault', 'delay_fault', 'open_circuit']
+CAMPAIGN_DELAY = 25
+CAMPAIGN_MAX_BRIDGES = 200
+CAMPAIGN_SHARD_SIZE = 64
+CAMPAIGN_MAX_WORKERS = None
+
+# Fault dictionary (src/fault_dictionary.py): known-fault response signatures per design, nearest
+# matches returned per lookup, and the weight of dictionary evidence when ranking candidates
+FAULT_DICT_DIR = PROJECT_ROOT / 'fault_dictionary'
+FAULT_DICT_TOP_K = 5
+FAULT_DICT_WEIGHT = 0.5
+
+# Results store (src/results_store.py): one partition per run; buffered rows are written as a part
+# every RESULTS_BATCH_ROWS rows or RESULTS_FLUSH_SECONDS, top-k predictions kept per row, and the
+# confidence drop (points) that regressions() reports
+RESULTS_DIR = PROJECT_ROOT / 'result'
+RESULTS_BATCH_ROWS = 1000
+RESULTS_FLUSH_SECONDS = 60
+RESULTS_TOP_K = 3
+RESULTS_CONFIDENCE_DROP = 10.0
+
 FAULT_TYPES = ['no_fault', 'stuck_at_0', 'stuck_at_1', 'bridging_fault',
                'open_circuit', 'delay_fault', 'transition_fault',
                'logic_error', 'timing_violation']
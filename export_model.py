@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""Export the trained model to the compact memory-mappable format"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.fault_detector import VLSIFaultDetector
+
+def main():
+    detector = VLSIFaultDetector()
+    if not detector.load_model(prefer_compact=False):
+        print("Model not found. Run train_model.py first.")
+        return 1
+    path = detector.export_compact()
+    print(f"Compact model exported to: {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Query analysis results recorded across runs: runs, per-circuit history, trends and regressions"""
+import argparse
+import sys
+from pathlib import Path
+import pandas as pd
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import RESULTS_DIR, RESULTS_CONFIDENCE_DROP
+from src.results_store import ResultsStore
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dir', default=str(RESULTS_DIR), help="results store directory")
+    parser.add_argument('--csv', help="write the table to this CSV path instead of printing it")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('runs', help="list recorded runs")
+    p = sub.add_parser('show', help="rows of one or more runs")
+    p.add_argument('--run', nargs='+', help="run ids (default: latest run)")
+    p.add_argument('--circuit', nargs='+')
+    p.add_argument('--columns', nargs='+', default=['fault_type', 'confidence', 'top2', 'model_version'])
+    p = sub.add_parser('history', help="one circuit across runs")
+    p.add_argument('circuit')
+    p.add_argument('--since', help="first run id to include")
+    p = sub.add_parser('trend', help="per-run mean/min/max of a numeric column")
+    p.add_argument('--column', default='confidence')
+    p.add_argument('--circuit', nargs='+')
+    p.add_argument('--since', help="first run id to include")
+    p = sub.add_parser('regressions', help="circuits whose diagnosis changed between two runs")
+    p.add_argument('--run', help="run to check (default: latest)")
+    p.add_argument('--baseline', help="run to compare against (default: the one before --run)")
+    p.add_argument('--drop', type=float, default=RESULTS_CONFIDENCE_DROP,
+                   help="confidence drop in points that counts as a regression")
+    args = parser.parse_args()
+    
+    store = ResultsStore(args.dir)
+    runs = store.runs()
+    if not runs:
+        print(f"No runs recorded in {args.dir}")
+        return 1
+    latest = runs[-1]['run']
+    
+    if args.command == 'runs':
+        table = pd.DataFrame(runs)
+        table['created'] = pd.to_datetime(table['created'], unit='s')
+    elif args.command == 'show':
+        table = store.query(args.columns, runs=args.run or [latest], circuits=args.circuit)
+    elif args.command == 'history':
+        table = store.history(args.circuit, since=args.since)
+    elif args.command == 'trend':
+        table = store.trend(args.column, circuits=args.circuit, since=args.since)
+    else:
+        table = store.regressions(args.run or latest, args.baseline, args.drop)
+    
+    if args.csv:
+        table.to_csv(args.csv, index=False)
+        print(f"{len(table)} rows: {args.csv}")
+    else:
+        print(table.to_string(index=False) if len(table) else "No matching rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
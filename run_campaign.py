@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Generate labelled fault-injected variants of a golden design and simulate them"""
+import argparse
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import CAMPAIGN_MODELS, CAMPAIGN_MAX_BRIDGES, CAMPAIGN_SHARD_SIZE
+from src.fault_campaign import FaultCampaign
+from src.training_store import TrainingStore
+from src.fault_dictionary import FaultDictionary
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('design', help="golden Verilog design")
+    parser.add_argument('testbench', help="testbench driving the design")
+    parser.add_argument('--module', help="module to inject into (default: first in the design file)")
+    parser.add_argument('--models', nargs='+', default=CAMPAIGN_MODELS, choices=CAMPAIGN_MODELS)
+    parser.add_argument('--max-bridges', type=int, default=CAMPAIGN_MAX_BRIDGES,
+                        help="cap on bridged net pairs (sampled deterministically)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--shard-size', type=int, default=CAMPAIGN_SHARD_SIZE, help="variants per worker task")
+    parser.add_argument('--store', action='store_true', help="append the labelled rows to the training store")
+    parser.add_argument('--unique', action='store_true',
+                        help="with --store, also skip variants whose response duplicates an earlier one "
+                             "(undetected and ambiguous variants are always skipped)")
+    parser.add_argument('--dictionary', action='store_true',
+                        help="add the variants' response signatures to the fault dictionary")
+    parser.add_argument('--out', help="write per-variant results as JSON to this path")
+    args = parser.parse_args()
+    
+    campaign = FaultCampaign(args.models, args.max_bridges, args.shard_size, args.workers)
+    design, testbench = Path(args.design).read_text(), Path(args.testbench).read_text()
+    rows = campaign.run(design, testbench, args.module,
+                        progress=lambda done, total: print(f"  {done}/{total} variants", end='\r'))
+    
+    print("="*80)
+    print(f"{'Label':<20} {'Variants':>9} {'Detected':>9} {'Unique':>9} {'Collapsed':>10} {'Ambiguous':>10} "
+          f"{'Errors':>7}")
+    print("="*80)
+    for label, s in FaultCampaign.summary(rows).items():
+        print(f"{label:<20} {s['variants']:>9} {s['detected']:>9} {s['unique']:>9} "
+              f"{s['collapsed']:>10} {s['ambiguous']:>10} {s['errors']:>7}")
+    print("="*80)
+    
+    if args.store:
+        segment = FaultCampaign.to_store(rows, TrainingStore(), unique_only=args.unique)
+        print(f"Appended to training store as segment {segment}")
+    if args.dictionary:
+        entries = FaultDictionary().add_campaign(design, testbench, rows)
+        print(f"Fault dictionary: {entries} signatures for this design")
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(rows, f, indent=2, default=str)
+        print(f"Results: {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Run a regression suite of (design, testbench) pairs through the fault detector"""
+import argparse
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.fault_detector import VLSIFaultDetector
+from src.suite_runner import RegressionSuiteRunner
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('source', help="directory of designs/testbenches, or a JSON/CSV manifest")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--waveforms', action='store_true', help="also render waveform PNGs")
+    parser.add_argument('--out', help="write results as JSON to this path")
+    args = parser.parse_args()
+    
+    detector = VLSIFaultDetector()
+    if not detector.load_model():
+        print("Model not found. Run train_model.py first.")
+        return 1
+    
+    runner = RegressionSuiteRunner(detector, max_workers=args.workers, render_waveforms=args.waveforms)
+    results = runner.run(args.source)
+    
+    print("="*80)
+    print(f"{'Circuit':<30} {'Fault':<20} {'Confidence':>10}")
+    print("="*80)
+    for r in results:
+        if r['error']:
+            print(f"{r['name']:<30} ERROR: {r['error']}")
+        else:
+            print(f"{r['name']:<30} {r['fault_type']:<20} {r['confidence']:>9.2f}%")
+    print("="*80)
+    if runner.results:
+        print(f"Results store run: {runner.results.run_id}")
+    
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"Results: {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Score feature vectors with the saved fault detection model"""
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.fault_detector import VLSIFaultDetector
+
+def read_rows(path):
+    f = open(path) if path != '-' else sys.stdin
+    with f:
+        if path.endswith('.csv'):
+            return [{k: float(v) for k, v in row.items()} for row in csv.DictReader(f)]
+        data = json.load(f)
+    return data if isinstance(data, list) else [data]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('input', nargs='?', default='-', help="JSON list/object or CSV of features (default: stdin)")
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--adaptive', action='store_true',
+                        help="stop evaluating trees once each sample's top class is settled")
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help="with --adaptive, accepted chance of a different class than the full forest")
+    args = parser.parse_args()
+    
+    detector = VLSIFaultDetector()
+    if not detector.load_model():
+        print("Model not found. Run train_model.py first.", file=sys.stderr)
+        return 1
+    
+    result = detector.detect_faults_batch(read_rows(args.input), top_k=args.top_k,
+                                          adaptive=args.adaptive, tolerance=args.tolerance)
+    for i in range(len(result['fault_type'])):
+        print(json.dumps({
+            'fault_type': result['fault_type'][i],
+            'confidence': round(float(result['confidence'][i]), 4),
+            'top_k': [[name, round(float(p), 4)] for name, p in
+                      zip(result['top_k'][i], result['top_k_confidence'][i])],
+            'trees_used': int(result['trees_used'][i]),
+        }))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Serve fault predictions over local HTTP/JSON with request micro-batching"""
+import argparse
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from config import SERVE_HOST, SERVE_PORT, SERVE_MAX_BATCH, SERVE_MAX_WAIT_MS
+from src.fault_detector import VLSIFaultDetector
+from src.scoring_service import ScoringService
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--host', default=SERVE_HOST)
+    parser.add_argument('--port', type=int, default=SERVE_PORT)
+    parser.add_argument('--max-batch', type=int, default=SERVE_MAX_BATCH, help="rows per model call")
+    parser.add_argument('--max-wait-ms', type=float, default=SERVE_MAX_WAIT_MS,
+                        help="how long a request may wait for others to share its batch")
+    args = parser.parse_args()
+    
+    detector = VLSIFaultDetector()
+    if not detector.load_model():
+        print("Model not found. Run train_model.py first.", file=sys.stderr)
+        return 1
+    
+    service = ScoringService(detector, args.host, args.port, args.max_batch, args.max_wait_ms / 1000)
+    print(f"Serving {detector.best_model_name} ({detector.model_version}) on {service.address}")
+    print("   POST /score   GET /health")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
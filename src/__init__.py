@@ -1,8 +1,39 @@
-from .feature_extractor import FeatureExtractor
-from .fault_detector import VLSIFaultDetector
-from .simulator import VerilogSimulator
-from .analyzer import CircuitAnalyzer
-from .waveform_generator import WaveformGenerator
-
-__all__ = ['FeatureExtractor', 'VLSIFaultDetector', 'VerilogSimulator',
-           'CircuitAnalyzer', 'WaveformGenerator']
+import sys
+from importlib import import_module
+from pathlib import Path
+
+# config.py lives at the project root; make it importable once for every submodule
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Components are imported on first attribute access, so e.g. FeatureExtractor alone
+# does not pull in scikit-learn, pandas or matplotlib
+_LAZY = {
+    'FeatureExtractor': '.feature_extractor',
+    'VLSIFaultDetector': '.fault_detector',
+    'VerilogSimulator': '.simulator',
+    'CircuitAnalyzer': '.analyzer',
+    'WaveformGenerator': '.waveform_generator',
+    'RegressionSuiteRunner': '.suite_runner',
+    'CompactForest': '.compact_model',
+    'StageProfiler': '.profiler',
+    'AnalysisJobs': '.job_queue',
+    'ScoringService': '.scoring_service',
+    'FaultCampaign': '.fault_campaign',
+    'LogicSimulator': '.logic_sim',
+    'FaultDictionary': '.fault_dictionary',
+    'ResultsStore': '.results_store',
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
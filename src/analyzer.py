@@ -1,77 +1,212 @@
-import re
-import sys
-from pathlib import Path
-from datetime import datetime
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import REPORTS_DIR
+import os
+import time
 from .feature_extractor import FeatureExtractor
 from .simulator import VerilogSimulator
 from .waveform_generator import WaveformGenerator
+from .vcd_reader import read_vcd
+from .result_cache import ResultCache
+from .training_store import TrainingStore
+from .profiler import StageProfiler
+from .netlist import parse_netlist
+from .fault_dictionary import FaultDictionary
+from .results_store import ResultsStore
+
+
+def module_name_of(verilog_code, default='test_module'):
+    top = parse_netlist(verilog_code).top
+    return top.name if top else default
+
+
+_UNPROFILED = StageProfiler(enabled=False)
+
+
+def _quiet(*args, **kwargs):
+    pass
+
+
+def extract_circuit(simulator, verilog_code, testbench_code, module_name, netlist,
+                    profile=_UNPROFILED.stage, log=_quiet):
+    # Simulation through feature extraction; every analysis path (single circuits, queued jobs,
+    # suite workers) goes through here so their features, and the cache entries keyed on them, agree
+    log("\n1. Simulating...")
+    with profile('simulate'):
+        sim_result = simulator.simulate(verilog_code, testbench_code, module_name)
+    with profile('read_vcd'):
+        vcd = read_vcd(sim_result['vcd']) if sim_result.get('vcd') else None
+    log("   Done")
+    
+    log("\n2. Extracting features...")
+    with profile('extract_features'):
+        features = FeatureExtractor.extract_features(
+            verilog_code, testbench_code,
+            sim_result.get('expected', ''),
+            sim_result.get('actual', ''),
+            transitions=vcd,
+            netlist=netlist
+        )
+    return sim_result, vcd, features
+
+
+def render_waveform(verilog_code, testbench_code, circuit_name, vcd=None, preview=False):
+    # vcd: VCDData or the path of the simulation's dump; without one the waveform is synthesized
+    if isinstance(vcd, (str, os.PathLike)):
+        vcd = read_vcd(vcd)
+    if vcd is not None:
+        return WaveformGenerator.generate_from_vcd(vcd, circuit_name, preview=preview)
+    return WaveformGenerator.generate(verilog_code, testbench_code, circuit_name, preview=preview)
 
-# Import detector globally (will be passed in)
-detector = None
 
 class CircuitAnalyzer:
-    def __init__(self, fault_detector):
-        global detector
-        detector = fault_detector
-        self.simulator = VerilogSimulator()
+    def __init__(self, fault_detector, cache=None, profiler=None, dictionary=None, results=None,
+                 simulator=None):
+        self.detector = fault_detector
+        self.dictionary = dictionary  # optional FaultDictionary of known-fault signatures
+        self.simulator = simulator or VerilogSimulator()
+        self.cache = cache if cache is not None else ResultCache()
+        self.results = results if results is not None else ResultsStore()
+        self.profiler = profiler or StageProfiler()
         self.enable_waveform = True
     
-    def analyze_circuit(self, verilog_code, testbench_code, circuit_name=None):
-        print("="*80)
-        print("ANALYZING CIRCUIT")
-        print("="*80)
+    def analyze_circuit(self, verilog_code, testbench_code, circuit_name=None, verbose=True):
+        with self.profiler.run(circuit_name or module_name_of(verilog_code)):
+            return self._analyze(verilog_code, testbench_code, circuit_name, verbose)
+    
+    def _analyze(self, verilog_code, testbench_code, circuit_name, verbose):
+        started = time.perf_counter()
+        profile = self.profiler.stage
+        log = print if verbose else _quiet
+        log("="*80)
+        log("ANALYZING CIRCUIT")
+        log("="*80)
         
-        match = re.search(r'module\s+(\w+)', verilog_code)
-        module_name = match.group(1) if match else 'test_module'
+        netlist, design_key, dict_version, cache_key = self.prepare(verilog_code, testbench_code)
+        module_name = netlist.top.name if netlist.top else 'test_module'
         circuit_name = circuit_name or module_name
         
-        print(f"\nModule: {module_name}")
-        print("\n1. Simulating...")
-        sim_result = self.simulator.simulate(verilog_code, testbench_code, module_name)
-        print("   Done")
-        
-        print("\n2. Extracting features...")
-        features = FeatureExtractor.extract_features(
-            verilog_code, testbench_code,
-            sim_result.get('expected', ''),
-            sim_result.get('actual', '')
-        )
-        print("   Done")
+        log(f"\nModule: {module_name}")
+        cached = self.lookup(cache_key, circuit_name)
+        if cached:
+            log("\nCache hit")
+            cached['cached'] = True
+            self.record(cached, started)
+            if verbose:
+                self.print_result(cached)
+            return cached
         
-        print("\n3. AI Fault Detection...")
-        fault_type, confidence, top3, model_info = detector.detect_faults(features)
+        result, vcd = self.predict(verilog_code, testbench_code, circuit_name, netlist, design_key,
+                                   dict_version, log)
         
-        print("\n4. Generating waveform...")
+        log("\n4. Generating waveform...")
         if self.enable_waveform:
             try:
-                waveform_path = WaveformGenerator.generate(verilog_code, testbench_code, circuit_name)
-                print(f"   Saved: {waveform_path.name}")
+                with profile('waveform'):
+                    result['waveform'] = render_waveform(verilog_code, testbench_code, circuit_name, vcd)
+                log(f"   Saved: {result['waveform'].name}")
             except Exception as e:
-                print(f"   Skipped: {e}")
-                waveform_path = None
+                log(f"   Skipped: {e}")
+        
+        self.store(cache_key, result)
+        self.record(result, started)
+        if verbose:
+            self.print_result(result)
+        return result
+    
+    def prepare(self, verilog_code, testbench_code):
+        # -> (netlist, fault-dictionary design key and version, result-cache key)
+        with self.profiler.stage('parse'):
+            netlist = parse_netlist(verilog_code)
+        design_key = dict_version = None
+        if self.dictionary is not None:
+            design_key = FaultDictionary.design_key(verilog_code, testbench_code, netlist)
+            dict_version = self.dictionary.version(design_key)
+        cache_key = ResultCache.key(verilog_code, testbench_code,
+                                    self.detector.model_version, FeatureExtractor.VERSION,
+                                    self.simulator.engine, dict_version or '')
+        return netlist, design_key, dict_version, cache_key
+    
+    def lookup(self, cache_key, circuit_name):
+        # A cached result is only reused while the waveform it points at still exists
+        with self.profiler.stage('cache_lookup'):
+            cached = self.cache.get(cache_key) if self.cache else None
+        if cached and cached['circuit'] == circuit_name and (
+                cached['waveform'] is None or cached['waveform'].exists()):
+            return cached
+        return None
+    
+    def predict(self, verilog_code, testbench_code, circuit_name, netlist, design_key=None,
+                dict_version=None, log=_quiet):
+        # Everything up to (not including) the waveform -> (result without waveform, VCDData or None)
+        profile = self.profiler.stage
+        module_name = netlist.top.name if netlist.top else 'test_module'
+        sim_result, vcd, features = extract_circuit(self.simulator, verilog_code, testbench_code,
+                                                    module_name, netlist, profile, log)
+        matches = []
+        if dict_version:
+            with profile('dictionary'):
+                matches = self.dictionary.lookup(design_key, sim_result.get('actual', ''))
+            if matches:
+                features['pattern_similarity'] = FaultDictionary.similarity(matches)
+        log("   Done")
         
+        log("\n3. AI Fault Detection...")
+        with profile('inference'):
+            fault_type, confidence, top3, model_info = self.detector.detect_faults(features)
+        if matches:
+            top3 = FaultDictionary.rank(top3, matches)
+            fault_type, confidence = top3[0]
+        
+        result = {
+            'circuit': circuit_name,
+            'module': module_name,
+            'fault_type': fault_type,
+            'confidence': confidence,
+            'top3': top3,
+            'model_info': model_info,
+            'features': features,
+            'matches': matches,
+            'netlist': netlist.top.stats if netlist.top else {},
+            'waveform': None,
+            'cached': False,
+        }
+        return result, vcd
+    
+    def store(self, cache_key, result):
+        if self.cache:
+            with self.profiler.stage('cache_store'):
+                self.cache.put(cache_key, result)
+    
+    def record(self, result, started):
+        # One row per analysis in the results store, cache hits included
+        result['run'] = None
+        if self.results:
+            timings = {**self.profiler.stage_times(self.profiler.current_run()),
+                       'total': time.perf_counter() - started}
+            result['run'] = self.results.append(result, self.detector.model_version,
+                                                FeatureExtractor.VERSION, self.simulator.engine, timings)
+    
+    def record_labels(self, results, fault_types, store=None):
+        # Confirmed diagnoses become training rows for VLSIFaultDetector.update()
+        store = store or TrainingStore(feature_names=self.detector.feature_names)
+        return store.append([r['features'] for r in results], fault_types, source='analysis')
+    
+    @staticmethod
+    def print_result(result):
         print("\n" + "="*80)
         print("RESULTS")
         print("="*80)
-        print(f"\n{model_info}")
-        print(f"\nFault: {fault_type.upper().replace('_', ' ')}")
-        print(f"Confidence: {confidence:.2f}%")
+        print(f"\n{result['model_info']}")
+        print(f"\nFault: {result['fault_type'].upper().replace('_', ' ')}")
+        print(f"Confidence: {result['confidence']:.2f}%")
         print(f"\nTop 3:")
-        for i, (f, p) in enumerate(top3, 1):
+        for i, (f, p) in enumerate(result['top3'], 1):
             print(f"   {i}. {f.replace('_', ' '):<25} {p:>6.2f}%")
+        if result.get('matches'):
+            print(f"\nNearest known faults:")
+            for m in result['matches']:
+                print(f"   {m['fault_id']:<30} {m['label']:<20} distance {m['distance']}")
         
-        REPORTS_DIR.mkdir(exist_ok=True, parents=True)
-        report_path = REPORTS_DIR / f'{circuit_name}_report.txt'
-        with open(report_path, 'w') as f:
-            f.write(f"VLSI Fault Report\n")
-            f.write(f"Module: {module_name}\n")
-            f.write(f"Date: {datetime.now()}\n")
-            f.write(f"Fault: {fault_type}\n")
-            f.write(f"Confidence: {confidence:.2f}%\n")
-        
-        print(f"\nReport: {report_path}")
-        if waveform_path:
-            print(f"Waveform: {waveform_path}")
+        if result.get('run'):
+            print(f"\nResults store run: {result['run']}")
+        if result['waveform']:
+            print(f"Waveform: {result['waveform']}")
         print("="*80)
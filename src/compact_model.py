@@ -0,0 +1,156 @@
+import json
+import numpy as np
+from pathlib import Path
+
+ARRAYS = ('feature', 'threshold', 'children', 'value', 'roots')
+FORMAT_VERSION = 1
+
+
+class CompactForest:
+    # Flattened tree ensemble: all trees' nodes live in one set of contiguous arrays.
+    # Leaves point to themselves so every sample can walk exactly max_depth steps.
+    def __init__(self, feature, threshold, children, value, roots, max_depth, meta=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children  # (n_nodes, 2): left, right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.meta = meta or {}
+        self.classes_ = np.arange(value.shape[1])
+    
+    @property
+    def n_trees(self):
+        return len(self.roots)
+    
+    @classmethod
+    def from_sklearn(cls, model, scaler=None, **meta):
+        if not hasattr(model, 'estimators_') or not hasattr(model.estimators_[0], 'tree_'):
+            raise TypeError(f"{type(model).__name__} is not a forest of decision trees")
+        
+        mean = scale = None
+        if scaler is not None:
+            mean, scale = scaler.mean_, scaler.scale_
+        
+        parts = {name: [] for name in ARRAYS}
+        offset, max_depth = 0, 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            leaf = tree.children_left == -1
+            idx = np.arange(n)
+            
+            feature = np.where(leaf, 0, tree.feature)
+            threshold = cls._float32_boundary(tree.threshold)
+            if scaler is not None:
+                # x_scaled <= t  <=>  x <= t * scale + mean  (scale > 0)
+                threshold = threshold * scale[feature] + mean[feature]
+            threshold = np.where(leaf, 0.0, threshold)
+            value = tree.value[:, 0, :]
+            value = value / value.sum(axis=1, keepdims=True)
+            
+            parts['feature'].append(feature.astype(np.int32))
+            parts['threshold'].append(threshold)
+            children = np.column_stack([np.where(leaf, idx, tree.children_left),
+                                        np.where(leaf, idx, tree.children_right)])
+            parts['children'].append((children + offset).astype(np.int32))
+            parts['value'].append(value.astype(np.float32))
+            parts['roots'].append(np.array([offset], dtype=np.int32))
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+        
+        arrays = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+        return cls(max_depth=max_depth, meta=meta, **arrays)
+    
+    @staticmethod
+    def _float32_boundary(threshold):
+        # sklearn compares float32(x) <= t. Move t to the midpoint between the float32 values on
+        # either side of it so a float64 comparison makes the same decision for every input.
+        below = threshold.astype(np.float32)
+        below = np.where(below > threshold, np.nextafter(below, np.float32(-np.inf)), below)
+        above = np.nextafter(below, np.float32(np.inf))
+        return (below.astype(np.float64) + above.astype(np.float64)) / 2
+    
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAYS:
+            np.save(directory / f'{name}.npy', np.ascontiguousarray(getattr(self, name)))
+        meta = {**self.meta, 'format': FORMAT_VERSION, 'max_depth': int(self.max_depth)}
+        (directory / 'meta.json').write_text(json.dumps(meta, indent=2))
+        return directory
+    
+    @classmethod
+    def load(cls, directory, mmap=True):
+        # mmap_mode='r' lets every worker process share one read-only copy via the page cache
+        directory = Path(directory)
+        meta = json.loads((directory / 'meta.json').read_text())
+        if meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact model format: {meta.get('format')}")
+        arrays = {name: np.load(directory / f'{name}.npy', mmap_mode='r' if mmap else None)
+                  for name in ARRAYS}
+        return cls(max_depth=meta['max_depth'], meta=meta, **arrays)
+    
+    def predict_proba(self, X, chunk_size=4096):
+        X = np.asarray(X, dtype=np.float64)
+        out = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), chunk_size):
+            leaves = self.apply(X[start:start + chunk_size])
+            out[start:start + chunk_size] = self._leaf_mean(leaves)
+        return out
+    
+    def predict_proba_adaptive(self, X, tolerance=0.01, chunk_trees=10):
+        # Evaluates trees in chunks (chunk_trees first, then as many as already evaluated: 10, 10,
+        # 20, 40, ... keeps the per-chunk overhead down) and stops early for samples whose top
+        # class is settled: either no outcome of the remaining trees can change it, or - taking
+        # the trees seen so far as a sample drawn without replacement from the forest - the
+        # Hoeffding-Serfling bound puts the chance the full forest disagrees below `tolerance`
+        # (union over all rival classes). Returns (probabilities, trees used per sample); the
+        # probabilities are the means over the trees each sample used.
+        X = np.asarray(X, dtype=np.float64)
+        n, n_trees, n_classes = len(X), self.n_trees, self.value.shape[1]
+        sums = np.zeros((n, n_classes))
+        used = np.zeros(n, dtype=np.int64)
+        active = np.arange(n)
+        log_term = np.log(max(n_classes - 1, 1) / tolerance) if tolerance > 0 else np.inf
+        t = 0
+        while t < n_trees:
+            trees = np.arange(t, min(t + max(chunk_trees, t), n_trees))
+            leaves = self.apply(X[active], trees)
+            sums[active] += self.value.take(leaves.ravel(), axis=0).reshape(len(active), len(trees), -1).sum(axis=1)
+            t = int(trees[-1]) + 1
+            used[active] = t
+            if t == n_trees or n_classes < 2:
+                break
+            # Per-tree margin of the leading class over the runner-up lies in [-1, 1]
+            top2 = np.partition(sums[active], n_classes - 2, axis=1)[:, -2:]
+            margin = (top2[:, 1] - top2[:, 0]) / t
+            settled = margin * t > n_trees - t
+            if tolerance > 0:
+                settled |= margin >= np.sqrt(2 * (1 - (t - 1) / n_trees) * log_term / t)
+            active = active[~settled]
+            if not len(active):
+                break
+        return sums / used[:, None], used
+    
+    def predict(self, X):
+        return self.predict_proba(X).argmax(axis=1)
+    
+    def apply(self, X, trees=None):
+        # Leaf node index per (sample, tree); all (sample, tree) pairs step down one level at a time
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        roots = self.roots if trees is None else self.roots[trees]
+        n, d = X.shape
+        flat_x = X.ravel()
+        row_base = np.repeat(np.arange(n) * d, len(roots))
+        nodes = np.tile(roots, n).astype(np.intp)
+        children = self.children.ravel()
+        for _ in range(self.max_depth):
+            go_right = flat_x[row_base + self.feature.take(nodes)] > self.threshold.take(nodes)
+            nodes = children.take(2 * nodes + go_right)
+        return nodes.reshape(n, len(roots))
+    
+    def _leaf_mean(self, leaves):
+        n, n_trees = leaves.shape
+        values = self.value.take(leaves.ravel(), axis=0).reshape(n, n_trees, -1)
+        return values.sum(axis=1) / n_trees
@@ -0,0 +1,326 @@
+import hashlib
+import itertools
+import os
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+from config import (CAMPAIGN_MODELS, CAMPAIGN_DELAY, CAMPAIGN_MAX_BRIDGES, CAMPAIGN_SHARD_SIZE,
+                    CAMPAIGN_MAX_WORKERS, RANDOM_STATE)
+from .feature_extractor import FeatureExtractor
+from .netlist import DIRECTIONS, TOKEN_RE, parse_netlist, tokenize
+from .simulator import VerilogSimulator
+
+# Source patterns inject() rewrites; the module itself is read with the netlist parser
+DECL_RE = re.compile(r'^\s*(input|output|inout|wire|reg)\b\s*(?:(wire|reg)\b)?\s*(?:signed\b)?\s*'
+                     r'(\[[^\]]*\])?\s*(.*)$', re.S)
+RANGE_RE = re.compile(r'\[\s*(\d+)\s*:\s*(\d+)\s*\]')
+PRIMITIVES = r'(?:and|or|nand|nor|xor|xnor|not|buf)\b'
+DELAY = r'(?:#\s*(?:\d+|\([^)]*\))\s*)?'
+PRIM_RE = re.compile(rf'^\s*{PRIMITIVES}\s*{DELAY}(?:\w+\s*)?\((.*)\)\s*$', re.S)
+ASSIGN_RE = re.compile(rf'^\s*assign\s+{DELAY}(\w+)\s*=\s*(.*)$', re.S)
+PROC_RE = re.compile(r'(?<![\w.$])(\w+)\s*(?:\[[^\]]*\]\s*)?<?=(?!=)')
+DECLARED = DIRECTIONS | {'wire', 'reg'}
+# Netlist node kind -> how inject() redirects the net's driver
+DRIVERS = {'assign': 'assign', 'gate': 'gate', 'always': 'always', 'initial': 'always'}
+
+FAULT_LABELS = {'stuck_at_0': 'stuck_at_0', 'stuck_at_1': 'stuck_at_1', 'bridging': 'bridging_fault',
+                'delay': 'delay_fault', 'open': 'open_circuit'}
+MODELS = {label: model for model, label in FAULT_LABELS.items()}
+# Only an event-driven simulator sees high impedance and delays: the built-in engine reads z as 0
+# (an open would repeat stuck_at_0) and the mock ignores both, so these models are skipped there
+EVENT_MODELS = {'open', 'delay'}
+EVENT_ENGINES = {'iverilog'}
+
+
+def parse_module(verilog_code, module=None):
+    # Nets of one module with their direction, declared type and range, and driver, read off the
+    # netlist parser's net graph; comments are dropped so the injected variants never carry a
+    # commented-out copy of the golden logic. Only inject() still works on the source text.
+    code = TOKEN_RE.sub(lambda m: '' if m.lastgroup == 'comment' else m.group(), verilog_code).strip()
+    netlist = parse_netlist(code)
+    found = netlist.modules.get(module) if module is not None else next(iter(netlist.modules.values()), None)
+    if found is None:
+        raise ValueError(f"Module {module or ''} not found".replace('  ', ' '))
+    _, offsets = tokenize(code)
+    _, body, end = found.span
+    
+    # Declared ports and wire/reg nets; integers, implicit and other nets are left alone
+    nets = {}
+    for name, net in found.nets.items():
+        if net.kind in DECLARED:
+            kinds = [found.nodes[i].kind for i in net.drivers]
+            nets[name] = {'dir': net.kind if net.kind in DIRECTIONS else None, 'reg': net.net_type == 'reg',
+                          'range': net.range, 'driver': DRIVERS.get(kinds[-1]) if kinds else None}
+    fanout = {name: len(set(found.nets[name].loads)) for name in nets}
+    aliases = {node.targets[0]: node.alias for node in found.nodes if node.alias and len(node.targets) == 1}
+    fanins = [set(node.sources) & set(nets) for node in found.nodes]
+    return {'name': found.name, 'code': code, 'header_end': offsets[body - 1] + 1, 'body_end': offsets[end],
+            'nets': nets, 'fanout': fanout, 'aliases': aliases, 'fanins': fanins}
+
+
+def _width(net):
+    if not net['range']:
+        return 1
+    match = RANGE_RE.fullmatch(net['range'])
+    if match:
+        return abs(int(match.group(1)) - int(match.group(2))) + 1
+    msb, lsb = net['range'][1:-1].split(':')
+    return f'({msb})-({lsb})+1'
+
+
+def _const(net, bit):
+    width = _width(net)
+    return f"1'b{bit}" if width == 1 else f"{{{width}{{1'b{bit}}}}}"
+
+
+def enumerate_faults(info, models=CAMPAIGN_MODELS, max_bridges=CAMPAIGN_MAX_BRIDGES, seed=RANDOM_STATE):
+    # Injectable nets are module inputs and nets with a driver we can redirect (assign, gate
+    # primitive, procedural); inout and instance-driven nets are left alone
+    nets = [n for n, net in info['nets'].items()
+            if net['dir'] == 'input' or (net['dir'] != 'inout' and net['driver'])]
+    faults = []
+    for label in models:
+        model = MODELS[label]
+        if model == 'bridging':
+            continue
+        for name in nets:
+            if model == 'delay' and info['nets'][name]['dir'] == 'input':
+                continue
+            faults.append({'id': f'{model}:{name}', 'label': label, 'model': model, 'nets': [name]})
+    if 'bridging_fault' in models:
+        # Nets read side by side by one statement are plausible neighbours; bridging a net with
+        # the net it drives would only build a combinational loop
+        pairs = set()
+        wanted = set(nets)
+        for read in info['fanins']:
+            words = sorted(read & wanted)
+            pairs.update(p for p in itertools.combinations(words, 2)
+                         if _width(info['nets'][p[0]]) == _width(info['nets'][p[1]]))
+        pairs = sorted(pairs)
+        if len(pairs) > max_bridges:
+            pairs = sorted(random.Random(seed).sample(pairs, max_bridges))
+        faults += [{'id': f'bridging:{a}+{b}', 'label': 'bridging_fault', 'model': 'bridging',
+                    'nets': [a, b]} for a, b in pairs]
+    return faults
+
+
+def collapse_faults(info, faults):
+    # Structural equivalence: a stuck-at on the only load of a buffer/inverter input is the same
+    # fault as a stuck-at (flipped for an inverter) on its output, so only the output is kept
+    ids = {f['id'] for f in faults}
+    equivalent = {}
+    for out, (src, inverted) in info['aliases'].items():
+        if info['fanout'].get(src) != 1:
+            continue
+        for bit in '01':
+            drop = f'stuck_at_{bit}:{src}'
+            keep = f"stuck_at_{'10'[int(bit)] if inverted else bit}:{out}"
+            if drop in ids and keep in ids:
+                equivalent[drop] = keep
+    # Chains (a -> b -> c) resolve to their last representative
+    for drop in equivalent:
+        while equivalent[drop] in equivalent:
+            equivalent[drop] = equivalent[equivalent[drop]]
+    return [f for f in faults if f['id'] not in equivalent], equivalent
+
+
+def _redirect(body, name, net):
+    # Returns (body, original value, faulted net, declarations). Module inputs have no driver
+    # inside the module, so their readers move to a faulted copy; driven nets keep their name
+    # for every reader and their driver moves to name__orig instead.
+    rng = f"{net['range']} " if net['range'] else ''
+    word = re.compile(rf'(?<![\w.$]){re.escape(name)}\b')
+    statements = body.split(';')
+    if net['dir'] == 'input':
+        faulted = f'{name}__f'
+        for i, stmt in enumerate(statements):
+            d = DECL_RE.match(stmt)
+            if d and '=' not in d.group(4):
+                continue
+            head, sep, tail = stmt.partition('=') if d else ('', '', stmt)
+            statements[i] = head + sep + word.sub(faulted, tail)
+        return ';'.join(statements), name, faulted, [f'wire {rng}{faulted};']
+    
+    orig = f'{name}__orig'
+    decls = [f"{'reg' if net['driver'] == 'always' else 'wire'} {rng}{orig};"]
+    for i, stmt in enumerate(statements):
+        d, a, p = DECL_RE.match(stmt), ASSIGN_RE.match(stmt), PRIM_RE.match(stmt)
+        if d:
+            names = [n.strip() for n in d.group(4).split(',')]
+            if net['reg'] and 'reg' in d.group(1, 2) and name in names:
+                # The faulted net is now driven by a continuous assign
+                kind = 'wire' if d.group(1) == 'reg' else d.group(1)
+                if names == [name]:
+                    statements[i] = stmt[:d.start(1)] + f'{kind} {rng}{name}'
+                else:
+                    names.remove(name)
+                    statements[i] = stmt[:d.start(4)] + ', '.join(names)
+                    decls.append(f'{kind} {rng}{name};')
+            elif re.match(rf'{re.escape(name)}\s*=', d.group(4)):
+                statements[i] = stmt[:d.start(4)] + word.sub(orig, d.group(4), count=1)
+        elif a:
+            # Every assignment of the list driving the net: assign x = a, name = b
+            statements[i] = re.sub(rf'((?:^\s*assign\s+{DELAY}|,)\s*){re.escape(name)}\b'
+                                   rf'(?=\s*(?:\[[^\]]*\]\s*)?=(?!=))', rf'\g<1>{orig}', stmt)
+        elif p:
+            # The output terminal of every instance: and g0(name, a, b), g1(...)
+            statements[i] = re.sub(rf'((?:^\s*{PRIMITIVES}\s*{DELAY}|\)\s*,)\s*(?:\w+\s*)?\(\s*)'
+                                   rf'{re.escape(name)}\b(?=\s*[,)])', rf'\g<1>{orig}', stmt)
+        elif net['driver'] == 'always':
+            statements[i] = PROC_RE.sub(lambda m: orig + m.group(0)[len(name):]
+                                        if m.group(1) == name else m.group(0), stmt)
+    return ';'.join(statements), orig, name, decls
+
+
+def inject(info, fault, delay=CAMPAIGN_DELAY):
+    # Faulty copy of the parsed module; the fault sits on a continuous assign appended to it
+    code = info['code']
+    header, body, tail = code[:info['header_end']], code[info['header_end']:info['body_end']], code[info['body_end']:]
+    origs, targets, decls = [], [], []
+    for name in fault['nets']:
+        net = info['nets'][name]
+        body, orig, target, new = _redirect(body, name, net)
+        origs.append(orig)
+        targets.append(target)
+        decls += new
+        if net['reg'] and net['dir'] == 'output':
+            header = re.sub(rf'\breg\s+((?:signed\s*)?(?:\[[^\]]*\]\s*)?{re.escape(name)}\b)', r'\1', header)
+    
+    net = info['nets'][fault['nets'][0]]
+    lag = ''
+    if fault['model'] in ('stuck_at_0', 'stuck_at_1'):
+        value = _const(net, fault['model'][-1])
+    elif fault['model'] == 'open':
+        value = _const(net, 'z')
+    elif fault['model'] == 'delay':
+        value, lag = origs[0], f'#{delay} '
+    else:
+        # Wired-AND: both nets see the conjunction of their drivers
+        value = ' & '.join(origs)
+    assigns = [f'assign {lag}{target} = {value};' for target in targets]
+    return (header + '\n  ' + '\n  '.join(decls) + body.rstrip() + '\n  ' + '\n  '.join(assigns)
+            + '\n' + tail)
+
+
+def _signature(trace):
+    return hashlib.sha1(trace.encode()).hexdigest()[:12]
+
+
+def _run_shard(shard):
+    # Runs in a worker process: simulate and extract each variant of one shard
+    testbench_code, module_name, golden, variants = shard
+    simulator = VerilogSimulator()
+    rows = []
+    for fault, verilog_code in variants:
+        try:
+            sim_result = simulator.simulate(verilog_code, testbench_code, module_name)
+            engine = sim_result.get('engine', 'mock')
+            if engine != golden.get('engine', 'mock'):
+                raise ValueError(f"Variant simulated by {engine}, golden design by {golden.get('engine', 'mock')}")
+            expected = sim_result.get('expected') or ''
+            if engine != 'mock' and golden.get('actual'):
+                expected = golden['actual']
+            actual = sim_result.get('actual', '')
+            features = FeatureExtractor.extract_features(verilog_code, testbench_code, expected, actual)
+            # Without a reference response nothing counts as detected
+            rows.append({**fault, 'features': features, 'expected': expected, 'actual': actual,
+                         'detected': bool(expected) and actual != expected, 'error': None})
+        except Exception as e:
+            rows.append({**fault, 'features': None, 'expected': '', 'actual': '', 'detected': False,
+                         'error': str(e)})
+    return rows
+
+
+class FaultCampaign:
+    # Generates labelled fault-injected variants of a golden module and runs them through
+    # simulation and feature extraction, sharded across worker processes
+    def __init__(self, models=CAMPAIGN_MODELS, max_bridges=CAMPAIGN_MAX_BRIDGES,
+                 shard_size=CAMPAIGN_SHARD_SIZE, max_workers=CAMPAIGN_MAX_WORKERS, delay=CAMPAIGN_DELAY):
+        unknown = set(models) - set(MODELS)
+        if unknown:
+            raise ValueError(f"Unknown fault model(s): {', '.join(sorted(unknown))}")
+        self.models = list(models)
+        self.max_bridges = max_bridges
+        self.shard_size = shard_size
+        self.max_workers = max_workers or os.cpu_count()
+        self.delay = delay
+    
+    def variants(self, verilog_code, module=None):
+        # (fault, faulty source) pairs after structural collapsing and source dedupe, plus the
+        # map of dropped fault id -> representative id
+        info = parse_module(verilog_code, module)
+        faults, equivalent = collapse_faults(info, enumerate_faults(info, self.models, self.max_bridges))
+        seen = {_signature(info['code']): 'golden'}
+        variants = []
+        for fault in faults:
+            source = inject(info, fault, self.delay)
+            key = _signature(source)
+            if key in seen:
+                equivalent[fault['id']] = seen[key]
+                continue
+            seen[key] = fault['id']
+            variants.append((fault, source))
+        return info, variants, equivalent
+    
+    def run(self, verilog_code, testbench_code, module=None, progress=None):
+        # progress(done, total) is called after every finished shard
+        info, variants, equivalent = self.variants(verilog_code, module)
+        golden = VerilogSimulator().simulate(verilog_code, testbench_code, info['name'])
+        if golden.get('engine', 'mock') not in EVENT_ENGINES:
+            variants = [(fault, source) for fault, source in variants if fault['model'] not in EVENT_MODELS]
+        golden_row = {'id': 'golden', 'label': 'no_fault', 'model': None, 'nets': [],
+                      'features': FeatureExtractor.extract_features(
+                          verilog_code, testbench_code, golden.get('expected'), golden.get('actual', '')),
+                      'expected': golden.get('expected') or '', 'actual': golden.get('actual', ''),
+                      'detected': False, 'error': None if golden.get('success') else golden.get('output')}
+        
+        shards = [(testbench_code, info['name'], golden, variants[i:i + self.shard_size])
+                  for i in range(0, len(variants), self.shard_size)]
+        rows = [golden_row]
+        if shards:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(shards))) as pool:
+                for shard_rows in pool.map(_run_shard, shards):
+                    rows.extend(shard_rows)
+                    if progress:
+                        progress(len(rows) - 1, len(variants))
+        
+        # Functional equivalence: same label and same response as an earlier variant. A detected
+        # response shared by variants of different labels cannot tell them apart: ambiguous
+        first = {}
+        members = {}
+        labels = {}
+        for drop, keep in equivalent.items():
+            members.setdefault(keep, []).append(drop)
+        for row in rows:
+            row['signature'] = _signature(row['actual'])
+            row['equivalent_to'] = first.setdefault((row['label'], row['signature']), row['id'])
+            row['equivalent'] = sorted(members.get(row['id'], []))
+            if row['equivalent_to'] == row['id']:
+                row['equivalent_to'] = None
+            if row['detected'] or row['id'] == 'golden':
+                labels.setdefault(row['signature'], set()).add(row['label'])
+        for row in rows:
+            row['ambiguous'] = len(labels.get(row['signature'], ())) > 1
+        return rows
+    
+    @staticmethod
+    def summary(rows):
+        out = {}
+        for row in rows:
+            s = out.setdefault(row['label'], {'variants': 0, 'detected': 0, 'unique': 0, 'collapsed': 0,
+                                              'ambiguous': 0, 'errors': 0})
+            s['variants'] += 1
+            s['detected'] += row['detected']
+            s['ambiguous'] += row['ambiguous']
+            s['unique'] += row['equivalent_to'] is None
+            s['collapsed'] += len(row['equivalent'])
+            s['errors'] += row['error'] is not None
+        return out
+    
+    @staticmethod
+    def to_store(rows, store, unique_only=False):
+        # Appends the labelled feature rows to a TrainingStore for update_model.py. Variants the
+        # testbench does not detect, or whose response another label shares, would only add label noise
+        rows = [r for r in rows if r['features'] is not None and not (unique_only and r['equivalent_to'])
+                and (r['id'] == 'golden' or (r['detected'] and not r['ambiguous']))]
+        return store.append([r['features'] for r in rows], [r['label'] for r in rows], source='campaign')
@@ -1,26 +1,37 @@
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-import joblib
-import sys
+import hashlib
+import shutil
 from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import *
+from config import (MODELS_DIR, MODEL_FILE, COMPACT_MODEL_DIR, SNAPSHOTS_DIR, TRAINING_SAMPLES,
+                    TRAINING_CHUNK_SIZE, TEST_SIZE, RANDOM_STATE, FAULT_TYPES, FEATURE_NAMES,
+                    INCREMENTAL_TREES, INCREMENTAL_REPLAY_PER_CLASS, MAX_FOREST_TREES,
+                    ADAPTIVE_INFERENCE, ADAPTIVE_CHUNK_TREES, ADAPTIVE_TOLERANCE, ADAPTIVE_MIN_BATCH)
+from .compact_model import CompactForest
+from .model_search import make_estimator, measure_latency, search_models
+from .training_store import TrainingStore
 
 class VLSIFaultDetector:
     def __init__(self):
         self.best_model = None
         self.best_model_name = None
-        self.scaler = StandardScaler()
-        self.label_encoder = LabelEncoder()
+        # Created by train()/load_model(); kept lazy so scoring never imports scikit-learn
+        self.scaler = None
+        self.label_encoder = None
         self.fault_types = FAULT_TYPES
         self.feature_names = FEATURE_NAMES
+        self.class_names = None
+        self.model_version = None
+        self.metrics = {}
+        self.latency_profile = {}
+        self.snapshot = 0
+        self.store_segment = 0
         self.trained = False
+        # Early-exit tree evaluation; only the compact forest supports it
+        self.adaptive = ADAPTIVE_INFERENCE
+        self.tolerance = ADAPTIVE_TOLERANCE
     
     def generate_training_data(self, n_samples=TRAINING_SAMPLES):
+        import pandas as pd
         data = []
         for _ in range(n_samples):
             sample = {
@@ -43,6 +54,47 @@ class VLSIFaultDetector:
             data.append(sample)
         return pd.DataFrame(data)
     
+    def generate_training_data_batched(self, n_samples=TRAINING_SAMPLES, seed=RANDOM_STATE,
+                                       chunk_size=TRAINING_CHUNK_SIZE):
+        import pandas as pd
+        chunks = list(self.iter_training_chunks(n_samples, seed, chunk_size))
+        if not chunks:
+            return pd.DataFrame(columns=FEATURE_NAMES + ['fault_type'])
+        return pd.concat(chunks, ignore_index=True)
+    
+    def iter_training_chunks(self, n_samples=TRAINING_SAMPLES, seed=RANDOM_STATE,
+                             chunk_size=TRAINING_CHUNK_SIZE):
+        import pandas as pd
+        rng = np.random.default_rng(seed)
+        remaining = n_samples
+        while remaining > 0:
+            n = min(chunk_size, remaining)
+            cols = self._draw_feature_columns(rng, n)
+            df = pd.DataFrame(cols, columns=FEATURE_NAMES)
+            df['fault_type'] = self._assign_fault_vectorized(cols)
+            yield df
+            remaining -= n
+    
+    @staticmethod
+    def _draw_feature_columns(rng, n):
+        # Same ranges as generate_training_data, one array per column
+        return {
+            'input_transitions': rng.integers(0, 100, n),
+            'toggle_rate': rng.uniform(0, 1, n),
+            'signal_strength': rng.uniform(0.5, 1.5, n),
+            'output_mismatch': rng.integers(0, 50, n),
+            'expected_vs_actual': rng.uniform(0, 1, n),
+            'output_stability': rng.uniform(0, 1, n),
+            'propagation_delay': rng.uniform(1, 100, n),
+            'setup_time_margin': rng.uniform(-10, 10, n),
+            'hold_time_margin': rng.uniform(-10, 10, n),
+            'power_consumption': rng.uniform(0.5, 2.0, n),
+            'current_spike': rng.uniform(0, 1, n),
+            'pattern_similarity': rng.uniform(0, 1, n),
+            'error_pattern_length': rng.integers(0, 20, n),
+            'consecutive_errors': rng.integers(0, 15, n),
+        }
+    
     def _assign_fault(self, s):
         if s['output_mismatch'] == 0 and s['expected_vs_actual'] > 0.9:
             return 'no_fault'
@@ -63,9 +115,34 @@ class VLSIFaultDetector:
         else:
             return 'logic_error'
     
-    def train(self):
+    @staticmethod
+    def _assign_fault_vectorized(s):
+        # Mirrors the _assign_fault cascade; np.select picks the first matching rule
+        conditions = [
+            (s['output_mismatch'] == 0) & (s['expected_vs_actual'] > 0.9),
+            (s['consecutive_errors'] > 4) & (s['output_stability'] > 0.4),
+            (s['current_spike'] > 0.65) & (s['power_consumption'] > 1.4),
+            (s['output_stability'] < 0.3) & (s['signal_strength'] < 0.7),
+            (s['output_stability'] < 0.3) & (s['signal_strength'] > 1.3),
+            np.abs(s['setup_time_margin']) < 2,
+            s['propagation_delay'] > 80,
+            s['signal_strength'] < 0.6,
+        ]
+        choices = ['no_fault', 'transition_fault', 'bridging_fault', 'stuck_at_0',
+                   'stuck_at_1', 'timing_violation', 'delay_fault', 'open_circuit']
+        return np.select(conditions, choices, default='logic_error').astype(object)
+    
+    def train(self, search=False):
+        import joblib
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.preprocessing import LabelEncoder, StandardScaler
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import accuracy_score
+        
+        self.scaler = StandardScaler()
+        self.label_encoder = LabelEncoder()
         print("   Generating training data...")
-        df = self.generate_training_data()
+        df = self.generate_training_data_batched()
         X = df[FEATURE_NAMES].values
         y = self.label_encoder.fit_transform(df['fault_type'].values)
         
@@ -76,56 +153,229 @@ class VLSIFaultDetector:
         X_train = self.scaler.fit_transform(X_train)
         X_test = self.scaler.transform(X_test)
         
-        print("   Training Random Forest...")
-        self.best_model = RandomForestClassifier(n_estimators=150, max_depth=15, 
-                                                  random_state=RANDOM_STATE, n_jobs=-1)
+        leaderboard = []
+        if search:
+            print("   Searching model families...")
+            leaderboard = search_models(X_train, y_train)
+            best = leaderboard[0]
+            print(f"   Selected: {best['name']} {best['params']}")
+            self.best_model = make_estimator(best['name'], best['params'], n_jobs=-1)
+            self.best_model_name = best['name']
+            self.metrics = {'params': best['params'], 'cv_accuracy': best['cv_accuracy'],
+                            'cv_std': best['cv_std']}
+        else:
+            print("   Training Random Forest...")
+            self.best_model = RandomForestClassifier(n_estimators=150, max_depth=15, 
+                                                      random_state=RANDOM_STATE, n_jobs=-1)
+            self.best_model_name = "RandomForest"
+            self.metrics = {'params': {'n_estimators': 150, 'max_depth': 15}}
         self.best_model.fit(X_train, y_train)
-        self.best_model_name = "RandomForest"
+        if 'n_jobs' in self.best_model.get_params():
+            # Parallel fit, but single-threaded scoring: thread fan-out dominates per-sample latency
+            self.best_model.set_params(n_jobs=1)
         
         y_pred = self.best_model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
+        self.metrics['test_accuracy'] = float(accuracy)
+        self.latency_profile = measure_latency(self.best_model, X_test)
         
         print(f"   Accuracy: {accuracy*100:.2f}%")
+        print(f"   Latency: {self.latency_profile['single_ms_p50']:.2f} ms/sample")
+        self._index_labels()
         self.trained = True
+        # A fresh model has not consumed any labelled rows from the training store yet
+        self.store_segment = 0
+        self._save(leaderboard=leaderboard)
+        
+        return accuracy
+    
+    def update(self, store=None, n_trees=INCREMENTAL_TREES, replay_per_class=INCREMENTAL_REPLAY_PER_CLASS):
+        # Grow the forest with new trees fitted only on rows appended since the last update,
+        # plus a small class-balanced synthetic replay so every class stays represented
+        store = store or TrainingStore(feature_names=self.feature_names)
+        if isinstance(self.best_model, CompactForest) or not self.trained:
+            if not self.load_model(prefer_compact=False):
+                raise RuntimeError("No trained model to update; run train() first")
+        from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+        # Only bagged tree ensembles can grow with warm_start and retire their oldest trees
+        if not isinstance(self.best_model, (RandomForestClassifier, ExtraTreesClassifier)):
+            raise ValueError(f"{self.best_model_name} does not support incremental updates")
+        
+        X_new, y_new, last_segment = store.read(after=self.store_segment)
+        if len(X_new) == 0:
+            print("   No new labelled rows")
+            return None
+        
+        X_replay, y_replay = self._replay_rows(replay_per_class, y_new)
+        X = self.scaler.transform(np.vstack([X_new, X_replay]))
+        y = self.label_encoder.transform(np.concatenate([y_new.astype(object), y_replay]))
+        
+        model = self.best_model
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_trees, n_jobs=-1)
+        model.fit(X, y)
+        if len(model.estimators_) > MAX_FOREST_TREES:
+            # Retire the oldest trees so inference cost stays bounded
+            model.estimators_ = model.estimators_[-MAX_FOREST_TREES:]
+        model.set_params(warm_start=False, n_estimators=len(model.estimators_), n_jobs=1)
         
+        accuracy = float((model.predict(self.scaler.transform(X_new)) ==
+                          self.label_encoder.transform(y_new.astype(object))).mean())
+        self.metrics = {**self.metrics, 'update_rows': int(len(X_new)), 'update_accuracy': accuracy}
+        self.store_segment = last_segment
+        print(f"   Added {n_trees} trees from {len(X_new)} new rows (segments up to {last_segment})")
+        self._save()
+        return accuracy
+    
+    def _replay_rows(self, per_class, y_new, max_attempts=10):
+        # Warm-started trees must see the same classes_ as the existing ones, so every class the
+        # model knows gets per_class rows, and at least one when the new rows lack it
+        import pandas as pd
+        present = set(y_new)
+        want = {c: max(per_class, 0 if c in present else 1)
+                for c in self.label_encoder.classes_[self.best_model.classes_]}
+        counts = dict.fromkeys(want, 0)
+        parts = []
+        for attempt in range(max_attempts):
+            if all(counts[c] >= n for c, n in want.items()):
+                break
+            df = self.generate_training_data_batched(max(sum(want.values()), 1) * 200,
+                                                     seed=RANDOM_STATE + self.snapshot + 1 + attempt)
+            for label, group in df.groupby('fault_type'):
+                need = want.get(label, 0) - counts.get(label, 0)
+                if need > 0:
+                    parts.append(group.head(need))
+                    counts[label] += min(need, len(group))
+        missing = [c for c, n in want.items() if counts[c] < n]
+        if missing:
+            raise ValueError(f"Synthetic replay produced no rows for {', '.join(missing)}")
+        if not parts:
+            return np.empty((0, len(self.feature_names))), np.empty(0, dtype=object)
+        df = pd.concat(parts)
+        return df[self.feature_names].values, np.asarray(df['fault_type'], dtype=object)
+    
+    def _save(self, leaderboard=None):
+        import joblib
         MODELS_DIR.mkdir(exist_ok=True)
-        joblib.dump({
+        SNAPSHOTS_DIR.mkdir(exist_ok=True)
+        existing = [int(p.stem.rsplit('_v', 1)[-1]) for p in SNAPSHOTS_DIR.glob('model_v*.pkl')]
+        self.snapshot = max(existing, default=0) + 1
+        artifact = {
             'model': self.best_model,
             'name': self.best_model_name,
             'encoder': self.label_encoder,
             'scaler': self.scaler,
-            'features': self.feature_names
-        }, MODEL_FILE)
-        print(f"   Model saved to: {MODEL_FILE}")
-        
-        return accuracy
+            'features': self.feature_names,
+            'metrics': self.metrics,
+            'latency': self.latency_profile,
+            'leaderboard': leaderboard or [],
+            'snapshot': self.snapshot,
+            'store_segment': self.store_segment,
+        }
+        snapshot_file = SNAPSHOTS_DIR / f'model_v{self.snapshot:04d}.pkl'
+        joblib.dump(artifact, snapshot_file)
+        shutil.copyfile(snapshot_file, MODEL_FILE)
+        self.model_version = self._file_version(MODEL_FILE)
+        print(f"   Model saved to: {MODEL_FILE} (snapshot v{self.snapshot})")
+        try:
+            self.export_compact()
+            print(f"   Compact model exported to: {COMPACT_MODEL_DIR}")
+        except TypeError:
+            # Not a tree forest: drop any stale compact artifact so load_model uses the pickle
+            shutil.rmtree(COMPACT_MODEL_DIR, ignore_errors=True)
     
     def detect_faults(self, features_dict):
         if not self.trained:
             return None, 0.0, [], "Model not trained!"
         
-        X = np.array([features_dict[name] for name in self.feature_names]).reshape(1, -1)
-        X = self.scaler.transform(X)
+        result = self.detect_faults_batch([features_dict], top_k=3)
+        top3 = [(name, float(p)) for name, p in zip(result['top_k'][0], result['top_k_confidence'][0])]
+        return result['fault_type'][0], float(result['confidence'][0]), top3, result['model_info']
+    
+    def detect_faults_batch(self, features, top_k=3, adaptive=None, tolerance=None):
+        if not self.trained:
+            return None
         
-        pred = self.best_model.predict(X)[0]
-        probs = self.best_model.predict_proba(X)[0]
+        X = self._features_matrix(features)
+        if self.scaler is not None:
+            X = self.scaler.transform(X)
+        adaptive = self.adaptive if adaptive is None else adaptive
+        if adaptive and isinstance(self.best_model, CompactForest) and len(X) >= ADAPTIVE_MIN_BATCH:
+            probs, trees_used = self.best_model.predict_proba_adaptive(
+                X, self.tolerance if tolerance is None else tolerance, ADAPTIVE_CHUNK_TREES)
+        else:
+            probs = self.best_model.predict_proba(X)
+            n_trees = getattr(self.best_model, 'n_trees', None) or len(getattr(self.best_model, 'estimators_', ()))
+            trees_used = np.full(len(probs), n_trees)
         
-        fault_type = self.label_encoder.inverse_transform([pred])[0]
-        confidence = probs[pred] * 100
+        n = len(probs)
+        rows = np.arange(n)[:, None]
+        best = probs.argmax(axis=1)
         
-        top3_idx = np.argsort(probs)[-3:][::-1]
-        top3 = [(self.label_encoder.inverse_transform([i])[0], probs[i]*100) for i in top3_idx]
+        k = min(top_k, probs.shape[1])
+        top_idx = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+        order = np.argsort(-probs[rows, top_idx], axis=1, kind='stable')
+        top_idx = top_idx[rows, order]
         
-        return fault_type, confidence, top3, f"Using: {self.best_model_name}"
+        return {
+            'fault_type': self.class_names[best],
+            'confidence': probs[np.arange(n), best] * 100,
+            'top_k': self.class_names[top_idx],
+            'top_k_confidence': probs[rows, top_idx] * 100,
+            'trees_used': trees_used,
+            'model_info': f"Using: {self.best_model_name}",
+        }
     
-    def load_model(self):
+    def _features_matrix(self, features):
+        if isinstance(features, np.ndarray):
+            X = features.astype(float, copy=False)
+        else:
+            X = np.array([[f[name] for name in self.feature_names] for f in features], dtype=float)
+        return X.reshape(-1, len(self.feature_names))
+    
+    @staticmethod
+    def _file_version(path):
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:16]
+    
+    def _index_labels(self):
+        # Probability column i -> fault name, so inference never calls inverse_transform
+        self.class_names = np.asarray(self.label_encoder.classes_[self.best_model.classes_], dtype=object)
+    
+    def export_compact(self, directory=COMPACT_MODEL_DIR):
+        forest = CompactForest.from_sklearn(
+            self.best_model, self.scaler, name=self.best_model_name, version=self.model_version,
+            class_names=list(self.class_names), features=list(self.feature_names),
+            metrics=self.metrics, latency=self.latency_profile, snapshot=self.snapshot)
+        return forest.save(directory)
+    
+    def load_model(self, prefer_compact=True):
+        if prefer_compact and (COMPACT_MODEL_DIR / 'meta.json').exists():
+            # Scaling is folded into the compact thresholds, so no scaler at inference time
+            self.best_model = CompactForest.load(COMPACT_MODEL_DIR)
+            meta = self.best_model.meta
+            self.best_model_name = meta['name']
+            self.feature_names = meta['features']
+            self.class_names = np.asarray(meta['class_names'], dtype=object)
+            self.model_version = meta['version']
+            self.metrics = meta.get('metrics', {})
+            self.latency_profile = meta.get('latency', {})
+            self.snapshot = meta.get('snapshot', 0)
+            self.scaler = None
+            self.trained = True
+            return True
         if MODEL_FILE.exists():
+            import joblib
             data = joblib.load(MODEL_FILE)
             self.best_model = data['model']
             self.best_model_name = data['name']
             self.label_encoder = data['encoder']
             self.scaler = data['scaler']
             self.feature_names = data['features']
+            self.metrics = data.get('metrics', {})
+            self.latency_profile = data.get('latency', {})
+            self.snapshot = data.get('snapshot', 0)
+            self.store_segment = data.get('store_segment', 0)
+            self.model_version = self._file_version(MODEL_FILE)
+            self._index_labels()
             self.trained = True
             return True
         return False
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+import numpy as np
+from config import FAULT_DICT_DIR, FAULT_DICT_TOP_K, FAULT_DICT_WEIGHT
+from .netlist import parse_netlist
+
+
+def difference_bits(expected, actual, n_bits=None):
+    # expected-vs-actual mismatch vector; a missing tail of `actual` counts as mismatching
+    n_bits = len(expected) if n_bits is None else n_bits
+    exp = np.frombuffer(expected[:n_bits].encode(), dtype=np.uint8)
+    act = np.frombuffer(actual[:len(exp)].encode(), dtype=np.uint8)
+    diff = np.ones(n_bits, dtype=bool)
+    diff[len(exp):] = False
+    diff[:len(act)] = exp[:len(act)] != act
+    return diff
+
+
+def pack(bits):
+    # Bool vector(s) -> uint64 words, bit i of the signature in bit i % 64 of word i // 64
+    bits = np.atleast_2d(bits)
+    n_words = max(1, -(-bits.shape[1] // 64))
+    padded = np.zeros((bits.shape[0], n_words * 64), dtype=bool)
+    padded[:, :bits.shape[1]] = bits
+    return np.packbits(padded, axis=1, bitorder='little').view('<u8')
+
+
+_BYTE_BITS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def bit_count(words):
+    # Set bits per uint64 word; np.bitwise_count needs NumPy 2.0, older releases use a byte table
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    return _BYTE_BITS[words.view(np.uint8)].reshape(*words.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+
+def popcount(words):
+    return bit_count(words).sum(axis=-1, dtype=np.int64)
+
+
+class SignatureIndex:
+    # Packed signatures of one design, sorted by popcount. |w(a) - w(b)| <= hamming(a, b), so a
+    # search scans weight buckets outward from the query's weight and stops once no unscanned
+    # bucket can beat the current k-th best distance. Words are stored column-major so a bucket
+    # range is a contiguous slice of each column.
+    def __init__(self, signatures, n_bits, labels, fault_ids, golden=''):
+        weights = popcount(signatures)
+        order = np.argsort(weights, kind='stable')
+        self.columns = np.ascontiguousarray(signatures[order].T)
+        self.weights = weights[order]
+        self.labels = np.asarray(labels, dtype=object)[order]
+        self.fault_ids = np.asarray(fault_ids, dtype=object)[order]
+        self.n_bits = n_bits
+        self.golden = golden
+        # starts[w]: first entry with weight >= w
+        self.starts = np.searchsorted(self.weights, np.arange(n_bits + 2))
+    
+    def __len__(self):
+        return len(self.weights)
+    
+    @property
+    def signatures(self):
+        return self.columns.T
+    
+    def distances(self, query, lo, hi):
+        # Hamming distances from `query` to entries lo..hi-1
+        # int64 like popcount(): logic-engine signatures can exceed 65535 bits
+        dist = np.zeros(hi - lo, dtype=np.int64)
+        for column, word in zip(self.columns, query):
+            dist += bit_count(column[lo:hi] ^ word)
+        return dist
+    
+    def search(self, query, k=FAULT_DICT_TOP_K):
+        # query: packed words of one signature -> (entry indexes, distances), nearest first
+        n = len(self.weights)
+        k = min(k, n)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        wq = int(popcount(query))
+        lo = hi = int(self.starts[min(wq, self.n_bits + 1)])
+        best_i = np.empty(0, dtype=np.int64)
+        best_d = np.empty(0, dtype=np.int64)
+        radius = 0
+        while True:
+            new_lo = int(self.starts[max(wq - radius, 0)])
+            new_hi = int(self.starts[min(wq + radius + 1, self.n_bits + 1)])
+            for start, stop in ((new_lo, lo), (hi, new_hi)):
+                if start == stop:
+                    continue
+                dist = self.distances(query, start, stop)
+                if len(best_d) == k:
+                    # Only entries that beat the current k-th best can change the result
+                    near = np.flatnonzero(dist < best_d.max())
+                    idx, dist = near + start, dist[near]
+                else:
+                    idx = np.arange(start, stop)
+                best_i = np.concatenate([best_i, idx])
+                best_d = np.concatenate([best_d, dist])
+                if len(best_d) > k:
+                    keep = np.argpartition(best_d, k - 1)[:k]
+                    best_i, best_d = best_i[keep], best_d[keep]
+            lo, hi = new_lo, new_hi
+            if lo == 0 and hi == n:
+                break
+            # Everything unscanned is at least radius + 1 away; once k candidates are known, no
+            # entry more than (k-th best - 1) away in weight can beat them
+            if len(best_d) == k:
+                if best_d.max() <= radius + 1:
+                    break
+                radius = int(best_d.max()) - 1
+            else:
+                radius = max(1, radius * 2)
+        order = np.lexsort((best_i, best_d))
+        return best_i[order], best_d[order]
+    
+    def matches(self, query, k=FAULT_DICT_TOP_K):
+        idx, dist = self.search(query, k)
+        return [{'fault_id': str(self.fault_ids[i]), 'label': str(self.labels[i]), 'distance': int(d),
+                 'similarity': 1 - int(d) / max(self.n_bits, 1)} for i, d in zip(idx, dist)]
+
+
+class FaultDictionary:
+    # Response signatures of known faults, per design: one .npz per design key (golden response,
+    # packed golden-vs-faulty signatures, labels, fault ids) and a manifest with entry counts.
+    # Signatures are only comparable under the same stimulus, so the key is the top module's
+    # interface plus the testbench; golden and faulty variants of a design share it.
+    def __init__(self, directory=FAULT_DICT_DIR):
+        self.directory = Path(directory)
+        self.manifest = self.directory / 'manifest.json'
+        self._indexes = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def design_key(verilog_code, testbench_code, netlist=None):
+        top = (netlist or parse_netlist(verilog_code)).top
+        ports = [] if top is None else [(p, top.nets[p].kind, top.nets[p].width) for p in top.ports]
+        h = hashlib.sha256(json.dumps([top.name if top else None, ports]).encode())
+        h.update(b'\0' + testbench_code.encode())
+        return h.hexdigest()[:32]
+    
+    def designs(self):
+        if not self.manifest.exists():
+            return {}
+        return json.loads(self.manifest.read_text())
+    
+    def version(self, key):
+        # Entry count; entries are only ever added, so it changes whenever lookups can
+        return self.designs().get(key, {}).get('entries', 0)
+    
+    def index(self, key):
+        with self._lock:
+            if key not in self._indexes:
+                path = self.directory / f'{key}.npz'
+                if not path.exists():
+                    return None
+                with np.load(path, allow_pickle=False) as data:
+                    golden = str(data['golden'])
+                    self._indexes[key] = SignatureIndex(data['signatures'], len(golden),
+                                                        data['labels'], data['fault_ids'], golden)
+            return self._indexes[key]
+    
+    def add(self, key, fault_ids, labels, golden, actuals, design=None):
+        # One signature per faulty response, each against the design's golden response
+        if not len(actuals):
+            return 0
+        n_bits = len(golden)
+        new = pack(np.stack([difference_bits(golden, a, n_bits) for a in actuals]))
+        index = self.index(key)
+        if index is not None:
+            if index.golden != golden:
+                raise ValueError(f"Design {key} already has a different golden response")
+            new = np.concatenate([index.signatures, new])
+            fault_ids = list(index.fault_ids) + list(fault_ids)
+            labels = list(index.labels) + list(labels)
+        
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f'{key}.npz'
+        tmp = self.directory / f'.{key}.{os.getpid()}.npz'
+        np.savez(tmp, signatures=new, golden=golden, labels=np.asarray(labels, dtype=str),
+                 fault_ids=np.asarray(fault_ids, dtype=str))
+        os.replace(tmp, path)
+        designs = self.designs()
+        designs[key] = {'design': design or designs.get(key, {}).get('design'), 'entries': len(new),
+                        'n_bits': n_bits}
+        tmp = self.manifest.with_suffix(f'.{os.getpid()}.tmp')
+        tmp.write_text(json.dumps(designs, indent=2))
+        os.replace(tmp, self.manifest)
+        with self._lock:
+            self._indexes.pop(key, None)
+        return len(new)
+    
+    def add_campaign(self, verilog_code, testbench_code, rows):
+        # FaultCampaign.run() rows: every simulated variant against the golden response
+        golden = next(r for r in rows if r['id'] == 'golden')
+        rows = [r for r in rows if r['error'] is None and r['actual']]
+        netlist = parse_netlist(verilog_code)
+        return self.add(self.design_key(verilog_code, testbench_code, netlist),
+                        [r['id'] for r in rows], [r['label'] for r in rows], golden['actual'],
+                        [r['actual'] for r in rows], netlist.top.name if netlist.top else None)
+    
+    def lookup(self, key, actual, k=FAULT_DICT_TOP_K):
+        # Nearest known faults to an observed response of the design `key`
+        index = self.index(key)
+        if index is None or not index.golden:
+            return []
+        return index.matches(pack(difference_bits(index.golden, actual))[0], k)
+    
+    @staticmethod
+    def similarity(matches):
+        # pattern_similarity: how close the observed response is to the nearest known fault
+        return matches[0]['similarity'] if matches else 1.0
+    
+    @staticmethod
+    def rank(top_k, matches, weight=FAULT_DICT_WEIGHT):
+        # Blends model confidences [(label, %)] with dictionary evidence: how much closer each
+        # label's best match is than the farthest of the k matches, normalized over labels
+        if not matches:
+            return top_k
+        floor = min(m['similarity'] for m in matches)
+        evidence = {}
+        for m in matches:
+            evidence[m['label']] = max(evidence.get(m['label'], 0.0), m['similarity'] - floor)
+        total = sum(evidence.values())
+        if total == 0:
+            return top_k
+        scores = {label: (1 - weight) * p for label, p in top_k}
+        for label, s in evidence.items():
+            scores[label] = scores.get(label, 0.0) + weight * 100 * s / total
+        return sorted(scores.items(), key=lambda item: -item[1])[:len(top_k)]
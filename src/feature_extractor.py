@@ -1,10 +1,73 @@
-import re
+import codecs
+import os
+import numpy as np
+from config import STREAM_CHUNK_SIZE
+from .netlist import parse_netlist, parse_stream
+
+# Timing-check requirements (ns) the setup/hold margins are measured against
+SETUP_TIME_NS = 2.0
+HOLD_TIME_NS = 1.0
+
+WHITESPACE = np.frombuffer(b' \t\r\n', dtype=np.uint8)
 
 class FeatureExtractor:
+    # Bump whenever extracted values change so cached analysis results are invalidated
+    VERSION = 6
+    
+    @staticmethod
+    def extract_features(verilog_code, testbench_code, expected_out="", actual_out="",
+                         transitions=None, netlist=None):
+        # netlist: parse_netlist(verilog_code), when the caller already has it
+        netlist = netlist or parse_netlist(verilog_code)
+        features = FeatureExtractor._default_features()
+        features['input_transitions'] = testbench_code.count('0') + testbench_code.count('1')
+        
+        if expected_out and actual_out:
+            stats = TraceComparison()
+            n = min(len(expected_out), len(actual_out))
+            stats.feed(FeatureExtractor._code_points(expected_out[:n]),
+                       FeatureExtractor._code_points(actual_out[:n]))
+            FeatureExtractor._apply_trace_stats(features, stats, len(expected_out))
+        
+        FeatureExtractor._apply_design(features, netlist, transitions)
+        return features
+    
     @staticmethod
-    def extract_features(verilog_code, testbench_code, expected_out="", actual_out=""):
-        features = {
-            'input_transitions': len(re.findall(r'[01]', testbench_code)),
+    def extract_features_streaming(verilog_source, testbench_source, expected_source=None,
+                                   actual_source=None, transitions=None, chunk_size=STREAM_CHUNK_SIZE):
+        # Sources are file paths or iterables of str/bytes chunks; nothing is held in full.
+        # Whitespace (e.g. one vector per line) is dropped from the traces before comparison.
+        features = FeatureExtractor._default_features()
+        
+        count = 0
+        for chunk in _iter_chunks(testbench_source, chunk_size):
+            data = np.frombuffer(chunk, dtype=np.uint8)
+            count += int(np.count_nonzero((data == ord('0')) | (data == ord('1'))))
+        features['input_transitions'] = count
+        
+        if expected_source is not None and actual_source is not None:
+            stats, expected_len, actual_len = FeatureExtractor._compare_streams(
+                _iter_chunks(expected_source, chunk_size), _iter_chunks(actual_source, chunk_size))
+            if expected_len and actual_len:
+                FeatureExtractor._apply_trace_stats(features, stats, expected_len)
+        
+        # Same parser as extract_features, fed chunk by chunk, so both paths see the same design
+        netlist = parse_stream(_iter_text(verilog_source, chunk_size))
+        FeatureExtractor._apply_design(features, netlist, transitions)
+        return features
+    
+    @staticmethod
+    def _apply_design(features, netlist, transitions=None):
+        FeatureExtractor._apply_source_flags(features, FeatureExtractor._netlist_flags(netlist))
+        if transitions is not None:
+            modules = netlist.modules.values()
+            features.update(FeatureExtractor.extract_timing_features(
+                transitions, [p for m in modules for p in m.inputs], [p for m in modules for p in m.outputs]))
+    
+    @staticmethod
+    def _default_features():
+        return {
+            'input_transitions': 0,
             'toggle_rate': 0.5, 'signal_strength': 1.0, 'output_mismatch': 0,
             'expected_vs_actual': 1.0, 'output_stability': 1.0,
             'propagation_delay': 10.0, 'setup_time_margin': 5.0,
@@ -12,31 +75,215 @@ class FeatureExtractor:
             'current_spike': 0.0, 'pattern_similarity': 1.0,
             'error_pattern_length': 0, 'consecutive_errors': 0,
         }
-        
-        if expected_out and actual_out:
-            mismatches = sum(1 for e, a in zip(expected_out, actual_out) if e != a)
-            features['output_mismatch'] = mismatches
-            features['expected_vs_actual'] = 1 - (mismatches / max(len(expected_out), 1))
-            
-            consecutive, max_consecutive = 0, 0
-            for e, a in zip(expected_out, actual_out):
-                consecutive = consecutive + 1 if e != a else 0
-                max_consecutive = max(max_consecutive, consecutive)
-            features['consecutive_errors'] = max_consecutive
-        
-        if re.search(r'assign\s+\w+\s*=\s*1\'b0\s*;', verilog_code):
+    
+    @staticmethod
+    def _apply_trace_stats(features, stats, expected_len):
+        features['output_mismatch'] = stats.mismatches
+        features['expected_vs_actual'] = 1 - (stats.mismatches / max(expected_len, 1))
+        features['consecutive_errors'] = stats.max_run
+    
+    @staticmethod
+    def _netlist_flags(netlist):
+        # Nets constantly driven by a net declaration or continuous assign, #25/#15 delays and
+        # 'transition' in an identifier or comment
+        flags = set()
+        constants = netlist.constants()
+        if "1'b0" in constants:
+            flags.add('stuck_0')
+        if "1'b1" in constants:
+            flags.add('stuck_1')
+        if netlist.delays() & {25, 15}:
+            flags.add('delay')
+        if netlist.mentions('transition'):
+            flags.add('transition')
+        return flags
+    
+    @staticmethod
+    def _apply_source_flags(features, flags):
+        if 'stuck_0' in flags:
             features['signal_strength'] = 0.3
             features['output_stability'] = 0.2
-        elif re.search(r'assign\s+\w+\s*=\s*1\'b1\s*;', verilog_code):
+        elif 'stuck_1' in flags:
             features['signal_strength'] = 1.7
             features['output_stability'] = 0.2
         
-        if '#25' in verilog_code or '#15' in verilog_code:
+        if 'delay' in flags:
             features['propagation_delay'] = 90
             features['setup_time_margin'] = -5.0
         
-        if 'transition' in verilog_code.lower():
+        if 'transition' in flags:
             features['consecutive_errors'] = 8
             features['error_pattern_length'] = 15
+    
+    @staticmethod
+    def _compare_streams(expected_chunks, actual_chunks):
+        # Walk both traces in lockstep whatever their chunking; after the shorter one ends only
+        # the expected length keeps counting (it is the denominator of expected_vs_actual)
+        stats = TraceComparison()
+        exp_buf = act_buf = np.empty(0, dtype=np.uint8)
+        expected_len = actual_len = 0
+        exp_done = act_done = False
+        while True:
+            if len(exp_buf) == 0 and not exp_done:
+                chunk = next(expected_chunks, None)
+                if chunk is None:
+                    exp_done = True
+                else:
+                    exp_buf = _strip_whitespace(chunk)
+                    expected_len += len(exp_buf)
+            if len(act_buf) == 0 and not act_done:
+                chunk = next(actual_chunks, None)
+                if chunk is None:
+                    act_done = True
+                else:
+                    act_buf = _strip_whitespace(chunk)
+                    actual_len += len(act_buf)
+            if exp_done or act_done:
+                break
+            n = min(len(exp_buf), len(act_buf))
+            stats.feed(exp_buf[:n], act_buf[:n])
+            exp_buf, act_buf = exp_buf[n:], act_buf[n:]
+        for chunk in expected_chunks:
+            expected_len += len(_strip_whitespace(chunk))
+        return stats, expected_len, actual_len
+    
+    @staticmethod
+    def _code_points(text):
+        return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    
+    @staticmethod
+    def extract_timing_features(transitions, inputs=None, outputs=None, clock=None, time_unit_ns=1.0):
+        # transitions: VCDData or {name: (times, values)}; names may be hierarchical (tb.uut.y).
+        # A VCDData's aliases of one net (tb.a, tb.uut.a share a VCD id) count as one signal.
+        widths, codes = {}, {}
+        if hasattr(transitions, 'transitions'):
+            time_unit_ns = transitions.timescale_s / 1e-9
+            widths = {name: trace.width for name, trace in transitions.signals.items()}
+            codes = {name: trace.code for name, trace in transitions.signals.items()}
+            transitions = transitions.transitions()
+        
+        short = lambda name: name.rsplit('.', 1)[-1]
+        signals = {}
+        for name, (times, _) in transitions.items():
+            if len(times):
+                signals.setdefault(codes.get(name, name), []).append(name)
+        if not signals:
+            return {}
+        names = [n for aliases in signals.values() for n in aliases]
+        if clock is None:
+            clock = next((n for n in names if 'clk' in short(n).lower()), None)
+        if inputs is None:
+            inputs = [n for n in names if n != clock]
+        in_set, out_set = set(map(short, inputs)), set(map(short, outputs or ()))
+        
+        # One representative name per signal; every alias of the clock is left out of the data
+        clock_code = codes.get(clock, clock)
+        data = [aliases[0] for code, aliases in signals.items() if code != clock_code]
+        alias_names = {aliases[0]: {short(n) for n in aliases} for aliases in signals.values()}
+        toggle_times = {}
+        for name in data:
+            times, values = map(np.asarray, transitions[name])
+            toggle_times[name] = times[np.flatnonzero(values[1:] != values[:-1]) + 1]
+        
+        edges = (FeatureExtractor._rising_edges(*transitions[clock]) if clock in transitions and
+                 len(transitions[clock][0]) else np.empty(0))
+        all_toggles = np.concatenate([toggle_times[n] for n in data]) if data else np.empty(0)
+        event_times, event_counts = np.unique(all_toggles, return_counts=True)
+        # Normalise activity per clock cycle, or per distinct event time for combinational benches
+        n_cycles = max(len(edges) or len(event_times), 1)
+        
+        features = {}
+        toggles = np.array([len(toggle_times[n]) for n in data], dtype=float)
+        in_times = [toggle_times[n] for n in data if alias_names[n] & in_set]
+        out_times = [toggle_times[n] for n in data if alias_names[n] & out_set]
+        features['input_transitions'] = int(sum(len(t) for t in in_times))
+        
+        # Input->output delay: each output toggle against the latest input toggle at or before it
+        if in_times and out_times:
+            all_in = np.sort(np.concatenate(in_times))
+            all_out = np.concatenate(out_times)
+            idx = np.searchsorted(all_in, all_out, side='right') - 1
+            valid = idx >= 0
+            if valid.any():
+                delays = (all_out[valid] - all_in[idx[valid]]) * time_unit_ns
+                features['propagation_delay'] = float(delays.mean())
+        
+        # Setup/hold slack of every input toggle against the surrounding clock edges
+        if len(edges) and in_times:
+            t = np.concatenate(in_times)
+            nxt = np.searchsorted(edges, t, side='left')
+            prv = np.searchsorted(edges, t, side='right') - 1
+            has_nxt, has_prv = nxt < len(edges), prv >= 0
+            if has_nxt.any():
+                setup = (edges[nxt[has_nxt]] - t[has_nxt]) * time_unit_ns
+                features['setup_time_margin'] = float(np.clip(setup.min() - SETUP_TIME_NS, -10, 10))
+            if has_prv.any():
+                hold = (t[has_prv] - edges[prv[has_prv]]) * time_unit_ns
+                features['hold_time_margin'] = float(np.clip(hold.min() - HOLD_TIME_NS, -10, 10))
+        
+        # Switching-activity power proxy and simultaneous-switching current spike
+        if data:
+            weights = np.array([widths.get(n, 1) for n in data], dtype=float)
+            features['toggle_rate'] = float(np.clip(toggles / n_cycles, 0, 1).mean())
+            activity = float((toggles * weights).sum() / (weights.sum() * n_cycles))
+            features['power_consumption'] = 0.5 + 1.5 * min(activity, 1.0)
+            features['current_spike'] = float(event_counts.max(initial=0) / len(data))
         
         return features
+    
+    @staticmethod
+    def _rising_edges(times, values):
+        times, values = np.asarray(times), np.asarray(values)
+        rising = np.flatnonzero((values[1:] == 1) & (values[:-1] != 1)) + 1
+        return times[rising]
+
+
+class TraceComparison:
+    # Mismatch count and longest run of consecutive mismatches, fed chunk by chunk; the run
+    # still open at the end of a chunk carries over into the next one
+    def __init__(self):
+        self.mismatches = 0
+        self.max_run = 0
+        self.run = 0
+    
+    def feed(self, expected, actual):
+        diff = expected != actual
+        if len(diff) == 0:
+            return
+        self.mismatches += int(np.count_nonzero(diff))
+        matches = np.flatnonzero(~diff)
+        if len(matches) == 0:
+            self.run += len(diff)
+            self.max_run = max(self.max_run, self.run)
+            return
+        bounds = np.concatenate(([-1], matches, [len(diff)]))
+        runs = np.diff(bounds) - 1
+        runs[0] += self.run
+        self.max_run = max(self.max_run, int(runs.max()))
+        self.run = int(runs[-1])
+
+
+def _iter_chunks(source, chunk_size):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    else:
+        for chunk in source:
+            yield chunk.encode('utf-8') if isinstance(chunk, str) else bytes(chunk)
+
+
+def _iter_text(source, chunk_size):
+    # Characters split across chunks are decoded once the rest of their bytes arrive
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    for chunk in _iter_chunks(source, chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+def _strip_whitespace(chunk):
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    return data[~np.isin(data, WHITESPACE)]
@@ -0,0 +1,159 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from config import (JOB_MAX_WORKERS, JOB_MAX_PENDING, JOB_RENDER_WORKERS, JOB_RETENTION_SECONDS,
+                    BULK_MAX_WORKERS)
+from .simulator import VerilogSimulator
+from .result_cache import ResultCache
+from .profiler import StageProfiler
+from .analyzer import CircuitAnalyzer, module_name_of, render_waveform
+from .suite_runner import RegressionSuiteRunner
+from .results_store import ResultsStore
+
+QUEUED, RUNNING, PREDICTED, DONE, FAILED = 'queued', 'running', 'predicted', 'done', 'failed'
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class AnalysisJob:
+    def __init__(self, job_id, name):
+        self.id = job_id
+        self.name = name
+        self.status = QUEUED
+        self.prediction = None  # fault_type, confidence, top3, model_info, matches once inference is done
+        self.waveform = None
+        self.error = None
+        self.cached = False
+        self.run_id = None
+        self.results = None  # per-circuit results of a bulk job
+        self.progress = (0, 0)
+        self.submitted = time.time()
+        self.finished_at = None
+    
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+
+class AnalysisJobs:
+    # One instance per server, shared by every session. A bounded thread pool runs the
+    # CircuitAnalyzer stages up to inference; waveforms render on a separate thread pool, so a job
+    # publishes its prediction before its waveform is ready.
+    def __init__(self, fault_detector, cache=None, simulator=None, profiler=None,
+                 max_workers=JOB_MAX_WORKERS, max_pending=JOB_MAX_PENDING,
+                 render_workers=JOB_RENDER_WORKERS, retention=JOB_RETENTION_SECONDS, dictionary=None,
+                 results=None):
+        self.detector = fault_detector
+        self.dictionary = dictionary
+        self.cache = cache if cache is not None else ResultCache()
+        self.results = results if results is not None else ResultsStore()
+        self.simulator = simulator or VerilogSimulator()
+        self.profiler = profiler or StageProfiler()
+        self.analyzer = CircuitAnalyzer(fault_detector, self.cache, self.profiler, dictionary, self.results,
+                                        self.simulator)
+        self.max_pending = max_pending
+        self.retention = retention
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix='analysis')
+        # Waveforms draw on their own matplotlib Figure (no pyplot state), so threads suffice
+        self._render_pool = ThreadPoolExecutor(render_workers, thread_name_prefix='render')
+        self._jobs = {}
+        self._lock = threading.Lock()
+    
+    def submit(self, verilog_code, testbench_code, circuit_name=None):
+        job = self._new_job(circuit_name or module_name_of(verilog_code, 'circuit'))
+        self._pool.submit(self._run, job, verilog_code, testbench_code)
+        return job.id
+    
+    def submit_suite(self, suite_jobs, name='bulk', max_workers=BULK_MAX_WORKERS):
+        # A whole uploaded batch is one job: simulated and extracted in worker processes,
+        # scored in batches by RegressionSuiteRunner
+        job = self._new_job(name)
+        job.progress = (0, len(suite_jobs))
+        self._pool.submit(self._run_suite, job, suite_jobs, max_workers)
+        return job.id
+    
+    def _new_job(self, name):
+        with self._lock:
+            self._prune()
+            if self._active() >= self.max_pending:
+                raise JobQueueFull(f"{self.max_pending} analyses already queued or running; try again shortly")
+            job = AnalysisJob(uuid.uuid4().hex, name)
+            self._jobs[job.id] = job
+        return job
+    
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+    
+    def active(self):
+        with self._lock:
+            return self._active()
+    
+    def _active(self):
+        return sum(not job.finished for job in self._jobs.values())
+    
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        expired = [j.id for j in self._jobs.values()
+                   if j.finished_at is not None and j.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+    
+    def _run(self, job, verilog_code, testbench_code):
+        started = time.perf_counter()
+        analyzer = self.analyzer
+        try:
+            with self.profiler.run(job.name):
+                job.run_id = self.profiler.current_run()
+                job.status = RUNNING
+                netlist, design_key, dict_version, cache_key = analyzer.prepare(verilog_code, testbench_code)
+                result = analyzer.lookup(cache_key, job.name)
+                if result:
+                    result['cached'] = job.cached = True
+                else:
+                    result, vcd = analyzer.predict(verilog_code, testbench_code, job.name, netlist,
+                                                   design_key, dict_version)
+                    job.prediction = self._prediction(result)
+                    job.status = PREDICTED
+                    with self.profiler.stage('waveform'):
+                        result['waveform'] = self.render(verilog_code, testbench_code, job.name, vcd=vcd)
+                    analyzer.store(cache_key, result)
+                job.prediction = self._prediction(result)
+                job.waveform = result['waveform']
+                job.status = DONE
+                analyzer.record(result, started)
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+    
+    @staticmethod
+    def _prediction(result):
+        return {k: result.get(k) for k in ('fault_type', 'confidence', 'top3', 'model_info', 'matches')}
+    
+    def _run_suite(self, job, suite_jobs, max_workers):
+        try:
+            job.status = RUNNING
+            # Each uploaded batch is its own run in the results store
+            runner = RegressionSuiteRunner(self.detector, max_workers=max_workers)
+            def progress(done, total):
+                job.progress = (done, total)
+            job.results = runner.run(suite_jobs, progress)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+    
+    def render(self, verilog_code, testbench_code, circuit_name, preview=False, vcd=None):
+        # Blocks until the render worker is done; None if rendering failed. vcd: the simulation's
+        # dump (VCDData or path), drawn instead of the synthetic waveform when there is one
+        try:
+            return self._render_pool.submit(render_waveform, verilog_code, testbench_code, circuit_name,
+                                            vcd, preview).result()
+        except Exception:
+            return None
@@ -0,0 +1,683 @@
+import re
+from functools import lru_cache
+import numpy as np
+from config import LOGIC_SIM_MAX_PATTERNS, LOGIC_SIM_CYCLES, RANDOM_STATE
+from .netlist import parse_netlist, tokenize
+
+ZERO = np.uint64(0)
+ONES = np.uint64(0xFFFF_FFFF_FFFF_FFFF)
+# Bit j of lane p in the first word of an exhaustive sweep is (p >> j) & 1
+LANE_MASKS = [np.uint64(sum(1 << p for p in range(64) if (p >> j) & 1)) for j in range(6)]
+
+PRIMITIVES = {'and', 'or', 'nand', 'nor', 'xor', 'xnor', 'not', 'buf'}
+UNSUPPORTED = {'initial', 'generate', 'function', 'task', 'parameter', 'localparam', 'integer',
+               'defparam', 'specify', 'case', 'casez', 'casex', 'for', 'while', 'inout'}
+BASES = {'b': 2, 'o': 8, 'd': 10, 'h': 16}
+# Operators whose operands take the width of their context (the rest are self-determined)
+CONTEXT_UNARY = {'~', '-', '+'}
+CONTEXT_BINARY = {'&', '|', '^', '~^', '^~', '+', '-'}
+
+
+class UnsupportedDesign(ValueError):
+    pass
+
+
+def _number(token):
+    # Two-valued: x/z/? read as 0. Returns LSB-first bits.
+    if '.' in token:
+        raise UnsupportedDesign(f"Real number {token} is not supported")
+    if "'" not in token:
+        return [(int(token) >> i) & 1 for i in range(32)]
+    size, value = token.replace(' ', '').replace('_', '').split("'")
+    value = value.lstrip('sS')
+    base, digits = BASES[value[0].lower()], re.sub(r'[xXzZ?]', '0', value[1:])
+    number = int(digits, base)
+    width = int(size) if size else max(32, number.bit_length())
+    return [(number >> i) & 1 for i in range(width)]
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+    
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else None
+    
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise UnsupportedDesign("Unexpected end of source")
+        self.pos += 1
+        return token
+    
+    def accept(self, token):
+        if self.peek() == token:
+            self.pos += 1
+            return True
+        return False
+    
+    def expect(self, token):
+        got = self.next()
+        if got != token:
+            raise UnsupportedDesign(f"Expected {token!r}, got {got!r}")
+        return got
+    
+    def ident(self):
+        token = self.next()
+        if not re.fullmatch(r'[A-Za-z_][\w$]*', token):
+            raise UnsupportedDesign(f"Expected identifier, got {token!r}")
+        return token
+    
+    def const(self):
+        bits = _number(self.next())
+        return sum(b << i for i, b in enumerate(bits))
+    
+    # Expressions, lowest precedence first; nodes are tuples evaluated by LogicSimulator._eval
+    def expr(self):
+        cond = self.binary(0)
+        if self.accept('?'):
+            a = self.expr()
+            self.expect(':')
+            return ('?', cond, a, self.expr())
+        return cond
+    
+    LEVELS = [('||',), ('&&',), ('|',), ('^', '~^', '^~'), ('&',), ('==', '!=', '===', '!=='),
+              ('<', '>', '<=', '>='), ('<<', '>>'), ('+', '-')]
+    
+    def binary(self, level):
+        if level == len(self.LEVELS):
+            return self.unary()
+        node = self.binary(level + 1)
+        while self.peek() in self.LEVELS[level]:
+            node = ('bin', self.next(), node, self.binary(level + 1))
+        return node
+    
+    def unary(self):
+        if self.peek() in ('~', '!', '-', '+', '&', '|', '^', '~&', '~|', '~^', '^~'):
+            return ('un', self.next(), self.unary())
+        return self.primary()
+    
+    def primary(self):
+        token = self.next()
+        if token == '(':
+            node = self.expr()
+            self.expect(')')
+            return node
+        if token == '{':
+            first = self.expr()
+            if self.accept('{'):
+                # Replication {n{expr}}: the count must be a literal
+                if first[0] != 'const':
+                    raise UnsupportedDesign("Replication count must be a constant")
+                inner = self.concat_tail(self.expr())
+                self.expect('}')
+                return ('repl', sum(b << i for i, b in enumerate(first[1])), inner)
+            return self.concat_tail(first)
+        if token[0].isdigit() or token[0] == "'":
+            return ('const', _number(token))
+        if not re.fullmatch(r'[A-Za-z_][\w$]*', token):
+            raise UnsupportedDesign(f"Unexpected {token!r} in expression")
+        return ('ref', token) + self.select()
+    
+    def concat_tail(self, first):
+        parts = [first]
+        while self.accept(','):
+            parts.append(self.expr())
+        self.expect('}')
+        return ('cat', parts)
+    
+    def select(self):
+        if not self.accept('['):
+            return (None, None)
+        hi = self.const()
+        lo = self.const() if self.accept(':') else hi
+        self.expect(']')
+        return (hi, lo)
+    
+    def lvalue(self):
+        if self.accept('{'):
+            parts = [self.lvalue()]
+            while self.accept(','):
+                parts.append(self.lvalue())
+            self.expect('}')
+            return ('cat', parts)
+        return ('ref', self.ident()) + self.select()
+    
+    def range(self):
+        if not self.accept('['):
+            return (0, 0)
+        msb = self.const()
+        self.expect(':')
+        lsb = self.const()
+        self.expect(']')
+        return (msb, lsb)
+    
+    def skip_delay(self):
+        if self.accept('#'):
+            if self.accept('('):
+                depth = 1
+                while depth:
+                    token = self.next()
+                    depth += {'(': 1, ')': -1}.get(token, 0)
+            else:
+                self.next()
+    
+    def statement(self):
+        # Procedural subset: begin/end, if/else and (non-)blocking assignments
+        if self.accept('begin'):
+            if self.accept(':'):
+                self.ident()
+            body = []
+            while not self.accept('end'):
+                body.append(self.statement())
+            return ('block', body)
+        if self.accept('if'):
+            self.expect('(')
+            cond = self.expr()
+            self.expect(')')
+            then = self.statement()
+            other = self.statement() if self.accept('else') else None
+            return ('if', cond, then, other)
+        if self.accept(';'):
+            return ('block', [])
+        target = self.lvalue()
+        blocking = self.accept('=')
+        if not (blocking or self.accept('<=')):
+            raise UnsupportedDesign(f"Unsupported statement near {self.peek()!r}")
+        self.skip_delay()
+        value = self.expr()
+        self.expect(';')
+        return ('set', target, value, blocking)
+
+
+def parse_design(verilog_code, module=None):
+    # -> (name, nets {name: (msb, lsb)}, inputs, outputs, assigns [(lvalue, expr)],
+    #     registers [(clock, statement)]) for the first module, or the one named `module`.
+    # The netlist parser finds the module; expression trees are built from its tokens
+    modules = list(parse_netlist(verilog_code).modules.values())
+    if not modules:
+        raise UnsupportedDesign("No module found")
+    found = next((m for m in modules if m.name == module), modules[0])
+    start, _, end = found.span
+    name = found.name
+    p = _Parser(tokenize(verilog_code)[0][start + 1:end] + [';'])
+    
+    nets, inputs, outputs, assigns, registers = {}, [], [], [], []
+    
+    def declare(kind, rng, net):
+        if kind == 'inout':
+            raise UnsupportedDesign("inout ports are not supported")
+        if rng != (0, 0) or net not in nets:
+            nets[net] = rng
+        if kind == 'input' and net not in inputs:
+            inputs.append(net)
+        if kind == 'output' and net not in outputs:
+            outputs.append(net)
+    
+    if p.accept('#'):
+        raise UnsupportedDesign("Parameterized modules are not supported")
+    if p.accept('('):
+        kind, rng = None, (0, 0)
+        while not p.accept(')'):
+            if p.peek() in ('input', 'output', 'inout'):
+                kind = p.next()
+                p.accept('wire') or p.accept('reg')
+                p.accept('signed')
+                rng = p.range()
+            declare(kind, rng, p.ident())
+            p.accept(',')
+    p.expect(';')
+    
+    while p.peek() is not None:
+        token = p.next()
+        if token == ';':
+            continue
+        if token in UNSUPPORTED:
+            raise UnsupportedDesign(f"'{token}' is not supported")
+        if token in ('input', 'output', 'wire', 'reg'):
+            kind = token
+            if p.peek() in ('wire', 'reg'):
+                p.next()
+            p.accept('signed')
+            rng = p.range()
+            while True:
+                net = p.ident()
+                declare(kind, rng, net)
+                if p.accept('='):
+                    assigns.append((('ref', net, None, None), p.expr()))
+                if not p.accept(','):
+                    break
+            p.expect(';')
+        elif token == 'assign':
+            p.skip_delay()
+            while True:
+                target = p.lvalue()
+                p.expect('=')
+                assigns.append((target, p.expr()))
+                if not p.accept(','):
+                    break
+            p.expect(';')
+        elif token in PRIMITIVES:
+            p.skip_delay()
+            while True:
+                if p.peek() != '(':
+                    p.ident()
+                p.expect('(')
+                terminals = [p.expr()]
+                while p.accept(','):
+                    terminals.append(p.expr())
+                p.expect(')')
+                if token in ('not', 'buf'):
+                    # Several outputs, one input (the last terminal)
+                    for out in terminals[:-1]:
+                        value = terminals[-1] if token == 'buf' else ('un', '~', terminals[-1])
+                        assigns.append((out, value))
+                else:
+                    op = {'and': '&', 'or': '|', 'xor': '^', 'nand': '&', 'nor': '|', 'xnor': '^'}[token]
+                    value = terminals[1]
+                    for term in terminals[2:]:
+                        value = ('bin', op, value, term)
+                    if token in ('nand', 'nor', 'xnor'):
+                        value = ('un', '~', value)
+                    assigns.append((terminals[0], value))
+                if not p.accept(','):
+                    break
+            p.expect(';')
+        elif token == 'always':
+            p.expect('@')
+            p.expect('(')
+            if p.next() != 'posedge':
+                raise UnsupportedDesign("Only always @(posedge clk) blocks are supported")
+            clock = p.ident()
+            # Extra posedge/negedge terms (asynchronous resets) are sampled on the clock edge
+            while p.accept('or') or p.accept(','):
+                p.next()
+                p.ident()
+            p.expect(')')
+            registers.append((clock, p.statement()))
+        else:
+            raise UnsupportedDesign(f"Unsupported module item {token!r} (instances are not supported)")
+    
+    for lvalue, _ in assigns:
+        for net in _lvalue_nets(lvalue):
+            nets.setdefault(net, (0, 0))
+    for net in inputs + outputs:
+        nets.setdefault(net, (0, 0))
+    # Implicit nets only come from assign/gate outputs; anything else read or written must be
+    # declared, so an unknown name is reported here rather than as a KeyError mid-simulation
+    used = {clock for clock, _ in registers}
+    for _, value in assigns:
+        _reads(value, used)
+    for _, statement in registers:
+        _statement_nets(statement, used)
+    undeclared = sorted(used - set(nets))
+    if undeclared:
+        raise UnsupportedDesign(f"Undeclared net(s): {', '.join(undeclared)}")
+    return name, nets, inputs, outputs, assigns, registers
+
+
+def _lvalue_nets(lvalue):
+    if lvalue[0] == 'cat':
+        return [n for part in lvalue[1] for n in _lvalue_nets(part)]
+    return [lvalue[1]]
+
+
+def _statement_nets(statement, out):
+    # Nets read or written by a procedural statement
+    kind = statement[0]
+    if kind == 'block':
+        for child in statement[1]:
+            _statement_nets(child, out)
+    elif kind == 'set':
+        out.update(_lvalue_nets(statement[1]))
+        _reads(statement[2], out)
+    else:
+        _reads(statement[1], out)
+        _statement_nets(statement[2], out)
+        if statement[3] is not None:
+            _statement_nets(statement[3], out)
+    return out
+
+
+def _reads(node, out):
+    kind = node[0]
+    if kind == 'ref':
+        out.add(node[1])
+    elif kind in ('un', 'repl'):
+        _reads(node[2], out)
+    elif kind == 'bin':
+        _reads(node[2], out)
+        _reads(node[3], out)
+    elif kind == '?':
+        for child in node[1:]:
+            _reads(child, out)
+    elif kind == 'cat':
+        for child in node[1]:
+            _reads(child, out)
+    return out
+
+
+class LogicSimulator:
+    # Two-valued, zero-delay, cycle-based simulator for one module. Every bit of every net is a
+    # plane: a uint64 array with one bit per test pattern ("lane"), so each NumPy bitwise op
+    # evaluates 64 patterns per word. Continuous assigns run in levelized (topological) order;
+    # posedge registers update once per cycle, blocking writes at once and non-blocking ones
+    # after every block has run.
+    def __init__(self, verilog_code, module=None):
+        (self.name, self.nets, self.inputs, self.outputs, self.assigns,
+         self.registers) = parse_design(verilog_code, module)
+        self._sizes = {}
+        self.clocks = sorted({clock for clock, _ in self.registers})
+        self.data_inputs = [n for n in self.inputs if n not in self.clocks]
+        self.levels = self._levelize()
+    
+    def width(self, net):
+        msb, lsb = self.nets[net]
+        return abs(msb - lsb) + 1
+    
+    def _plane(self, net, index):
+        msb, lsb = self.nets[net]
+        plane = index - lsb if msb >= lsb else lsb - index
+        if not 0 <= plane < self.width(net):
+            raise UnsupportedDesign(f"Bit {index} out of range for {net}")
+        return plane
+    
+    def _levelize(self):
+        # Kahn's algorithm over assign statements; level = longest path from inputs/registers
+        drivers = {}
+        for i, (lvalue, _) in enumerate(self.assigns):
+            for net in _lvalue_nets(lvalue):
+                drivers.setdefault(net, []).append(i)
+        deps = [{d for net in _reads(expr, set()) for d in drivers.get(net, ())}
+                for _, expr in self.assigns]
+        users = [[] for _ in self.assigns]
+        for i, d in enumerate(deps):
+            for j in d:
+                users[j].append(i)
+        waiting = [len(d) for d in deps]
+        level = [0] * len(self.assigns)
+        ready = [i for i, n in enumerate(waiting) if n == 0]
+        done = 0
+        while ready:
+            i = ready.pop()
+            done += 1
+            for u in users[i]:
+                level[u] = max(level[u], level[i] + 1)
+                waiting[u] -= 1
+                if waiting[u] == 0:
+                    ready.append(u)
+        if done < len(self.assigns):
+            loop = sorted({net for i, n in enumerate(waiting) if n for net in _lvalue_nets(self.assigns[i][0])})
+            raise UnsupportedDesign(f"Combinational loop through {', '.join(loop)}")
+        levels = [[] for _ in range(max(level, default=-1) + 1)]
+        for i, lv in enumerate(level):
+            levels[lv].append(i)
+        return levels
+    
+    def _size(self, node):
+        # Self-determined width of an expression (IEEE 1364 table 5-22), memoized per node
+        size = self._sizes.get(id(node))
+        if size is None:
+            kind = node[0]
+            if kind == 'const':
+                size = len(node[1])
+            elif kind == 'ref':
+                size = self.width(node[1]) if node[2] is None else abs(node[2] - node[3]) + 1
+            elif kind == 'cat':
+                size = sum(self._size(part) for part in node[1])
+            elif kind == 'repl':
+                size = node[1] * self._size(node[2])
+            elif kind == '?':
+                size = max(self._size(node[2]), self._size(node[3]))
+            elif kind == 'un':
+                size = self._size(node[2]) if node[1] in CONTEXT_UNARY else 1
+            elif node[1] in ('<<', '>>'):
+                size = self._size(node[2])
+            elif node[1] in CONTEXT_BINARY:
+                size = max(self._size(node[2]), self._size(node[3]))
+            else:
+                size = 1
+            self._sizes[id(node)] = size
+        return size
+    
+    # Evaluation: values map net -> list of planes (LSB first); constants stay numpy scalars.
+    # width is the context width (assignment target or enclosing operator): operands of
+    # context-determined operators are zero-extended to it before the operator applies.
+    def _eval(self, node, values, words, width=None):
+        kind = node[0]
+        if kind == 'const':
+            return [ONES if b else ZERO for b in node[1]]
+        if kind == 'ref':
+            planes = values[node[1]]
+            if node[2] is None:
+                return planes
+            lo, hi = sorted((self._plane(node[1], node[2]), self._plane(node[1], node[3])))
+            return planes[lo:hi + 1]
+        if kind == 'cat':
+            return [b for part in reversed(node[1]) for b in self._eval(part, values, words)]
+        if kind == 'repl':
+            return self._eval(node[2], values, words) * node[1]
+        width = max(width or 0, self._size(node))
+        if kind == '?':
+            cond = _any(self._eval(node[1], values, words))
+            a, b = (self._operand(n, values, words, width) for n in node[2:])
+            return [(cond & x) | (~cond & y) for x, y in zip(a, b)]
+        if kind == 'un':
+            op = node[1]
+            if op in CONTEXT_UNARY:
+                a = self._operand(node[2], values, words, width)
+                if op == '~':
+                    return [~x for x in a]
+                if op == '+':
+                    return a
+                return _add([ZERO] * width, [~x for x in a], ONES)[:width]
+            a = self._eval(node[2], values, words)
+            if op == '!':
+                return [~_any(a)]
+            reduced = {'&': _all, '~&': _all, '|': _any, '~|': _any}.get(op, _parity)(a)
+            return [~reduced if op.startswith('~') or op == '^~' else reduced]
+        op = node[1]
+        if op in ('<<', '>>'):
+            if node[3][0] != 'const':
+                raise UnsupportedDesign("Only constant shift amounts are supported")
+            a = self._operand(node[2], values, words, width)
+            n = min(sum(bit << i for i, bit in enumerate(node[3][1])), width)
+            return [ZERO] * n + a[:width - n] if op == '<<' else a[n:] + [ZERO] * n
+        if op in ('&&', '||'):
+            a, b = _any(self._eval(node[2], values, words)), _any(self._eval(node[3], values, words))
+            return [a & b if op == '&&' else a | b]
+        if op not in CONTEXT_BINARY:
+            # Comparisons: both operands sized to the wider of the two, result is one bit
+            width = max(self._size(node[2]), self._size(node[3]))
+        a, b = self._operand(node[2], values, words, width), self._operand(node[3], values, words, width)
+        if op == '&':
+            return [x & y for x, y in zip(a, b)]
+        if op == '|':
+            return [x | y for x, y in zip(a, b)]
+        if op == '^':
+            return [x ^ y for x, y in zip(a, b)]
+        if op in ('~^', '^~'):
+            return [~(x ^ y) for x, y in zip(a, b)]
+        if op in ('==', '==='):
+            return [~_any([x ^ y for x, y in zip(a, b)])]
+        if op in ('!=', '!=='):
+            return [_any([x ^ y for x, y in zip(a, b)])]
+        if op == '+':
+            return _add(a, b, ZERO)[:width]
+        # a - b = a + ~b + 1; the carry out is clear exactly when a < b
+        diff = _add(a, [~y for y in b], ONES)
+        if op == '-':
+            return diff[:width]
+        lt = ~diff[width]
+        eq = ~_any([x ^ y for x, y in zip(a, b)])
+        return [{'<': lt, '>=': ~lt, '<=': lt | eq, '>': ~(lt | eq)}[op]]
+    
+    def _operand(self, node, values, words, width):
+        planes = self._eval(node, values, words, width)
+        return planes[:width] + [ZERO] * (width - len(planes))
+    
+    def _store(self, lvalue, planes, values, words, base=None):
+        # Zero-extends or truncates to the target, filling concatenations from the right. A
+        # part-select write starts from values[net], or base[net] when values has none yet.
+        if lvalue[0] == 'cat':
+            for part in reversed(lvalue[1]):
+                n = self._lvalue_width(part)
+                self._store(part, planes[:n], values, words, base)
+                planes = planes[n:]
+            return
+        net, hi, lo = lvalue[1], lvalue[2], lvalue[3]
+        width = self._lvalue_width(lvalue)
+        planes = (list(planes) + [ZERO] * width)[:width]
+        planes = [np.broadcast_to(p, (words,)) for p in planes]
+        if hi is None:
+            values[net] = planes
+        else:
+            start = min(self._plane(net, hi), self._plane(net, lo))
+            merged = list(values[net] if net in values else base[net])
+            merged[start:start + width] = planes
+            values[net] = merged
+    
+    def _lvalue_width(self, lvalue):
+        if lvalue[0] == 'cat':
+            return sum(self._lvalue_width(p) for p in lvalue[1])
+        if lvalue[2] is None:
+            return self.width(lvalue[1])
+        return abs(lvalue[2] - lvalue[3]) + 1
+    
+    def _execute(self, statement, current, pending, words):
+        # Right-hand sides read `current`; blocking writes (=) update it in place, non-blocking
+        # ones (<=) collect in `pending`
+        kind = statement[0]
+        if kind == 'block':
+            for child in statement[1]:
+                self._execute(child, current, pending, words)
+        elif kind == 'set':
+            lvalue = statement[1]
+            planes = self._eval(statement[2], current, words, self._lvalue_width(lvalue))
+            self._store(lvalue, planes, current if statement[3] else pending, words, current)
+        else:
+            cond = _any(self._eval(statement[1], current, words))
+            (then_now, then), (other_now, other) = (self._branch(s, current, pending, words)
+                                                    for s in statement[2:])
+            for net, a in then_now.items():
+                b = other_now[net]
+                if a is not b:
+                    current[net] = [(cond & x) | (~cond & y) for x, y in zip(a, b)]
+            for net in set(then) | set(other):
+                a = then.get(net, pending.get(net, current[net]))
+                b = other.get(net, pending.get(net, current[net]))
+                pending[net] = [(cond & x) | (~cond & y) for x, y in zip(a, b)]
+    
+    def _branch(self, statement, current, pending, words):
+        current, pending = dict(current), dict(pending)
+        if statement is not None:
+            self._execute(statement, current, pending, words)
+        return current, pending
+    
+    def stimulus(self, max_patterns=LOGIC_SIM_MAX_PATTERNS, cycles=None, seed=RANDOM_STATE):
+        # -> (per-cycle input planes, lanes). Combinational designs get one cycle and an
+        # exhaustive sweep when 2**input_bits fits in max_patterns; otherwise lanes are random.
+        cycles = cycles or (LOGIC_SIM_CYCLES if self.registers else 1)
+        bits = sum(self.width(n) for n in self.data_inputs)
+        if cycles == 1 and 2 ** bits <= max_patterns:
+            lanes = 2 ** bits
+            words = max(1, -(-lanes // 64))
+            index = np.arange(words, dtype=np.uint64)
+            planes = [LANE_MASKS[j] if j < 6 else
+                      np.where((index >> np.uint64(j - 6)) & np.uint64(1), ONES, ZERO)
+                      for j in range(bits)]
+            planes = [np.broadcast_to(p, (words,)) for p in planes]
+            return [self._split(planes)], lanes
+        lanes = max(64, (max_patterns // cycles) // 64 * 64)
+        words = lanes // 64
+        rng = np.random.default_rng(seed)
+        return [self._split(list(rng.integers(0, 2 ** 64, size=(bits, words), dtype=np.uint64)))
+                for _ in range(cycles)], lanes
+    
+    def _split(self, planes):
+        out = {}
+        for net in self.data_inputs:
+            n = self.width(net)
+            out[net], planes = planes[:n], planes[n:]
+        return out
+    
+    def run(self, stimulus, lanes):
+        # -> list over cycles of {output: planes}, sampled before each clock edge
+        words = max(1, -(-lanes // 64))
+        state = {net: [np.zeros(words, dtype=np.uint64)] * self.width(net) for net in self.nets}
+        trace = []
+        for cycle_inputs in stimulus:
+            values = dict(state)
+            values.update(cycle_inputs)
+            for level in self.levels:
+                for i in level:
+                    lvalue, expr = self.assigns[i]
+                    self._store(lvalue, self._eval(expr, values, words, self._lvalue_width(lvalue)),
+                                values, words)
+            trace.append({net: values[net] for net in self.outputs})
+            current, pending = dict(values), {}
+            for _, statement in self.registers:
+                self._execute(statement, current, pending, words)
+            state = {**current, **pending}
+        return trace
+    
+    def format(self, trace, lanes):
+        # One row of output bits (outputs in port order, MSB first) per lane and cycle,
+        # concatenated like the per-line values parse_output() collects from a testbench
+        rows = []
+        for outputs in trace:
+            planes = [p for net in self.outputs for p in reversed(outputs[net])]
+            if not planes:
+                return ''
+            packed = np.stack([np.asarray(p, dtype='<u8') for p in planes])
+            bits = np.unpackbits(packed.view(np.uint8), axis=1, bitorder='little')[:, :lanes]
+            rows.append(bits.T)
+        return (np.concatenate(rows) + ord('0')).astype(np.uint8).tobytes().decode()
+    
+    def sweep(self, max_patterns=LOGIC_SIM_MAX_PATTERNS, cycles=None, seed=RANDOM_STATE):
+        stimulus, lanes = self.stimulus(max_patterns, cycles, seed)
+        return self.format(self.run(stimulus, lanes), lanes), lanes
+
+
+def _align(a, b):
+    n = max(len(a), len(b))
+    return a + [ZERO] * (n - len(a)), b + [ZERO] * (n - len(b))
+
+
+def _any(planes):
+    out = ZERO
+    for p in planes:
+        out = out | p
+    return out
+
+
+def _all(planes):
+    out = ONES
+    for p in planes:
+        out = out & p
+    return out
+
+
+def _parity(planes):
+    out = ZERO
+    for p in planes:
+        out = out ^ p
+    return out
+
+
+def _add(a, b, carry):
+    a, b = _align(a, b)
+    out = []
+    for x, y in zip(a, b):
+        s = x ^ y
+        out.append(s ^ carry)
+        carry = (x & y) | (carry & s)
+    return out + [carry]
+
+
+@lru_cache(maxsize=256)
+def compile_design(verilog_code, module=None):
+    # Parsed, levelized simulators are reused across calls with the same source
+    return LogicSimulator(verilog_code, module)
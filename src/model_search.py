@@ -0,0 +1,106 @@
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from config import (MODEL_SEARCH_SPACE, SEARCH_CV_FOLDS, SEARCH_LATENCY_PENALTY,
+                    SEARCH_MAX_WORKERS, RANDOM_STATE)
+
+FAMILIES = {
+    'RandomForest': ('sklearn.ensemble', 'RandomForestClassifier'),
+    'ExtraTrees': ('sklearn.ensemble', 'ExtraTreesClassifier'),
+    'GradientBoosting': ('sklearn.ensemble', 'GradientBoostingClassifier'),
+    'HistGradientBoosting': ('sklearn.ensemble', 'HistGradientBoostingClassifier'),
+    'LogisticRegression': ('sklearn.linear_model', 'LogisticRegression'),
+}
+
+
+def make_estimator(family, params, n_jobs=1):
+    from importlib import import_module
+    module, cls_name = FAMILIES[family]
+    cls = getattr(import_module(module), cls_name)
+    kwargs = dict(params)
+    if family != 'LogisticRegression':
+        kwargs.setdefault('random_state', RANDOM_STATE)
+    if family in ('RandomForest', 'ExtraTrees'):
+        kwargs.setdefault('n_jobs', n_jobs)
+    if family == 'LogisticRegression':
+        kwargs.setdefault('max_iter', 1000)
+    return cls(**kwargs)
+
+
+def expand_grid(space):
+    for family, grid in space.items():
+        keys = sorted(grid)
+        for values in itertools.product(*(grid[k] for k in keys)):
+            yield family, dict(zip(keys, values))
+
+
+def _fit_fold(task):
+    # Runs in a worker process: fit one candidate on one CV fold. Only the model that latency is
+    # timed on (keep) is pickled back to the parent
+    family, params, X, y, train_idx, test_idx, keep = task
+    model = make_estimator(family, params)
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    accuracy = float((model.predict(X[test_idx]) == y[test_idx]).mean())
+    return accuracy, fit_seconds, model if keep else None
+
+
+def measure_latency(model, X, n_single=50, batch_size=1000):
+    # Per-sample latency for one-at-a-time scoring, and amortised cost inside a batch
+    single = []
+    for row in X[:n_single]:
+        start = time.perf_counter()
+        model.predict_proba(row.reshape(1, -1))
+        single.append(time.perf_counter() - start)
+    batch = X[:batch_size]
+    start = time.perf_counter()
+    model.predict_proba(batch)
+    batch_seconds = time.perf_counter() - start
+    return {
+        'single_ms_p50': float(np.percentile(single, 50) * 1000),
+        'single_ms_p95': float(np.percentile(single, 95) * 1000),
+        'batch_us_per_sample': float(batch_seconds / len(batch) * 1e6),
+    }
+
+
+def search_models(X, y, space=MODEL_SEARCH_SPACE, folds=SEARCH_CV_FOLDS,
+                  max_workers=SEARCH_MAX_WORKERS, log=print):
+    from sklearn.model_selection import StratifiedKFold
+    splits = list(StratifiedKFold(folds, shuffle=True, random_state=RANDOM_STATE).split(X, y))
+    candidates = list(expand_grid(space))
+    tasks = [(family, params, X, y, tr, te, fold == 0) for family, params in candidates
+             for fold, (tr, te) in enumerate(splits)]
+    
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        fold_results = list(pool.map(_fit_fold, tasks))
+    
+    leaderboard = []
+    for i, (family, params) in enumerate(candidates):
+        runs = fold_results[i * folds:(i + 1) * folds]
+        scores = [r[0] for r in runs]
+        # Latency is timed serially here so candidates do not compete for cores
+        latency = measure_latency(runs[0][2], X[splits[0][1]])
+        leaderboard.append({
+            'name': family,
+            'params': params,
+            'cv_accuracy': float(np.mean(scores)),
+            'cv_std': float(np.std(scores)),
+            'fit_seconds': float(np.mean([r[1] for r in runs])),
+            'latency': latency,
+        })
+        log(f"   {family:<22} {params}  acc={np.mean(scores)*100:.2f}%  "
+            f"latency={latency['single_ms_p50']:.2f}ms")
+    return select_model(leaderboard)
+
+
+def select_model(leaderboard, penalty=SEARCH_LATENCY_PENALTY):
+    # Utility = accuracy minus `penalty` for every 10x of per-sample latency over the fastest
+    fastest = min(c['latency']['single_ms_p50'] for c in leaderboard)
+    for c in leaderboard:
+        c['utility'] = c['cv_accuracy'] - penalty * math.log10(c['latency']['single_ms_p50'] / fastest)
+    leaderboard.sort(key=lambda c: c['utility'], reverse=True)
+    return leaderboard
@@ -0,0 +1,636 @@
+import hashlib
+import os
+import pickle
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from config import NETLIST_CACHE_DIR, NETLIST_MEMORY_ITEMS, NETLIST_DISK_MIN_BYTES
+
+# Bump whenever the parsed structure changes so cached netlists are invalidated
+NETLIST_VERSION = 3
+# Characters a streamed source must extend past a token before the token is taken as complete
+TOKEN_LOOKAHEAD = 256
+# Consumed tokens a streaming cursor keeps before dropping them
+CURSOR_RELEASE = 4096
+
+TOKEN_RE = re.compile(r"(?P<comment>//[^\n]*|/\*.*?\*/)|(?P<string>\"(?:\\.|[^\"\\])*\")"
+                      r"|(?P<directive>`\w+[^\n]*)"
+                      r"|(?P<number>\d*\s*'[sS]?[bBoOdDhH]\s*[0-9a-fA-FxXzZ_?]+|\d+(?:\.\d+)?)"
+                      r"|(?P<ident>[A-Za-z_][\w$]*|\$\w+|\\\S+)"
+                      r"|(?P<op>===|!==|==|!=|<=|>=|&&|\|\||<<|>>|~\^|\^~|~&|~\||\S)|\s+", re.S)
+WORD_RE = re.compile(r'\w+')
+DIRECTIONS = {'input', 'output', 'inout'}
+NET_TYPES = {'wire', 'reg', 'tri', 'logic', 'integer', 'wand', 'wor', 'supply0', 'supply1', 'real',
+             'time', 'bit'}
+# Declared with these, `name = value` is a one-time initializer rather than a continuous driver
+VARIABLE_TYPES = {'reg', 'logic', 'integer', 'real', 'time', 'bit'}
+GATES = {'and', 'or', 'nand', 'nor', 'xor', 'xnor', 'not', 'buf', 'bufif0', 'bufif1', 'notif0',
+         'notif1', 'pullup', 'pulldown'}
+PROCESSES = {'always', 'always_ff', 'always_comb', 'always_latch', 'initial', 'final'}
+SKIPPED = {'function': 'endfunction', 'task': 'endtask', 'generate': 'endgenerate',
+           'specify': 'endspecify', 'primitive': 'endprimitive'}
+KEYWORDS = (DIRECTIONS | NET_TYPES | GATES | PROCESSES | set(SKIPPED) | set(SKIPPED.values()) | {
+    'module', 'endmodule', 'assign', 'begin', 'end', 'if', 'else', 'case', 'casez', 'casex', 'endcase',
+    'default', 'for', 'while', 'repeat', 'forever', 'fork', 'join', 'wait', 'posedge', 'negedge', 'or',
+    'parameter', 'localparam', 'defparam', 'genvar', 'signed', 'unsigned', 'disable'})
+
+
+class Net:
+    __slots__ = ('name', 'kind', 'width', 'net_type', 'range', 'drivers', 'loads')
+    
+    def __init__(self, name, kind=None, width=1, net_type=None, range=''):
+        self.name = name
+        self.kind = kind  # input/output/inout/wire/reg/...; None for implicit nets
+        self.width = width
+        self.net_type = net_type  # declared wire/reg/...; None when only a direction was given
+        self.range = range  # declared range as written, e.g. '[W-1:0]'; '' for scalars
+        self.drivers = []  # indexes into Module.nodes
+        self.loads = []
+
+
+class Node:
+    # One driving element: a continuous assign (or declaration initializer), a gate primitive,
+    # a procedural block or a module instance
+    __slots__ = ('kind', 'name', 'label', 'targets', 'sources', 'sequential', 'delay', 'constant', 'alias')
+    
+    def __init__(self, kind, name=None, targets=(), sources=(), sequential=False, delay=None, constant=None,
+                 label=None, alias=None):
+        self.kind = kind
+        self.name = name  # gate type, process keyword or instantiated cell
+        self.label = label  # instance name
+        self.targets = list(targets)
+        self.sources = list(sources)
+        self.sequential = sequential
+        self.delay = delay
+        self.constant = constant  # literal such as 1'b0 when a simple assign drives a constant
+        self.alias = alias  # (net, inverted) when the node only buffers or inverts one net
+
+
+class Module:
+    def __init__(self, name):
+        self.name = name
+        self.ports = []
+        self.nets = {}
+        self.nodes = []
+        self.delays = set()
+        self.depth = {}
+        self.stats = {}
+        self.span = None  # token indexes (see tokenize) of the name, first body item and endmodule
+        self._connections = {}  # instance node -> [(port name or position, nets)] until resolved
+    
+    @property
+    def inputs(self):
+        return [p for p in self.ports if self.nets[p].kind == 'input']
+    
+    @property
+    def outputs(self):
+        return [p for p in self.ports if self.nets[p].kind == 'output']
+    
+    @property
+    def instances(self):
+        return [n for n in self.nodes if n.kind == 'instance']
+    
+    def fanout(self, net):
+        return len(self.nets[net].loads)
+    
+    def net(self, name, kind=None, width=1, net_type=None, range=''):
+        net = self.nets.get(name)
+        if net is None:
+            net = self.nets[name] = Net(name, kind, width, net_type, range)
+        elif kind is not None:
+            if net.kind is None or net.kind in ('wire', 'reg') and kind in DIRECTIONS:
+                net.kind = kind
+            if width > 1:
+                net.width = width
+            net.net_type = net_type or net.net_type
+            net.range = range or net.range
+        return net
+    
+    def _index(self):
+        # Driver/load lists, then logic depth: combinational nodes add one level; module inputs,
+        # registers and instance outputs start at zero
+        for net in self.nets.values():
+            net.drivers, net.loads = [], []
+        for i, node in enumerate(self.nodes):
+            node.sources = [s for s in node.sources if s in self.nets]
+            for t in node.targets:
+                self.nets[t].drivers.append(i)
+            for s in node.sources:
+                self.nets[s].loads.append(i)
+        
+        comb = {i for i, n in enumerate(self.nodes)
+                if n.kind in ('assign', 'gate', 'always') and not n.sequential}
+        depth = dict.fromkeys(self.nets, 0)
+        # Nodes on a combinational loop never become ready and keep depth 0
+        waiting = {i: sum(1 for s in self.nodes[i].sources for d in self.nets[s].drivers if d in comb)
+                   for i in comb}
+        ready = [i for i, n in waiting.items() if n == 0]
+        while ready:
+            i = ready.pop()
+            node = self.nodes[i]
+            level = 1 + max((depth[s] for s in node.sources), default=0)
+            for t in node.targets:
+                depth[t] = max(depth[t], level)
+                for load in self.nets[t].loads:
+                    if load in waiting:
+                        waiting[load] -= 1
+                        if waiting[load] == 0:
+                            ready.append(load)
+        self.depth = depth
+        
+        fanouts = [len(n.loads) for n in self.nets.values()]
+        self.stats = {
+            'nets': len(self.nets),
+            'inputs': len(self.inputs),
+            'outputs': len(self.outputs),
+            'gates': sum(n.kind == 'gate' for n in self.nodes),
+            'assigns': sum(n.kind == 'assign' for n in self.nodes),
+            'registers': len({t for n in self.nodes if n.sequential for t in n.targets}),
+            'instances': len(self.instances),
+            'logic_depth': max(depth.values(), default=0),
+            'max_fanout': max(fanouts, default=0),
+            'mean_fanout': round(sum(fanouts) / len(fanouts), 3) if fanouts else 0.0,
+        }
+
+
+class Netlist:
+    # Every module in one source, indexed once. `top` is the first module no other module
+    # instantiates (the first module when all are instantiated).
+    def __init__(self, modules, words, key=None):
+        self.modules = modules
+        self.words = words  # lower-cased identifiers and comment/string words, for keyword checks
+        self.key = key
+        instantiated = {n.name for m in modules.values() for n in m.instances}
+        tops = [m for name, m in modules.items() if name not in instantiated] or list(modules.values())
+        self.top = tops[0] if tops else None
+    
+    def module(self, name=None):
+        if name is not None and name in self.modules:
+            return self.modules[name]
+        return self.top
+    
+    def constants(self):
+        # Literals driven onto nets by simple continuous assigns
+        return {n.constant for m in self.modules.values() for n in m.nodes if n.constant}
+    
+    def delays(self):
+        return set().union(*(m.delays for m in self.modules.values()))
+    
+    def outputs(self):
+        return {p for m in self.modules.values() for p in m.outputs}
+    
+    def mentions(self, word):
+        return any(word in w for w in self.words)
+
+
+class _Cursor:
+    # Tokens come from a list or, read on demand, an iterator; self.tokens holds them from
+    # stream index self.base
+    def __init__(self, tokens):
+        self.streaming = not isinstance(tokens, list)
+        self.tokens = [] if self.streaming else tokens
+        self._source = iter(tokens if self.streaming else ())
+        self.base = 0
+        self.pos = 0
+    
+    def peek(self, offset=0):
+        i = self.pos + offset - self.base
+        if i < len(self.tokens):
+            return self.tokens[i]
+        for token in self._source:
+            self.tokens.append(token)
+            if i < len(self.tokens):
+                return self.tokens[i]
+        return None
+    
+    def release(self):
+        # Drops consumed stream tokens, keeping the last one so the parser can step back once
+        drop = self.pos - 1 - self.base
+        if self.streaming and drop >= CURSOR_RELEASE:
+            del self.tokens[:drop]
+            self.base += drop
+    
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+    
+    def accept(self, token):
+        if self.peek() == token:
+            self.pos += 1
+            return True
+        return False
+    
+    def group(self):
+        # Balanced (...), [...] or {...} starting at the cursor; returns the inner tokens
+        opener = self.next()
+        closer = {'(': ')', '[': ']', '{': '}'}[opener]
+        out, depth = [], 1
+        while depth and self.peek() is not None:
+            token = self.next()
+            if token == opener:
+                depth += 1
+            elif token == closer:
+                depth -= 1
+            out.append(token)
+        return out[:-1]
+    
+    def until(self, *stops):
+        # Tokens up to the first stop token at bracket depth 0; the stop is not consumed
+        out, depth = [], 0
+        while self.peek() is not None:
+            token = self.peek()
+            if depth == 0 and token in stops:
+                break
+            if token in ('(', '[', '{'):
+                depth += 1
+            elif token in (')', ']', '}'):
+                depth -= 1
+            out.append(self.next())
+        return out
+    
+    def skip_to(self, end):
+        while self.peek() is not None and self.next() != end:
+            pass
+
+
+def _idents(tokens):
+    out, after_dot = [], False
+    for token in tokens:
+        if (token[0].isalpha() or token[0] == '_') and token not in KEYWORDS and not after_dot:
+            out.append(token)
+        after_dot = token == '.'
+    return out
+
+
+def _width(tokens):
+    # [msb:lsb] with literal bounds; anything else counts as one bit
+    try:
+        msb, lsb = ''.join(tokens).split(':')
+        return abs(int(msb) - int(lsb)) + 1
+    except ValueError:
+        return 1
+
+
+def _split(tokens):
+    # Comma-separated items at bracket depth 0
+    items, current, depth = [], [], 0
+    for token in tokens:
+        if token in ('(', '[', '{'):
+            depth += 1
+        elif token in (')', ']', '}'):
+            depth -= 1
+        if token == ',' and depth == 0:
+            items.append(current)
+            current = []
+        else:
+            current.append(token)
+    if current:
+        items.append(current)
+    return items
+
+
+def _delay(c, module):
+    # '#25', '#(10)', '#(1:2:3)'; the first literal is recorded
+    if not c.accept('#'):
+        return None
+    tokens = c.group() if c.peek() == '(' else [c.next()]
+    for token in tokens:
+        if token and token[0].isdigit():
+            value = int(float(token)) if "'" not in token else None
+            if value is not None:
+                module.delays.add(value)
+                return value
+    return None
+
+
+def _declaration(c, module, kind):
+    declared = c.next() if c.peek() in NET_TYPES else None
+    c.accept('signed')
+    rng = c.group() if c.peek() == '[' else None
+    width = _width(rng) if rng is not None else 1
+    rng = f"[{''.join(rng)}]" if rng is not None else ''
+    names = []
+    for item in _split(c.until(';')):
+        name = item[0]
+        module.net(name, kind, width, declared, rng)
+        names.append(name)
+        if '=' in item:
+            rhs = item[item.index('=') + 1:]
+            if (declared or kind) in VARIABLE_TYPES:
+                # reg r = 1'b0: set once at time zero, later writes win, so not a constant driver
+                module.nodes.append(Node('initial', targets=[name], sources=_idents(rhs)))
+            else:
+                module.nodes.append(Node('assign', targets=[name], sources=_idents(rhs),
+                                         constant=_constant(rhs), alias=_alias(rhs)))
+    return names
+
+
+def _constant(rhs):
+    if len(rhs) == 1 and "'" in rhs[0]:
+        return rhs[0].replace(' ', '').lower()
+    return None
+
+
+def _alias(rhs):
+    # `x` or `~x`
+    inverted = rhs[:1] == ['~']
+    rhs = rhs[inverted:]
+    return (rhs[0], inverted) if len(rhs) == 1 and _idents(rhs) else None
+
+
+def _statement(c, module, targets, sources):
+    token = c.peek()
+    if token is None:
+        return
+    if token in ('begin', 'fork'):
+        c.next()
+        end = 'end' if token == 'begin' else 'join'
+        if c.accept(':'):
+            c.next()
+        while c.peek() not in (end, None, 'endmodule'):
+            _statement(c, module, targets, sources)
+        c.accept(end)
+    elif token == 'if':
+        c.next()
+        sources += _idents(c.group())
+        _statement(c, module, targets, sources)
+        if c.accept('else'):
+            _statement(c, module, targets, sources)
+    elif token in ('case', 'casez', 'casex'):
+        c.next()
+        sources += _idents(c.group())
+        while c.peek() not in ('endcase', None, 'endmodule'):
+            c.accept('default')
+            sources += _idents(c.until(':'))
+            c.accept(':')
+            _statement(c, module, targets, sources)
+        c.accept('endcase')
+    elif token in ('for', 'while', 'repeat', 'wait'):
+        c.next()
+        c.group()
+        _statement(c, module, targets, sources)
+    elif token == 'forever':
+        c.next()
+        _statement(c, module, targets, sources)
+    elif token == '#':
+        _delay(c, module)
+        _statement(c, module, targets, sources)
+    elif token == '@':
+        c.next()
+        if c.peek() == '(':
+            c.group()
+        else:
+            c.next()
+        _statement(c, module, targets, sources)
+    elif token == ';':
+        c.next()
+    else:
+        tokens = c.until(';', 'end', 'endcase', 'join')
+        c.accept(';')
+        # Intra-assignment delays: q <= #15 d
+        module.delays.update(int(float(tokens[i + 1])) for i, t in enumerate(tokens[:-1])
+                             if t == '#' and tokens[i + 1][0].isdigit() and "'" not in tokens[i + 1])
+        ops = [i for i, t in enumerate(tokens) if t in ('=', '<=')]
+        if ops:
+            targets += _idents(tokens[:ops[0]])
+            sources += _idents(tokens[ops[0] + 1:])
+        else:
+            sources += _idents(tokens)
+
+
+def _module(c):
+    start = c.pos
+    module = Module(c.next())
+    if c.accept('#'):
+        c.group()
+    if c.peek() == '(':
+        # ANSI items carry their own direction; bare names are non-ANSI ports (or inherit it)
+        kind, width, declared, rng = None, 1, None, ''
+        for item in _split(c.group()):
+            if item and item[0] in DIRECTIONS:
+                kind = item[0]
+                declared = next((t for t in item[1:] if t in NET_TYPES), None)
+                item = [t for t in item[1:] if t not in NET_TYPES and t != 'signed']
+                width, rng = 1, ''
+                if item and item[0] == '[':
+                    close = item.index(']')
+                    width = _width(item[1:close])
+                    rng = ''.join(item[:close + 1])
+                    item = item[close + 1:]
+            if item:
+                module.ports.append(item[0])
+                module.net(item[0], kind, width, declared, rng)
+    c.accept(';')
+    body = c.pos
+    
+    while c.peek() not in (None, 'endmodule'):
+        c.release()
+        token = c.next()
+        if token in DIRECTIONS:
+            for name in _declaration(c, module, token):
+                if name not in module.ports:
+                    module.ports.append(name)
+            c.accept(';')
+        elif token in NET_TYPES:
+            c.pos -= 1
+            _declaration(c, module, token)
+            c.accept(';')
+        elif token == 'assign':
+            delay = _delay(c, module)
+            for item in _split(c.until(';')):
+                if '=' in item:
+                    lhs, rhs = item[:item.index('=')], item[item.index('=') + 1:]
+                    module.nodes.append(Node('assign', targets=_idents(lhs), sources=_idents(rhs),
+                                             delay=delay, constant=_constant(rhs) if len(lhs) == 1 and delay is None else None,
+                                             alias=_alias(rhs) if len(lhs) == 1 else None))
+            c.accept(';')
+        elif token in GATES:
+            if c.peek() == '(' and c.peek(1) in ('strong0', 'strong1', 'weak0', 'weak1', 'pull0',
+                                                  'pull1', 'supply0', 'supply1', 'highz0', 'highz1'):
+                c.group()
+            delay = _delay(c, module)
+            for item in _split(c.until(';')):
+                if '(' not in item:
+                    continue
+                terminals = _split(item[item.index('(') + 1:-1])
+                outputs = terminals[:-1] if token in ('not', 'buf') else terminals[:1]
+                inputs = terminals[-1:] if token in ('not', 'buf') else terminals[1:]
+                alias = _alias(inputs[0]) if token in ('not', 'buf') and len(terminals) == 2 else None
+                module.nodes.append(Node('gate', token, [n for t in outputs for n in _idents(t)],
+                                         [n for t in inputs for n in _idents(t)], delay=delay,
+                                         alias=alias and (alias[0], token == 'not')))
+            c.accept(';')
+        elif token in PROCESSES:
+            sequential = False
+            sensitivity = []
+            if c.accept('@'):
+                events = c.group() if c.peek() == '(' else [c.next()]
+                sequential = 'posedge' in events or 'negedge' in events
+                sensitivity = _idents(events)
+            targets, sources = [], []
+            _statement(c, module, targets, sources)
+            kind = 'initial' if token in ('initial', 'final') else 'always'
+            # Edge-triggered clocks/resets feed the registers like any other source
+            module.nodes.append(Node(kind, token, dict.fromkeys(targets),
+                                     dict.fromkeys(sources + (sensitivity if sequential else [])),
+                                     sequential=sequential or token == 'always_ff'))
+        elif token in SKIPPED:
+            c.skip_to(SKIPPED[token])
+        elif token in ('parameter', 'localparam', 'defparam', 'genvar'):
+            c.until(';')
+            c.accept(';')
+        elif token[0].isalpha() or token[0] in '_\\':
+            _instances(c, module, token)
+        else:
+            c.until(';')
+            c.accept(';')
+    module.span = (start, body, c.pos)
+    c.accept('endmodule')
+    return module
+
+
+def _instances(c, module, cell):
+    if c.accept('#'):
+        c.group()
+    while c.peek() not in (None, ';', 'endmodule'):
+        name = c.next()
+        if c.peek() == '[':
+            c.group()
+        if c.peek() != '(':
+            break
+        connections = []
+        for position, item in enumerate(_split(c.group())):
+            if item and item[0] == '.':
+                port = item[1]
+                expr = item[3:-1] if len(item) > 2 and item[2] == '(' else [port]
+            else:
+                port, expr = position, item
+            connections.append((port, _idents(expr)))
+        # Directions are resolved against the instantiated module once every module is parsed
+        node = Node('instance', cell, label=name)
+        module._connections[node] = connections
+        module.nodes.append(node)
+        if not c.accept(','):
+            break
+    c.until(';')
+    c.accept(';')
+
+
+def _resolve_instances(modules):
+    for module in modules.values():
+        for node, connections in module._connections.items():
+            cell = modules.get(node.name)
+            for port, nets in connections:
+                if cell is not None and isinstance(port, int):
+                    port = cell.ports[port] if port < len(cell.ports) else None
+                kind = cell.nets[port].kind if cell is not None and port in cell.nets else None
+                # Unknown cells and ports: assume the connection is read
+                (node.targets if kind == 'output' else node.sources).extend(nets)
+                if kind == 'inout':
+                    node.targets.extend(nets)
+        module._connections = {}
+        for node in module.nodes:
+            for name in node.targets:
+                module.net(name)
+        module._index()
+
+
+def _tokens(chunks, words):
+    # Tokens of a source given as text chunks. Until the last chunk, a token is only taken once
+    # TOKEN_LOOKAHEAD characters follow it, and an unterminated /* or " waits for more text, so
+    # tokens, comments and strings split across chunks come out whole.
+    buffer, chunks, more = '', iter(chunks), True
+    while more:
+        chunk = next(chunks, None)
+        more = chunk is not None
+        buffer += chunk or ''
+        limit = len(buffer) - TOKEN_LOOKAHEAD if more else len(buffer)
+        pos = 0
+        for m in TOKEN_RE.finditer(buffer):
+            kind, text = m.lastgroup, m.group()
+            if more and (m.end() > limit or kind == 'op' and (
+                    text == '"' or text == '/' and buffer.startswith('/*', m.start()))):
+                break
+            pos = m.end()
+            if kind in ('comment', 'string'):
+                words.update(w.lower() for w in WORD_RE.findall(text))
+            elif kind == 'ident':
+                words.add(text.lower())
+                yield text
+            elif kind in ('number', 'op'):
+                yield text
+        buffer = buffer[pos:]
+
+
+def tokenize(verilog_code):
+    # (tokens, character offsets) of a whole source: the tokens the parser numbers, so
+    # tokens[i] is token i of Module.span
+    tokens, offsets = [], []
+    for m in TOKEN_RE.finditer(verilog_code):
+        if m.lastgroup in ('ident', 'number', 'op'):
+            tokens.append(m.group())
+            offsets.append(m.start())
+    return tokens, offsets
+
+
+def parse(verilog_code, key=None):
+    words = set()
+    return _parse(_Cursor(list(_tokens([verilog_code], words))), words, key)
+
+
+def parse_stream(chunks, key=None):
+    # chunks: iterable of str. Only the tokens of the module item being parsed are held, so a
+    # source larger than memory still yields its (much smaller) net graph.
+    words = set()
+    return _parse(_Cursor(_tokens(chunks, words)), words, key)
+
+
+def _parse(c, words, key):
+    modules = {}
+    while c.peek() is not None:
+        c.release()
+        if c.next() in ('module', 'macromodule') and c.peek() is not None:
+            module = _module(c)
+            modules[module.name] = module
+    _resolve_instances(modules)
+    return Netlist(modules, frozenset(words), key)
+
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def parse_netlist(verilog_code, cache_dir=NETLIST_CACHE_DIR):
+    # Parsed once per distinct source: an in-process LRU in front of a pickle cache on disk
+    # (large sources only; small ones parse faster than they load)
+    key = hashlib.sha256(f'{NETLIST_VERSION}\0{verilog_code}'.encode()).hexdigest()
+    with _memory_lock:
+        netlist = _memory.get(key)
+        if netlist is not None:
+            _memory.move_to_end(key)
+            return netlist
+    
+    path = Path(cache_dir) / key[:2] / f'{key}.pkl' if len(verilog_code) >= NETLIST_DISK_MIN_BYTES else None
+    netlist = None
+    if path is not None and path.exists():
+        try:
+            with open(path, 'rb') as f:
+                netlist = pickle.load(f)
+        except Exception:
+            netlist = None
+    if netlist is None:
+        netlist = parse(verilog_code, key)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp, 'wb') as f:
+                pickle.dump(netlist, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+    
+    with _memory_lock:
+        _memory[key] = netlist
+        while len(_memory) > NETLIST_MEMORY_ITEMS:
+            _memory.popitem(last=False)
+    return netlist
@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+import numpy as np
+from config import PROFILE_ENABLED, PROFILE_TRACE_MEMORY, PROFILE_MAX_SPANS, PROFILE_DIR
+
+_DISABLED = nullcontext()
+
+# tracemalloc slows every allocation, so it only runs while some profiled span is open
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def _start_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+class StageProfiler:
+    # Records wall time, CPU time and peak traced memory per pipeline stage. When disabled,
+    # stage() hands back one shared no-op context so instrumented code pays a single call.
+    def __init__(self, enabled=PROFILE_ENABLED, trace_memory=PROFILE_TRACE_MEMORY,
+                 max_spans=PROFILE_MAX_SPANS):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.spans = deque(maxlen=max_spans)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._run_id = 0
+    
+    def stage(self, name):
+        if not self.enabled:
+            return _DISABLED
+        return self._span(name)
+    
+    def run(self, label=None):
+        # Groups the stages of one end-to-end analysis; nested stages stay inside the run
+        if not self.enabled:
+            return _DISABLED
+        with self._lock:
+            self._run_id += 1
+            run_id = self._run_id
+        return self._span('run', run_id=run_id, label=label)
+    
+    @contextmanager
+    def _span(self, name, run_id=None, label=None):
+        stack = self._local.__dict__.setdefault('stack', [])
+        memory = self.trace_memory
+        if memory and not stack:
+            _start_tracing()
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Fold the parent's peak so far in before the child resets the counter
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+        frame = {'peak': 0, 'base': current if memory else 0,
+                 'run': run_id if run_id is not None else (stack[-1]['run'] if stack else None)}
+        stack.append(frame)
+        start_wall, start_cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = time.thread_time() - start_cpu
+            stack.pop()
+            peak_bytes = None
+            if memory:
+                frame['peak'] = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                peak_bytes = frame['peak'] - frame['base']
+                if stack:
+                    stack[-1]['peak'] = max(stack[-1]['peak'], frame['peak'])
+                else:
+                    _stop_tracing()
+            self.spans.append({
+                'name': name,
+                'label': label,
+                'run': frame['run'],
+                'depth': len(stack),
+                'start': start_wall - self._origin,
+                'wall': wall,
+                'cpu': cpu,
+                'peak_bytes': peak_bytes,
+                'thread': threading.get_ident(),
+            })
+    
+    def current_run(self):
+        # Id of the run open in the calling thread, if any
+        stack = self._local.__dict__.get('stack')
+        return stack[0]['run'] if stack else None
+    
+    def run_spans(self, run_id):
+        return sorted((s for s in self.spans if s['run'] == run_id), key=lambda s: s['start'])
+    
+    def stage_times(self, run_id):
+        # Total wall time per stage within one run; empty outside a run or when disabled
+        times = {}
+        if run_id is None:
+            return times
+        for s in self.run_spans(run_id):
+            if s['name'] != 'run':
+                times[s['name']] = times.get(s['name'], 0.0) + s['wall']
+        return times
+    
+    def last_run(self):
+        # Stage spans of the most recently completed run, in start order
+        runs = [s for s in self.spans if s['name'] == 'run' and s['depth'] == 0]
+        return self.run_spans(runs[-1]['run']) if runs else []
+    
+    def summary(self, percentiles=(50, 95, 99)):
+        by_stage = {}
+        for span in self.spans:
+            by_stage.setdefault(span['name'], []).append(span)
+        out = {}
+        for name, spans in by_stage.items():
+            wall = np.array([s['wall'] for s in spans]) * 1000
+            cpu = np.array([s['cpu'] for s in spans]) * 1000
+            stats = {'count': len(spans), 'wall_ms_mean': float(wall.mean()),
+                     'cpu_ms_mean': float(cpu.mean())}
+            for p in percentiles:
+                stats[f'wall_ms_p{p}'] = float(np.percentile(wall, p))
+                stats[f'cpu_ms_p{p}'] = float(np.percentile(cpu, p))
+            peaks = [s['peak_bytes'] for s in spans if s['peak_bytes'] is not None]
+            if peaks:
+                stats['peak_kb_max'] = max(peaks) / 1024
+                stats['peak_kb_p50'] = float(np.percentile(peaks, 50)) / 1024
+            out[name] = stats
+        return out
+    
+    def reset(self):
+        self.spans.clear()
+    
+    def export_json(self, path=PROFILE_DIR / 'profile.json'):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({'summary': self.summary(), 'spans': list(self.spans)}, indent=2))
+        return path
+    
+    def chrome_trace(self):
+        # Trace Event Format: load in chrome://tracing or https://ui.perfetto.dev
+        pid = os.getpid()
+        events = [{
+            'name': s['label'] or s['name'], 'cat': 'pipeline', 'ph': 'X', 'pid': pid, 'tid': s['thread'],
+            'ts': s['start'] * 1e6, 'dur': s['wall'] * 1e6,
+            'args': {'cpu_ms': s['cpu'] * 1000, 'peak_bytes': s['peak_bytes'], 'run': s['run']},
+        } for s in self.spans]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+    
+    def export_chrome_trace(self, path=PROFILE_DIR / 'trace.json'):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace()))
+        return path
+    
+    @staticmethod
+    def format_summary(summary):
+        lines = [f"{'stage':<22}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'cpu p50':>10}{'peak KB':>10}"]
+        for name, s in summary.items():
+            peak = f"{s['peak_kb_max']:.0f}" if 'peak_kb_max' in s else '-'
+            lines.append(f"{name:<22}{s['count']:>6}{s['wall_ms_p50']:>10.2f}{s['wall_ms_p95']:>10.2f}"
+                         f"{s['cpu_ms_p50']:>10.2f}{peak:>10}")
+        return '\n'.join(lines)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from config import RESULT_CACHE_DIR, RESULT_CACHE_MEMORY_ENTRIES, RESULT_CACHE_MAX_BYTES
+
+
+class ResultCache:
+    def __init__(self, cache_dir=RESULT_CACHE_DIR, memory_entries=RESULT_CACHE_MEMORY_ENTRIES,
+                 max_disk_bytes=RESULT_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(verilog_code, testbench_code, model_version, extractor_version, engine='', dictionary=''):
+        # engine: results from different simulation engines must not be mixed; dictionary: the
+        # design's fault-dictionary version, since new signatures change the ranking
+        h = hashlib.sha256()
+        for part in (verilog_code, testbench_code, str(model_version), str(extractor_version), engine,
+                     str(dictionary)):
+            h.update(part.encode())
+            h.update(b'\0')
+        return h.hexdigest()
+    
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._load(self._memory[key])
+        
+        path = self._path(key)
+        try:
+            entry = path.read_text()
+            os.utime(path)  # LRU order on disk follows mtime
+        except OSError:
+            return None
+        with self._lock:
+            self._remember(key, entry)
+        return self._load(entry)
+    
+    def put(self, key, result):
+        entry = json.dumps(result, default=self._encode)
+        with self._lock:
+            self._remember(key, entry)
+            self._disk_usage()
+        
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        old_size = path.stat().st_size if path.exists() else 0
+        tmp = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp.write_text(entry)
+        os.replace(tmp, path)
+        with self._lock:
+            self._disk_bytes += path.stat().st_size - old_size
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+    
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            for path in self.cache_dir.glob('*/*.json'):
+                path.unlink(missing_ok=True)
+            self._disk_bytes = 0
+    
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+    
+    def _disk_usage(self):
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(p.stat().st_size for p in self.cache_dir.glob('*/*.json'))
+        return self._disk_bytes
+    
+    def _evict(self):
+        # Drop least recently used entries until the disk tier is back under 90% of its budget
+        entries = sorted(((p.stat().st_mtime, p.stat().st_size, p) for p in self.cache_dir.glob('*/*.json')),
+                         key=lambda e: e[0])
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in entries:
+            if self._disk_bytes <= target:
+                break
+            path.unlink(missing_ok=True)
+            self._memory.pop(path.stem, None)
+            self._disk_bytes -= size
+    
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f'{key}.json'
+    
+    @staticmethod
+    def _load(entry):
+        result = json.loads(entry)
+        if result.get('waveform'):
+            result['waveform'] = Path(result['waveform'])
+        result['top3'] = [tuple(item) for item in result.get('top3', [])]
+        return result
+    
+    @staticmethod
+    def _encode(value):
+        if isinstance(value, Path):
+            return str(value)
+        if hasattr(value, 'item'):
+            return value.item()
+        raise TypeError(f"Cannot cache value of type {type(value).__name__}")
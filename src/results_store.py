@@ -0,0 +1,217 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+import numpy as np
+from config import (RESULTS_DIR, RESULTS_BATCH_ROWS, RESULTS_FLUSH_SECONDS, RESULTS_TOP_K,
+                    RESULTS_CONFIDENCE_DROP, FEATURE_NAMES)
+
+
+def new_run_id():
+    return time.strftime('%Y%m%d-%H%M%S') + '-' + uuid.uuid4().hex[:6]
+
+
+class ResultsStore:
+    # Append-only columnar store of analysis results, partitioned by run: <directory>/<run>/ holds
+    # immutable parts (.npz, one array per column, rows sorted by circuit) and a manifest line per
+    # part with its circuit range, so circuit lookups skip parts that cannot match and queries
+    # only load the columns they ask for. Rows are buffered and written in batches.
+    def __init__(self, directory=RESULTS_DIR, run_id=None, batch_rows=RESULTS_BATCH_ROWS,
+                 flush_seconds=RESULTS_FLUSH_SECONDS, top_k=RESULTS_TOP_K):
+        self.directory = Path(directory)
+        self.run_id = run_id or new_run_id()
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self.top_k = top_k
+        self._rows = []
+        self._oldest = None
+        self._part = None
+        self._lock = threading.Lock()
+        self._atexit = False
+    
+    def append(self, result, model_version=None, extractor_version=None, engine=None, timings=None):
+        # result: an analysis result dict (circuit, fault_type, confidence, top3, features, ...);
+        # timings: {stage: seconds}
+        row = {
+            'circuit': str(result.get('circuit') or result.get('name') or ''),
+            'module': result.get('module') or '',
+            'time': time.time(),
+            'fault_type': result.get('fault_type') or '',
+            'confidence': float(result.get('confidence') or 0.0),
+            'cached': bool(result.get('cached', False)),
+            'error': result.get('error') or '',
+            'model_version': '' if model_version is None else str(model_version),
+            'extractor_version': '' if extractor_version is None else str(extractor_version),
+            'engine': engine or '',
+        }
+        top = list(result.get('top3') or [])[:self.top_k]
+        for i in range(self.top_k):
+            label, p = top[i] if i < len(top) else ('', np.nan)
+            row[f'top{i + 1}'] = label
+            row[f'top{i + 1}_confidence'] = float(p)
+        features = result.get('features') or {}
+        for name in FEATURE_NAMES:
+            row[name] = float(features.get(name, np.nan))
+        for stage, seconds in (timings or {}).items():
+            row[f'{stage}_ms'] = seconds * 1000
+        
+        with self._lock:
+            self._rows.append(row)
+            if self._oldest is None:
+                self._oldest = row['time']
+            if not self._atexit:
+                atexit.register(self.flush)
+                self._atexit = True
+            due = (len(self._rows) >= self.batch_rows or
+                   row['time'] - self._oldest >= self.flush_seconds)
+        if due:
+            self.flush()
+        return self.run_id
+    
+    def extend(self, results, **kwargs):
+        for result in results:
+            self.append(result, **kwargs)
+        return self.flush()
+    
+    def flush(self):
+        # Writes buffered rows as one part; returns the part number, None if nothing was buffered
+        with self._lock:
+            rows, self._rows, self._oldest = self._rows, [], None
+            if not rows:
+                return None
+            run_dir = self.directory / self.run_id
+            run_dir.mkdir(parents=True, exist_ok=True)
+            if self._part is None:
+                self._part = len(self._manifest(run_dir))
+            self._part += 1
+            part = self._part
+            
+            rows.sort(key=lambda r: r['circuit'])
+            names = list(dict.fromkeys(k for r in rows for k in r))
+            columns = {}
+            for name in names:
+                values = [r.get(name) for r in rows]
+                if all(isinstance(v, str) for v in values):
+                    columns[name] = np.asarray(values, dtype=str)
+                elif all(isinstance(v, bool) for v in values):
+                    columns[name] = np.asarray(values, dtype=bool)
+                else:
+                    columns[name] = np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+            path = run_dir / f'part-{part:06d}.npz'
+            tmp = run_dir / f'.part-{part:06d}.{os.getpid()}.npz'
+            np.savez(tmp, **columns)
+            os.replace(tmp, path)
+            with open(run_dir / 'manifest.jsonl', 'a') as f:
+                f.write(json.dumps({'part': part, 'rows': len(rows), 'first': rows[0]['circuit'],
+                                    'last': rows[-1]['circuit'], 'columns': names,
+                                    'created': time.time()}) + '\n')
+            return part
+    
+    close = flush
+    
+    @staticmethod
+    def _manifest(run_dir):
+        path = Path(run_dir) / 'manifest.jsonl'
+        if not path.exists():
+            return []
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    
+    def runs(self):
+        # One entry per run, oldest first (run ids sort by creation time)
+        out = []
+        if not self.directory.exists():
+            return out
+        for run_dir in sorted(p for p in self.directory.iterdir() if p.is_dir()):
+            parts = self._manifest(run_dir)
+            if parts:
+                out.append({'run': run_dir.name, 'parts': len(parts), 'rows': sum(p['rows'] for p in parts),
+                            'created': parts[0]['created']})
+        return out
+    
+    def scan(self, columns=None, runs=None, circuits=None, since=None):
+        # Yields one DataFrame per matching part with only `columns` loaded (plus run and
+        # circuit); runs: ids or None for all, circuits: names or None, since: run id lower bound
+        import pandas as pd
+        wanted = None if circuits is None else np.asarray(sorted(set(circuits)), dtype=str)
+        for run in (runs if runs is not None else [r['run'] for r in self.runs()]):
+            if since is not None and run < since:
+                continue
+            run_dir = self.directory / run
+            for entry in self._manifest(run_dir):
+                if wanted is not None:
+                    # Zone map: parts are sorted, so [first, last] bounds their circuits
+                    i = np.searchsorted(wanted, entry['first'])
+                    if i == len(wanted) or wanted[i] > entry['last']:
+                        continue
+                with np.load(run_dir / f"part-{entry['part']:06d}.npz") as part:
+                    circuit = part['circuit']
+                    rows = slice(None)
+                    if wanted is not None:
+                        rows = np.flatnonzero(np.isin(circuit, wanted))
+                        if not len(rows):
+                            continue
+                    names = entry['columns'] if columns is None else columns
+                    frame = {'run': run, 'circuit': circuit[rows]}
+                    n = len(frame['circuit'])
+                    for name in names:
+                        if name in ('run', 'circuit'):
+                            continue
+                        frame[name] = part[name][rows] if name in part.files else np.full(n, np.nan)
+                    yield pd.DataFrame(frame)
+    
+    def query(self, columns=None, runs=None, circuits=None, since=None):
+        import pandas as pd
+        frames = list(self.scan(columns, runs, circuits, since))
+        if not frames:
+            return pd.DataFrame(columns=['run', 'circuit'] + list(columns or []))
+        return pd.concat(frames, ignore_index=True)
+    
+    def history(self, circuit, columns=('fault_type', 'confidence', 'model_version'), since=None):
+        # One circuit across runs, oldest first
+        frame = self.query(list(columns) + ['time'], circuits=[circuit], since=since)
+        return frame.sort_values('time', kind='stable').reset_index(drop=True)
+    
+    def trend(self, column='confidence', circuits=None, since=None):
+        # Per-run aggregate of a numeric column, accumulated part by part
+        import pandas as pd
+        stats = {}
+        for frame in self.scan([column], circuits=circuits, since=since):
+            values = frame[column].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            s = stats.setdefault(frame['run'].iat[0], [0, 0.0, np.inf, -np.inf])
+            if len(values):
+                s[0] += len(values)
+                s[1] += values.sum()
+                s[2] = min(s[2], values.min())
+                s[3] = max(s[3], values.max())
+        return pd.DataFrame([{'run': run, 'count': n, 'mean': total / n if n else np.nan,
+                              'min': lo if n else np.nan, 'max': hi if n else np.nan}
+                             for run, (n, total, lo, hi) in stats.items()])
+    
+    def latest(self, run, columns=('fault_type', 'confidence')):
+        # Last row per circuit in one run
+        frame = self.query(list(columns) + ['time'], runs=[run])
+        return frame.sort_values('time', kind='stable').drop_duplicates('circuit', keep='last').set_index('circuit')
+    
+    def regressions(self, run, baseline=None, confidence_drop=RESULTS_CONFIDENCE_DROP):
+        # Circuits whose diagnosis changed against `baseline` (default: the run before `run`),
+        # or whose confidence fell by more than `confidence_drop` points
+        import pandas as pd
+        if baseline is None:
+            earlier = [r['run'] for r in self.runs() if r['run'] < run]
+            if not earlier:
+                return pd.DataFrame(columns=['circuit', 'fault_type_base', 'fault_type', 'confidence_base',
+                                             'confidence', 'change'])
+            baseline = earlier[-1]
+        base = self.latest(baseline)
+        current = self.latest(run)
+        merged = base.join(current, how='inner', lsuffix='_base')
+        changed = merged['fault_type'] != merged['fault_type_base']
+        dropped = merged['confidence_base'] - merged['confidence'] > confidence_drop
+        out = merged[changed | dropped].reset_index()
+        out['change'] = np.where(changed[changed | dropped], 'fault_type', 'confidence')
+        return out[['circuit', 'fault_type_base', 'fault_type', 'confidence_base', 'confidence', 'change']]
@@ -0,0 +1,201 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from config import (SERVE_HOST, SERVE_PORT, SERVE_MAX_BATCH, SERVE_MAX_WAIT_MS,
+                    SERVE_MAX_BODY_BYTES)
+from .analyzer import module_name_of
+from .feature_extractor import FeatureExtractor
+from .simulator import VerilogSimulator
+
+
+class MicroBatcher:
+    # Coalesces concurrent score requests: one thread takes the first pending request, keeps
+    # collecting until max_batch rows or max_wait seconds, then makes a single model call
+    def __init__(self, score_fn, max_batch=SERVE_MAX_BATCH, max_wait=SERVE_MAX_WAIT_MS / 1000):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name='micro-batcher', daemon=True)
+        self._thread.start()
+    
+    def submit(self, rows, top_k=3):
+        # rows: (n, n_features) array; resolves to one result dict per row
+        future = Future()
+        self._queue.put((rows, top_k, future))
+        return future
+    
+    def score(self, rows, top_k=3):
+        return self.submit(rows, top_k).result()
+    
+    def pending(self):
+        return self._queue.qsize()
+    
+    def _loop(self):
+        while True:
+            requests = [self._queue.get()]
+            n_rows = len(requests[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while n_rows < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                requests.append(request)
+                n_rows += len(request[0])
+            self._run(requests)
+    
+    def _run(self, requests):
+        rows = np.concatenate([r[0] for r in requests])
+        top_k = max(r[1] for r in requests)
+        try:
+            result = self.score_fn(rows, top_k) if len(rows) else None
+        except Exception as e:
+            for _, _, future in requests:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(rows)
+        start = 0
+        for request_rows, k, future in requests:
+            end = start + len(request_rows)
+            future.set_result(_format(result, start, end, k))
+            start = end
+
+
+def _format(result, start, end, top_k):
+    return [{
+        'fault_type': result['fault_type'][i],
+        'confidence': round(float(result['confidence'][i]), 4),
+        'top_k': [[name, round(float(p), 4)] for name, p in
+                  zip(result['top_k'][i][:top_k], result['top_k_confidence'][i][:top_k])],
+        'trees_used': int(result['trees_used'][i]),
+    } for i in range(start, end)]
+
+
+class ScoringService:
+    # Local HTTP/JSON front end for one loaded VLSIFaultDetector.
+    #   GET  /health  model name/version and batching counters
+    #   POST /score   {"features": {...} | [{...}, ...]} or {"design": ..., "testbench": ...}
+    #                 or {"circuits": [{"design": ..., "testbench": ...}, ...]}; optional "top_k"
+    def __init__(self, fault_detector, host=SERVE_HOST, port=SERVE_PORT, max_batch=SERVE_MAX_BATCH,
+                 max_wait=SERVE_MAX_WAIT_MS / 1000, simulator=None):
+        self.detector = fault_detector
+        self.simulator = simulator or VerilogSimulator()
+        self.batcher = MicroBatcher(self._score, max_batch, max_wait)
+        self.server = _Server((host, port), _handler(self))
+    
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+    
+    def serve_forever(self):
+        self.server.serve_forever()
+    
+    def start(self):
+        # Serve from a background thread (tests, notebooks); returns the base URL
+        threading.Thread(target=self.serve_forever, name='scoring-service', daemon=True).start()
+        return self.address
+    
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def health(self):
+        return {
+            'status': 'ok' if self.detector.trained else 'untrained',
+            'model': self.detector.best_model_name,
+            'model_version': self.detector.model_version,
+            'pending': self.batcher.pending(),
+            'batches': self.batcher.batches,
+            'rows': self.batcher.rows,
+        }
+    
+    def handle(self, payload):
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object")
+        top_k = int(payload.get('top_k', 3))
+        if 'features' in payload:
+            rows = payload['features']
+            rows = [rows] if isinstance(rows, dict) else rows
+        elif 'circuits' in payload or 'design' in payload:
+            circuits = payload.get('circuits') or [payload]
+            rows = [self._features(c['design'], c['testbench']) for c in circuits]
+        else:
+            raise ValueError("Expected 'features', 'design'/'testbench' or 'circuits'")
+        missing = {name for row in rows for name in self.detector.feature_names if name not in row}
+        if missing:
+            raise ValueError(f"Missing features: {', '.join(sorted(missing))}")
+        # Validated per request, so one malformed request cannot fail the batch it lands in
+        X = np.array([[row[name] for name in self.detector.feature_names] for row in rows], dtype=float)
+        X = X.reshape(-1, len(self.detector.feature_names))
+        return {'results': self.batcher.score(X, top_k), 'model_version': self.detector.model_version}
+    
+    def _features(self, verilog_code, testbench_code):
+        # Simulation and extraction run on the request's own thread; only inference is batched
+        sim_result = self.simulator.simulate(verilog_code, testbench_code, module_name_of(verilog_code))
+        return FeatureExtractor.extract_features(verilog_code, testbench_code,
+                                                 sim_result.get('expected', ''),
+                                                 sim_result.get('actual', ''))
+    
+    def _score(self, X, top_k):
+        return self.detector.detect_faults_batch(X, top_k=top_k)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Bursts of concurrent clients are the point of micro-batching; the default backlog is 5
+    request_queue_size = 128
+
+
+def _handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def do_GET(self):
+            if self.path != '/health':
+                return self._send(404, {'error': f"Unknown path {self.path}"})
+            self._send(200, service.health())
+        
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > SERVE_MAX_BODY_BYTES:
+                self.close_connection = True
+                return self._send(413, {'error': f"Body larger than {SERVE_MAX_BODY_BYTES} bytes"})
+            body = self.rfile.read(length)
+            if self.path != '/score':
+                return self._send(404, {'error': f"Unknown path {self.path}"})
+            if not service.detector.trained:
+                return self._send(503, {'error': "Model not trained"})
+            try:
+                payload = json.loads(body)
+                self._send(200, service.handle(payload))
+            except KeyError as e:
+                self._send(400, {'error': f"Missing field {e}"})
+            except (ValueError, TypeError) as e:
+                self._send(400, {'error': str(e)})
+            except Exception as e:
+                self._send(500, {'error': str(e)})
+        
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return Handler
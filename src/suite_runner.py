@@ -0,0 +1,197 @@
+import csv
+import io
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from config import SUITE_CHUNK_SIZE, BULK_MAX_UPLOAD_BYTES
+from .analyzer import extract_circuit, render_waveform
+from .feature_extractor import FeatureExtractor
+from .simulator import VerilogSimulator
+from .netlist import parse_netlist
+from .results_store import ResultsStore
+
+TESTBENCH_PATTERNS = ('tb_{}', '{}_tb', '{}_test', 'test_{}')
+VERILOG_SUFFIXES = ('.v', '.sv')
+
+
+def discover_jobs(source, root=None):
+    # root: manifest entries must resolve inside this directory (uploads); ValueError otherwise,
+    # and for manifests that are not a list of entries with design and testbench paths
+    source = Path(source)
+    if source.is_dir():
+        return _jobs_from_directory(source)
+    if source.suffix == '.json':
+        with open(source) as f:
+            entries = json.load(f)
+    else:
+        with open(source, newline='') as f:
+            try:
+                entries = list(csv.DictReader(f))
+            except csv.Error as e:
+                raise ValueError(f"{source.name}: {e}")
+    if not isinstance(entries, list):
+        raise ValueError(f"{source.name}: expected a list of entries")
+    
+    jobs = []
+    for i, entry in enumerate(entries, 1):
+        if not (isinstance(entry, dict) and isinstance(entry.get('design'), str) and
+                isinstance(entry.get('testbench'), str)):
+            raise ValueError(f"{source.name}: entry {i} needs 'design' and 'testbench' paths")
+        design = _manifest_path(source, entry['design'], root)
+        testbench = _manifest_path(source, entry['testbench'], root)
+        jobs.append({'name': str(entry.get('name') or design.stem),
+                     'design': str(design), 'testbench': str(testbench)})
+    return jobs
+
+
+def _manifest_path(manifest, entry, root):
+    path = manifest.parent / entry
+    if root is not None:
+        path = path.resolve()
+        if not path.is_relative_to(Path(root).resolve()):
+            raise ValueError(f"{manifest.name}: {entry} is outside the upload")
+    return path
+
+
+def extract_upload(files, directory, max_bytes=BULK_MAX_UPLOAD_BYTES):
+    # files: (filename, bytes) pairs from a web upload; .zip archives are unpacked. Everything is
+    # flattened into `directory` by base name, so archive paths cannot escape it, and manifest
+    # entries must resolve inside it.
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for name, data in files:
+        if name.lower().endswith('.zip'):
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(data))
+            except zipfile.BadZipFile as e:
+                raise ValueError(f"{name}: {e}")
+            with archive:
+                members = [m for m in archive.infolist() if not m.is_dir() and _wanted(m.filename)]
+                total += sum(m.file_size for m in members)
+                if total > max_bytes:
+                    raise ValueError(f"Upload expands to more than {max_bytes} bytes")
+                for member in members:
+                    (directory / Path(member.filename).name).write_bytes(archive.read(member))
+        elif _wanted(name):
+            total += len(data)
+            if total > max_bytes:
+                raise ValueError(f"Upload is larger than {max_bytes} bytes")
+            (directory / Path(name).name).write_bytes(data)
+    
+    manifests = sorted(p for p in directory.iterdir() if p.suffix in ('.json', '.csv'))
+    return discover_jobs(manifests[0] if manifests else directory, root=directory)
+
+
+def _wanted(name):
+    path = Path(name)
+    return (path.suffix in VERILOG_SUFFIXES + ('.json', '.csv')
+            and not any(part.startswith(('.', '__MACOSX')) for part in path.parts))
+
+
+def _jobs_from_directory(directory):
+    files = {p.stem: p for p in sorted(directory.iterdir()) if p.suffix in VERILOG_SUFFIXES}
+    testbenches = set()
+    jobs = []
+    for stem, path in files.items():
+        for pattern in TESTBENCH_PATTERNS:
+            tb = files.get(pattern.format(stem))
+            if tb is not None:
+                jobs.append({'name': stem, 'design': str(path), 'testbench': str(tb)})
+                testbenches.add(tb.stem)
+                break
+    return [job for job in jobs if job['name'] not in testbenches]
+
+
+def _prepare_circuit(job):
+    # Runs in a worker process: the analyzer's stages up to (not including) inference
+    try:
+        verilog_code = Path(job['design']).read_text()
+        testbench_code = Path(job['testbench']).read_text()
+        netlist = parse_netlist(verilog_code)
+        module_name = netlist.top.name if netlist.top else 'test_module'
+        sim_result, _, features = extract_circuit(VerilogSimulator(), verilog_code, testbench_code,
+                                                  module_name, netlist)
+        vcd = sim_result.get('vcd')
+        return {**job, 'module': module_name, 'features': features, 'vcd': vcd and str(vcd), 'error': None}
+    except Exception as e:
+        return {**job, 'module': None, 'features': None, 'vcd': None, 'error': str(e)}
+
+
+def _render_waveform(job):
+    try:
+        verilog_code = Path(job['design']).read_text()
+        testbench_code = Path(job['testbench']).read_text()
+        return render_waveform(verilog_code, testbench_code, job['name'], job.get('vcd'))
+    except Exception:
+        return None
+
+
+class RegressionSuiteRunner:
+    def __init__(self, fault_detector, max_workers=None, chunk_size=SUITE_CHUNK_SIZE,
+                 render_waveforms=False, results=None):
+        self.detector = fault_detector
+        self.max_workers = max_workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.render_waveforms = render_waveforms
+        # One results-store run per runner; pass results=False to skip recording
+        self.results = results if results is not None else ResultsStore()
+        self.engine = VerilogSimulator().engine
+    
+    def run(self, source, progress=None):
+        # progress(done, total) is called after every scored chunk
+        jobs = discover_jobs(source) if isinstance(source, (str, Path)) else list(source)
+        if not jobs:
+            return []
+        
+        results = []
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            prepared = pool.map(_prepare_circuit, jobs, chunksize=self._map_chunksize(len(jobs)))
+            chunk = []
+            for item in prepared:
+                chunk.append(item)
+                if len(chunk) == self.chunk_size:
+                    results.extend(self._score(chunk))
+                    chunk = []
+                    if progress:
+                        progress(len(results), len(jobs))
+            if chunk:
+                results.extend(self._score(chunk))
+                if progress:
+                    progress(len(results), len(jobs))
+            
+            if self.render_waveforms:
+                paths = pool.map(_render_waveform, results, chunksize=self._map_chunksize(len(results)))
+                for result, path in zip(results, paths):
+                    result['waveform'] = path
+        if self.results:
+            self.results.flush()
+        return results
+    
+    def _score(self, chunk):
+        ok = [item for item in chunk if item['error'] is None]
+        batch = self.detector.detect_faults_batch([item['features'] for item in ok]) if ok else None
+        
+        results = []
+        i = -1
+        for item in chunk:
+            result = {**item, 'fault_type': None, 'confidence': 0.0, 'top3': [], 'waveform': None}
+            if item['error'] is None:
+                i += 1
+                if batch is None:
+                    result['error'] = "Model not trained!"
+                else:
+                    result['fault_type'] = batch['fault_type'][i]
+                    result['confidence'] = float(batch['confidence'][i])
+                    result['top3'] = [(name, float(p)) for name, p in
+                                      zip(batch['top_k'][i], batch['top_k_confidence'][i])]
+            if self.results:
+                result['run'] = self.results.append(result, self.detector.model_version,
+                                                    FeatureExtractor.VERSION, self.engine)
+            results.append(result)
+        return results
+    
+    def _map_chunksize(self, n_jobs):
+        return max(1, n_jobs // (self.max_workers * 4))
@@ -0,0 +1,66 @@
+import json
+import os
+import time
+from pathlib import Path
+import numpy as np
+from config import TRAINING_STORE_DIR, FEATURE_NAMES
+
+
+class TrainingStore:
+    # Append-only columnar store: each append writes one immutable segment (.npz, one array per
+    # column) and one manifest line. Readers can ask for only the segments after a given id.
+    def __init__(self, directory=TRAINING_STORE_DIR, feature_names=FEATURE_NAMES):
+        self.directory = Path(directory)
+        self.feature_names = list(feature_names)
+        self.manifest = self.directory / 'manifest.jsonl'
+    
+    def append(self, features, labels, source='analysis'):
+        if isinstance(features, np.ndarray):
+            X = features.astype(np.float64, copy=False).reshape(-1, len(self.feature_names))
+        else:
+            X = np.array([[f[name] for name in self.feature_names] for f in features], dtype=np.float64)
+        labels = np.asarray(labels, dtype=str)
+        if len(X) != len(labels):
+            raise ValueError(f"{len(X)} feature rows but {len(labels)} labels")
+        if len(X) == 0:
+            return None
+        
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segment = self.last_segment() + 1
+        path = self.directory / f'segment-{segment:06d}.npz'
+        tmp = self.directory / f'.segment-{segment:06d}.{os.getpid()}.npz'
+        np.savez(tmp, fault_type=labels, **{name: X[:, i] for i, name in enumerate(self.feature_names)})
+        os.replace(tmp, path)
+        with open(self.manifest, 'a') as f:
+            f.write(json.dumps({'segment': segment, 'rows': len(X), 'source': source,
+                                'created': time.time()}) + '\n')
+        return segment
+    
+    def segments(self):
+        if not self.manifest.exists():
+            return []
+        with open(self.manifest) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    
+    def last_segment(self):
+        entries = self.segments()
+        return entries[-1]['segment'] if entries else 0
+    
+    def iter_segments(self, after=0, columns=None):
+        columns = columns or self.feature_names
+        for entry in self.segments():
+            if entry['segment'] <= after:
+                continue
+            with np.load(self.directory / f"segment-{entry['segment']:06d}.npz") as seg:
+                yield entry['segment'], np.column_stack([seg[c] for c in columns]), seg['fault_type']
+    
+    def read(self, after=0, columns=None):
+        parts = list(self.iter_segments(after, columns))
+        if not parts:
+            return np.empty((0, len(columns or self.feature_names))), np.empty(0, dtype=str), after
+        X = np.concatenate([p[1] for p in parts])
+        y = np.concatenate([p[2] for p in parts])
+        return X, y, parts[-1][0]
+    
+    def __len__(self):
+        return sum(entry['rows'] for entry in self.segments())
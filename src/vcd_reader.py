@@ -0,0 +1,188 @@
+from array import array
+import numpy as np
+
+# Values are 0/1 for scalars and the integer value for vectors. x and z decode to UNKNOWN whatever
+# the width (a vector with any x/z bit is UNKNOWN), as does value_at() before a signal's first change.
+UNKNOWN = -1
+SCALAR_CODES = {'0': 0, '1': 1, 'x': UNKNOWN, 'X': UNKNOWN, 'z': UNKNOWN, 'Z': UNKNOWN}
+TIME_UNITS = {'s': 1.0, 'ms': 1e-3, 'us': 1e-6, 'ns': 1e-9, 'ps': 1e-12, 'fs': 1e-15}
+
+
+class SignalTrace:
+    # code: the VCD identifier; hierarchical aliases of one net (tb.a, tb.uut.a) share it
+    __slots__ = ('name', 'width', 'times', 'values', 'code')
+    
+    def __init__(self, name, width, times, values, code=None):
+        self.name = name
+        self.width = width
+        self.times = times
+        self.values = values
+        self.code = name if code is None else code
+    
+    def __len__(self):
+        return len(self.times)
+    
+    def value_at(self, t):
+        idx = np.searchsorted(self.times, t, side='right') - 1
+        return np.where(idx >= 0, self.values[np.maximum(idx, 0)], UNKNOWN)
+    
+    def __repr__(self):
+        return f"SignalTrace({self.name!r}, width={self.width}, changes={len(self)})"
+
+
+class VCDData:
+    def __init__(self, signals, timescale_s, end_time):
+        self.signals = signals
+        self.timescale_s = timescale_s
+        self.end_time = end_time
+    
+    def __getitem__(self, name):
+        return self.signals[name]
+    
+    def __contains__(self, name):
+        return name in self.signals
+    
+    def names(self):
+        return list(self.signals)
+    
+    def transitions(self):
+        return {name: (trace.times, trace.values) for name, trace in self.signals.items()}
+    
+    def sample(self, times, names=None):
+        times = np.asarray(times)
+        return {name: self.signals[name].value_at(times) for name in (names or self.signals)}
+
+
+def read_vcd(path, signals=None, t_start=None, t_end=None):
+    with open(path) as f:
+        return parse_vcd(f, signals, t_start, t_end)
+
+
+def parse_vcd(lines, signals=None, t_start=None, t_end=None):
+    lines = iter(lines)
+    ids, timescale_s = _parse_header(lines)
+    
+    if signals is not None:
+        wanted = set(signals)
+        ids = {code: [(n, w) for n, w in decls if n in wanted or n.rsplit('.', 1)[-1] in wanted]
+               for code, decls in ids.items()}
+        ids = {code: decls for code, decls in ids.items() if decls}
+    
+    t_lo = -np.inf if t_start is None else t_start
+    t_hi = np.inf if t_end is None else t_end
+    widths = {code: decls[0][1] for code, decls in ids.items()}
+    times = {code: array('q') for code in ids}
+    values = {code: (array('b') if w == 1 else array('q')) for code, w in widths.items()}
+    # Last value seen before the window opens, replayed at t_start unless a change at t_start
+    # replaces it
+    pending = {}
+    replayed = set()
+    now = 0
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        head = line[0]
+        if head == '#':
+            now = int(line[1:])
+            if now > t_hi:
+                break
+            if pending and now >= t_lo:
+                replayed = set(pending)
+                _flush_pending(pending, times, values, t_lo)
+            continue
+        if head in SCALAR_CODES:
+            code, value = line[1:], SCALAR_CODES[head]
+        elif head in 'bB':
+            raw, _, code = line[1:].partition(' ')
+            value = _vector_value(raw)
+        elif head in 'rR':
+            raw, _, code = line[1:].partition(' ')
+            value = int(float(raw))
+        else:
+            continue  # $dumpvars / $end / $comment ...
+        
+        code = code.strip()
+        if code not in times:
+            continue
+        if now < t_lo:
+            pending[code] = value
+        elif now == t_lo and code in replayed:
+            values[code][-1] = value
+            replayed.discard(code)
+        else:
+            times[code].append(now)
+            values[code].append(value)
+    if pending:
+        _flush_pending(pending, times, values, t_lo)
+    
+    end_time = now if t_end is None else min(now, t_end)
+    result = {}
+    for code, decls in ids.items():
+        t = np.frombuffer(times[code], dtype=np.int64) if times[code] else np.empty(0, np.int64)
+        dtype = np.int8 if widths[code] == 1 else np.int64
+        v = np.frombuffer(values[code], dtype=dtype) if values[code] else np.empty(0, dtype)
+        for name, width in decls:
+            result[name] = SignalTrace(name, width, t, v, code)
+    return VCDData(result, timescale_s, end_time)
+
+
+def _flush_pending(pending, times, values, t_lo):
+    for code, value in pending.items():
+        times[code].append(int(t_lo))
+        values[code].append(value)
+    pending.clear()
+
+
+def _vector_value(raw):
+    try:
+        return int(raw, 2)
+    except ValueError:
+        return UNKNOWN
+
+
+def _parse_header(lines):
+    ids = {}
+    scope = []
+    timescale_s = 1e-9
+    tokens = _tokens(lines)
+    for tok in tokens:
+        if tok == '$enddefinitions':
+            _skip_to_end(tokens)
+            break
+        if tok == '$scope':
+            body = _skip_to_end(tokens)
+            scope.append(body[1] if len(body) > 1 else body[0])
+        elif tok == '$upscope':
+            _skip_to_end(tokens)
+            scope.pop()
+        elif tok == '$var':
+            body = _skip_to_end(tokens)
+            width, code, ref = int(body[1]), body[2], body[3]
+            ids.setdefault(code, []).append(('.'.join(scope + [ref]), width))
+        elif tok == '$timescale':
+            timescale_s = _timescale(''.join(_skip_to_end(tokens)))
+        elif tok.startswith('$'):
+            _skip_to_end(tokens)
+    return ids, timescale_s
+
+
+def _tokens(lines):
+    for line in lines:
+        yield from line.split()
+
+
+def _skip_to_end(tokens):
+    body = []
+    for tok in tokens:
+        if tok == '$end':
+            break
+        body.append(tok)
+    return body
+
+
+def _timescale(text):
+    digits = ''.join(ch for ch in text if ch.isdigit())
+    unit = text[len(digits):].strip()
+    return int(digits or 1) * TIME_UNITS.get(unit, 1e-9)
@@ -1,33 +1,51 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import re
-import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from config import VISUALIZATIONS_DIR
+from config import VISUALIZATIONS_DIR, WAVEFORM_DPI, WAVEFORM_PREVIEW_DPI
+from .vcd_reader import UNKNOWN, VCDData, read_vcd
+from .netlist import parse_netlist
 
 class WaveformGenerator:
     @staticmethod
-    def generate(verilog_code, testbench_code, circuit_name):
+    def generate(verilog_code, testbench_code, circuit_name, dpi=WAVEFORM_DPI, preview=False):
         signals = WaveformGenerator._extract_signals(testbench_code)
         waveform_data = WaveformGenerator._generate_data(signals, verilog_code)
-        return WaveformGenerator._plot(waveform_data, circuit_name)
+        return WaveformGenerator._plot(waveform_data, circuit_name, dpi, preview)
+    
+    @staticmethod
+    def generate_from_vcd(vcd, circuit_name, signals=None, t_start=None, t_end=None,
+                          dpi=WAVEFORM_DPI, preview=False):
+        if not isinstance(vcd, VCDData):
+            vcd = read_vcd(vcd, signals, t_start, t_end)
+        return WaveformGenerator._plot(WaveformGenerator._vcd_data(vcd), circuit_name, dpi, preview)
+    
+    @staticmethod
+    def _vcd_data(vcd):
+        # Single-bit traces sampled on the union of their change times; x/z drawn mid-rail
+        traces = [tr for tr in vcd.signals.values() if tr.width == 1 and len(tr)]
+        time = np.unique(np.concatenate([tr.times for tr in traces] + [[vcd.end_time]]))
+        short = [tr.name.rsplit('.', 1)[-1] for tr in traces]
+        data = {'time': time}
+        for tr, label in zip(traces, short):
+            wave = tr.value_at(time).astype(float)
+            wave[wave == UNKNOWN] = 0.5
+            data[label if short.count(label) == 1 else tr.name] = wave
+        return data
     
     @staticmethod
     def _extract_signals(testbench):
-        signals = []
-        signals.extend(re.findall(r'reg\s+(\w+)', testbench))
-        signals.extend(re.findall(r'wire\s+(\w+)', testbench))
-        return list(set(signals))
+        netlist = parse_netlist(testbench)
+        signals = (name for m in netlist.modules.values() for name, net in m.nets.items()
+                   if net.kind in ('reg', 'wire'))
+        return list(dict.fromkeys(signals))
     
     @staticmethod
     def _generate_data(signals, verilog_code):
         time = np.arange(0, 100, 1)
         data = {'time': time}
         
-        has_stuck_0 = '1\'b0' in verilog_code
-        has_stuck_1 = '1\'b1' in verilog_code
-        has_timing = '#25' in verilog_code or '#15' in verilog_code
+        netlist = parse_netlist(verilog_code)
+        has_stuck_0 = "1'b0" in netlist.constants()
+        has_stuck_1 = "1'b1" in netlist.constants()
+        has_timing = bool(netlist.delays() & {25, 15})
         
         for sig in signals:
             if 'clk' in sig.lower():
@@ -56,11 +74,20 @@ class WaveformGenerator:
         return data
     
     @staticmethod
-    def _plot(data, circuit_name):
+    def _plot(data, circuit_name, dpi=WAVEFORM_DPI, preview=False):
+        # Object-oriented API on the Agg canvas: no pyplot state, so renders can run in threads
+        from matplotlib.figure import Figure
+        
+        if preview:
+            dpi = min(dpi, WAVEFORM_PREVIEW_DPI)
         signals = [k for k in data.keys() if k != 'time']
-        time = data['time']
+        time = np.asarray(data['time'])
+        width_in = 14
+        # One min/max pair per pixel column is all the detail the image can show
+        max_points = 2 * width_in * dpi
         
-        fig, axes = plt.subplots(len(signals), 1, figsize=(14, len(signals)*1.5))
+        fig = Figure(figsize=(width_in, len(signals)*1.5))
+        axes = fig.subplots(len(signals), 1)
         if len(signals) == 1:
             axes = [axes]
         
@@ -68,12 +95,13 @@ class WaveformGenerator:
         
         for idx, sig in enumerate(signals):
             ax = axes[idx]
-            wave = data[sig]
+            wave = np.asarray(data[sig])
             
-            for i in range(len(time)-1):
-                ax.plot([time[i], time[i+1]], [wave[i], wave[i]], 'b-', linewidth=2)
-                if wave[i] != wave[i+1]:
-                    ax.plot([time[i+1], time[i+1]], [wave[i], wave[i+1]], 'b-', linewidth=2)
+            if len(time) > max_points:
+                x, y = WaveformGenerator._decimate(time, wave, max_points // 2)
+                ax.plot(x, y, 'b-', linewidth=2)
+            else:
+                ax.plot(time, wave, 'b-', linewidth=2, drawstyle='steps-post')
             
             ax.set_ylabel(sig, fontsize=11, fontweight='bold', rotation=0, ha='right')
             ax.set_ylim(-0.3, 1.3)
@@ -85,9 +113,27 @@ class WaveformGenerator:
             else:
                 ax.set_xlabel('Time (ns)', fontsize=12)
         
-        plt.tight_layout()
+        fig.tight_layout()
         VISUALIZATIONS_DIR.mkdir(exist_ok=True, parents=True)
-        path = VISUALIZATIONS_DIR / f'{circuit_name}_waveform.png'
-        plt.savefig(path, dpi=300, bbox_inches='tight')
-        plt.close()
+        suffix = '_preview' if preview else ''
+        path = VISUALIZATIONS_DIR / f'{circuit_name}_waveform{suffix}.png'
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
         return path
+    
+    @staticmethod
+    def _decimate(time, wave, n_cols):
+        # Min/max of each pixel column, including the value carried in from the previous column
+        edges = np.linspace(time[0], time[-1], n_cols + 1)
+        carried = wave[np.maximum(np.searchsorted(time, edges[:-1], side='right') - 1, 0)]
+        starts = np.searchsorted(time, edges[:-1], side='left')
+        ends = np.searchsorted(time, edges[1:], side='left')
+        ends[-1] = len(time)
+        
+        lo, hi = carried.astype(float), carried.astype(float)
+        filled = ends > starts
+        if filled.any():
+            lo[filled] = np.minimum(lo[filled], np.minimum.reduceat(wave, starts[filled]))
+            hi[filled] = np.maximum(hi[filled], np.maximum.reduceat(wave, starts[filled]))
+        x = np.append(np.repeat(edges[:-1], 2), time[-1])
+        y = np.append(np.column_stack([lo, hi]).ravel(), wave[-1])
+        return x, y
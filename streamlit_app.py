@@ -1,12 +1,20 @@
 import streamlit as st
+import io
+import json
+import shutil
 import sys
+import tempfile
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.feature_extractor import FeatureExtractor
+from config import JOB_POLL_SECONDS, BULK_PAGE_SIZES, CACHE_DIR
 from src.fault_detector import VLSIFaultDetector
-from src.waveform_generator import WaveformGenerator
 from src.simulator import VerilogSimulator
+from src.result_cache import ResultCache
+from src.profiler import StageProfiler
+from src.job_queue import AnalysisJobs, JobQueueFull, FAILED
+from src.fault_dictionary import FaultDictionary
+from src.suite_runner import extract_upload
 from PIL import Image
 
 st.set_page_config(page_title="VLSI Fault Detection", page_icon="🔬", layout="wide")
@@ -20,8 +28,28 @@ def load_model():
         detector.train()
     return detector
 
+@st.cache_resource
+def load_cache():
+    return ResultCache()
+
+@st.cache_resource
+def load_profiler():
+    return StageProfiler(enabled=False)
+
+@st.cache_resource
+def load_dictionary():
+    return FaultDictionary()
+
 detector = load_model()
-simulator = VerilogSimulator()
+cache = load_cache()
+profiler = load_profiler()
+
+@st.cache_resource
+def load_jobs():
+    # Shared by all sessions, so the concurrency cap applies per server
+    return AnalysisJobs(detector, cache, VerilogSimulator(), profiler, dictionary=load_dictionary())
+
+jobs = load_jobs()
 
 # Header
 st.title("🔬 AI-Powered VLSI Fault Detection")
@@ -30,6 +58,7 @@ st.markdown("---")
 # Sidebar
 with st.sidebar:
     st.header("⚙️ Options")
+    mode = st.radio("Mode", ["Single circuit", "Bulk upload"], horizontal=True)
     template = st.selectbox("Load Template", 
         ["Custom", "AND Gate", "D Flip-Flop", "Faulty AND (SA0)", "Timing Fault"])
     
@@ -39,6 +68,110 @@ with st.sidebar:
     elif template == "Faulty AND (SA0)":
         st.session_state['v_code'] = "module and_gate(input a, b, output y);\n  assign y = 1'b0; // FAULT\nendmodule"
         st.session_state['tb_code'] = "module tb;\n  reg a, b; wire y;\n  and_gate uut(.a(a), .b(b), .y(y));\n  initial begin\n    a=0;b=0;#10;\n    a=1;b=1;#10;\n    $finish;\n  end\nendmodule"
+    
+    profiler.enabled = st.checkbox("Profile pipeline stages", value=profiler.enabled)
+
+def results_frame(results):
+    import pandas as pd
+    return pd.DataFrame([{
+        'name': r['name'],
+        'module': r['module'],
+        'fault_type': r['fault_type'],
+        'confidence': round(r['confidence'], 2),
+        'runner_up': r['top3'][1][0] if len(r['top3']) > 1 else None,
+        'runner_up_confidence': round(r['top3'][1][1], 2) if len(r['top3']) > 1 else None,
+        'error': r['error'],
+    } for r in results])
+
+def show_bulk_results(job):
+    df = results_frame(job.results)
+    errors = int(df['error'].notna().sum())
+    st.success(f"✅ {len(df)} circuits analyzed" + (f", {errors} failed" if errors else ""))
+    
+    col_s1, col_s2, col_s3, col_s4 = st.columns(4)
+    sort_by = col_s1.selectbox("Sort by", list(df.columns), index=list(df.columns).index('confidence'))
+    descending = col_s2.toggle("Descending", value=False)
+    page_size = col_s3.selectbox("Rows per page", BULK_PAGE_SIZES)
+    n_pages = max(1, -(-len(df) // page_size))
+    page = col_s4.number_input(f"Page (of {n_pages})", 1, n_pages, 1)
+    
+    ordered = df.sort_values(sort_by, ascending=not descending, na_position='last', kind='stable')
+    page_df = ordered.iloc[(page - 1) * page_size:page * page_size]
+    event = st.dataframe(page_df, hide_index=True, use_container_width=True,
+                         on_select='rerun', selection_mode='single-row', key='bulk_table')
+    
+    col_e1, col_e2 = st.columns(2)
+    col_e1.download_button("Download CSV", ordered.to_csv(index=False), file_name='bulk_results.csv',
+                           mime='text/csv')
+    try:
+        buffer = io.BytesIO()
+        ordered.to_parquet(buffer, index=False)
+        col_e2.download_button("Download Parquet", buffer.getvalue(), file_name='bulk_results.parquet',
+                               mime='application/octet-stream')
+    except ImportError:
+        col_e2.caption("Install pyarrow for Parquet export")
+    
+    # Waveforms are rendered only for the row the user selects
+    if event.selection.rows:
+        result = job.results[page_df.index[event.selection.rows[0]]]
+        st.markdown("---")
+        st.subheader(f"🔍 {result['name']}")
+        if result['error']:
+            st.error(result['error'])
+            return
+        for i, (f, p) in enumerate(result['top3'], 1):
+            st.progress(p/100, text=f"{i}. {f.replace('_', ' ').title()}: {p:.1f}%")
+        if result['waveform'] is None:
+            with st.spinner("Rendering waveform..."):
+                result['waveform'] = jobs.render(Path(result['design']).read_text(),
+                                                 Path(result['testbench']).read_text(),
+                                                 result['name'], preview=True, vcd=result.get('vcd'))
+        if result['waveform'] and result['waveform'].exists():
+            st.image(str(result['waveform']), use_container_width=True)
+
+def show_bulk_job(job_id, polling=False):
+    job = jobs.get(job_id)
+    if job is None:
+        return
+    if job.status == FAILED:
+        st.error(f"❌ Bulk analysis failed: {job.error}")
+    elif not job.finished:
+        done, total = job.progress
+        st.progress(done / max(total, 1), text=f"⏳ {done} of {total} circuits scored")
+    else:
+        show_bulk_results(job)
+    if polling and job.finished:
+        st.rerun()
+
+if mode == "Bulk upload":
+    st.subheader("📦 Bulk Analysis")
+    st.caption("Upload a zip or several .v/.sv files. Testbenches are paired by name "
+               "(tb_<design>, <design>_tb, ...) or listed in a JSON/CSV manifest.")
+    uploads = st.file_uploader("Designs and testbenches", type=['zip', 'v', 'sv', 'json', 'csv'],
+                               accept_multiple_files=True)
+    if st.button("🚀 Analyze Batch", type="primary", disabled=not uploads):
+        try:
+            # Uploaded files stay on disk until the session's next batch: waveforms render from them
+            if 'bulk_dir' in st.session_state:
+                shutil.rmtree(st.session_state.pop('bulk_dir'), ignore_errors=True)
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            directory = st.session_state['bulk_dir'] = tempfile.mkdtemp(prefix='bulk_', dir=CACHE_DIR)
+            suite_jobs = extract_upload([(u.name, u.getvalue()) for u in uploads], directory)
+            if not suite_jobs:
+                st.warning("No design/testbench pairs found in the upload")
+            else:
+                st.session_state['bulk_job_id'] = jobs.submit_suite(suite_jobs)
+        except (JobQueueFull, ValueError, OSError) as e:
+            st.error(f"⚠️ {e}")
+    
+    bulk_job_id = st.session_state.get('bulk_job_id')
+    if bulk_job_id:
+        job = jobs.get(bulk_job_id)
+        if job is not None and not job.finished:
+            st.fragment(run_every=JOB_POLL_SECONDS)(show_bulk_job)(bulk_job_id, polling=True)
+        else:
+            show_bulk_job(bulk_job_id)
+    st.stop()
 
 # Main
 col1, col2 = st.columns(2)
@@ -57,43 +190,79 @@ st.session_state['v_code'] = v_code
 st.session_state['tb_code'] = tb_code
 
 if st.button("🚀 Analyze Circuit", type="primary"):
-    with st.spinner("Analyzing..."):
-        import re
-        match = re.search(r'module\s+(\w+)', v_code)
-        circuit_name = match.group(1) if match else 'circuit'
-        
-        # Simulate
-        sim_result = simulator.simulate(v_code, tb_code, circuit_name)
-        
-        # Extract features
-        features = FeatureExtractor.extract_features(v_code, tb_code,
-            sim_result.get('expected', ''), sim_result.get('actual', ''))
-        
-        # Detect
-        fault_type, confidence, top3, model_info = detector.detect_faults(features)
-        
-        # Generate waveform
-        try:
-            waveform_path = WaveformGenerator.generate(v_code, tb_code, circuit_name)
-        except:
-            waveform_path = None
-        
-        # Display results
-        st.markdown("---")
+    try:
+        st.session_state['job_id'] = jobs.submit(v_code, tb_code)
+    except JobQueueFull as e:
+        st.error(f"⚠️ {e}")
+
+def show_job(job_id, polling=False):
+    job = jobs.get(job_id)
+    if job is None:
+        return
+    st.markdown("---")
+    if job.status == FAILED:
+        st.error(f"❌ Analysis failed: {job.error}")
+        return
+    if job.prediction is None:
+        st.info(f"⏳ {job.name}: {job.status} ({jobs.active()} analyses in progress)")
+        return
+    
+    # Display results
+    prediction = job.prediction
+    if job.finished:
         st.success("✅ Analysis Complete!")
-        
-        col_res1, col_res2 = st.columns([1, 2])
-        
-        with col_res1:
-            st.metric("Fault Detected", fault_type.replace('_', ' ').title())
-            st.metric("Confidence", f"{confidence:.1f}%")
-        
-        with col_res2:
-            st.subheader("Top 3 Predictions")
-            for i, (f, p) in enumerate(top3, 1):
-                st.progress(p/100, text=f"{i}. {f.replace('_', ' ').title()}: {p:.1f}%")
-        
-        if waveform_path and waveform_path.exists():
-            st.markdown("---")
-            st.subheader("📊 Waveform Analysis")
-            st.image(str(waveform_path), use_container_width=True)
+    else:
+        st.success("✅ Prediction ready, rendering waveform...")
+    
+    col_res1, col_res2 = st.columns([1, 2])
+    
+    with col_res1:
+        st.metric("Fault Detected", prediction['fault_type'].replace('_', ' ').title())
+        st.metric("Confidence", f"{prediction['confidence']:.1f}%")
+    
+    with col_res2:
+        st.subheader("Top 3 Predictions")
+        for i, (f, p) in enumerate(prediction['top3'], 1):
+            st.progress(p/100, text=f"{i}. {f.replace('_', ' ').title()}: {p:.1f}%")
+        if prediction.get('matches'):
+            st.caption("Nearest known faults (fault dictionary)")
+            st.dataframe([{'fault': m['fault_id'], 'type': m['label'], 'distance': m['distance'],
+                           'similarity': round(m['similarity'], 3)} for m in prediction['matches']],
+                         hide_index=True)
+    
+    st.markdown("---")
+    st.subheader("📊 Waveform Analysis")
+    if not job.finished:
+        st.caption("⏳ Rendering waveform...")
+    elif job.waveform and job.waveform.exists():
+        st.image(str(job.waveform), use_container_width=True)
+    
+    if job.finished and profiler.enabled and job.run_id is not None:
+        st.markdown("---")
+        st.subheader("⏱️ Stage Timings")
+        col_t1, col_t2 = st.columns(2)
+        with col_t1:
+            st.caption("This run")
+            st.dataframe([{'stage': s['name'], 'wall ms': round(s['wall'] * 1000, 2),
+                           'cpu ms': round(s['cpu'] * 1000, 2),
+                           'peak KB': round((s['peak_bytes'] or 0) / 1024, 1)}
+                          for s in profiler.run_spans(job.run_id)], hide_index=True)
+        with col_t2:
+            st.caption("All profiled runs")
+            st.dataframe([{'stage': name, 'runs': s['count'], 'p50 ms': round(s['wall_ms_p50'], 2),
+                           'p95 ms': round(s['wall_ms_p95'], 2), 'p99 ms': round(s['wall_ms_p99'], 2)}
+                          for name, s in profiler.summary().items()], hide_index=True)
+        st.download_button("Download Chrome trace", json.dumps(profiler.chrome_trace()),
+                           file_name='trace.json', mime='application/json')
+    
+    if polling and job.finished:
+        # Stop polling: redraw once with the final result
+        st.rerun()
+
+job_id = st.session_state.get('job_id')
+if job_id:
+    job = jobs.get(job_id)
+    if job is not None and not job.finished:
+        st.fragment(run_every=JOB_POLL_SECONDS)(show_job)(job_id, polling=True)
+    else:
+        show_job(job_id)
@@ -0,0 +1,78 @@
+import sys
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.fault_campaign import FaultCampaign, inject, parse_module
+
+DESIGN = ("module m(input a, b, output y, z);\n  wire t;\n  assign t = a & b;\n"
+          "  assign y = t;\n  assign z = a | b;\nendmodule")
+TESTBENCH = "module tb;\n  reg a, b; wire y, z;\n  m uut(.a(a), .b(b), .y(y), .z(z));\nendmodule"
+
+
+class Store:
+    def append(self, features, labels, source):
+        self.labels = labels
+        return 0
+
+
+@pytest.fixture
+def logic_engine(tmp_path, monkeypatch):
+    # No iverilog on PATH, so the 'auto' engine is the built-in one
+    monkeypatch.delenv('IVERILOG', raising=False)
+    monkeypatch.delenv('VVP', raising=False)
+    monkeypatch.setenv('PATH', str(tmp_path))
+
+
+def test_inject_redirects_every_driver_in_a_list():
+    code = ("module m(input a, b, s, output y, z);\n  wire t0, t1, w;\n"
+            "  and g0(t0, a, s), g1(t1, b, s);\n  or g2(y, t0, t1);\n  assign z = t0 | a, w = b;\nendmodule")
+    info = parse_module(code)
+    assert {n: info['nets'][n]['driver'] for n in ('t1', 'w', 'y')} == {'t1': 'gate', 'w': 'assign', 'y': 'gate'}
+    gate = inject(info, {'model': 'stuck_at_0', 'nets': ['t1']})
+    assert "g1(t1__orig, b, s)" in gate and "g2(y, t0, t1)" in gate and "assign t1 = 1'b0;" in gate
+    listed = inject(info, {'model': 'stuck_at_1', 'nets': ['w']})
+    assert "assign z = t0 | a, w__orig = b;" in listed and "assign w = 1'b1;" in listed
+
+
+def test_parse_module_picks_named_module_without_comments():
+    code = ("// header\nmodule inner(input x, output y);\n  assign y = ~x; // invert\nendmodule\n"
+            "module outer(input a, output z);\n  inner u(.x(a), .y(z));\nendmodule")
+    info = parse_module(code, 'inner')
+    assert info['name'] == 'inner' and info['aliases'] == {'y': ('x', True)}
+    assert info['code'][info['body_end']:].startswith('endmodule') and '//' not in info['code']
+    with pytest.raises(ValueError):
+        parse_module(code, 'missing')
+
+
+def _row(id, label, actual, detected):
+    return {'id': id, 'label': label, 'features': {}, 'actual': actual, 'detected': detected,
+            'equivalent_to': None, 'ambiguous': False}
+
+
+def test_logic_engine_skips_open_and_delay(logic_engine):
+    rows = FaultCampaign(max_workers=1).run(DESIGN, TESTBENCH)
+    labels = {row['label'] for row in rows}
+    assert 'open_circuit' not in labels and 'delay_fault' not in labels
+    assert {'stuck_at_0', 'stuck_at_1', 'bridging_fault'} <= labels
+    assert all(row['error'] is None for row in rows)
+
+
+def test_shared_response_across_labels_is_ambiguous(logic_engine):
+    # Bridging a and b (wired-AND) makes a ^ b constant 0, just like y stuck at 0
+    design = "module x(input a, b, output y);\n  assign y = a ^ b;\nendmodule"
+    rows = FaultCampaign(['stuck_at_0', 'bridging_fault'], max_workers=1).run(design, TESTBENCH)
+    by_id = {row['id']: row for row in rows}
+    assert by_id['bridging:a+b']['actual'] == by_id['stuck_at_0:y']['actual'] == '0000'
+    assert by_id['bridging:a+b']['ambiguous'] and by_id['stuck_at_0:y']['ambiguous']
+    assert not by_id['stuck_at_0:a']['ambiguous'] and not by_id['golden']['ambiguous']
+
+
+def test_to_store_drops_undetected_and_ambiguous():
+    rows = [_row('golden', 'no_fault', '0001', False), _row('stuck_at_0:y', 'stuck_at_0', '0000', True),
+            _row('delay:y', 'delay_fault', '0001', False), _row('open:y', 'open_circuit', '0000', True),
+            _row('stuck_at_1:y', 'stuck_at_1', '1111', True)]
+    rows[3]['ambiguous'] = rows[1]['ambiguous'] = True
+    store = Store()
+    FaultCampaign.to_store(rows, store)
+    assert store.labels == ['no_fault', 'stuck_at_1']
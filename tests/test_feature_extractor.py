@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.feature_extractor import FeatureExtractor
+
+SOURCES = {
+    'reg_initializer': "module m(input a, output reg q);\n  reg r = 1'b0;\n  always @(*) q = a;\nendmodule",
+    'multi_assign': "module m(input x, output y, z);\n  assign y = 1'b0, z = x;\nendmodule",
+    'wire_initializer': "module m(input x, output y);\n  wire w = 1'b1;\n  assign y = x & w;\nendmodule",
+    'stuck_at_0': "module and_gate(input a, b, output y);\n  assign y = 1'b0; // FAULT\nendmodule",
+    'clean': "module and_gate(input a, b, output y);\n  assign y = a & b;\nendmodule",
+    'delay': "module m(input a, output y);\n  assign #25 y = a;\nendmodule",
+}
+STRENGTH = {'reg_initializer': 1.0, 'multi_assign': 0.3, 'wire_initializer': 1.7, 'stuck_at_0': 0.3,
+            'clean': 1.0, 'delay': 1.0}
+
+
+@pytest.mark.parametrize('name', sorted(SOURCES))
+def test_constant_drivers(name):
+    features = FeatureExtractor.extract_features(SOURCES[name], "")
+    assert features['signal_strength'] == STRENGTH[name]
+
+
+@pytest.mark.parametrize('name', sorted(SOURCES))
+@pytest.mark.parametrize('size', [1, 5, 4096])
+def test_streaming_matches_in_memory(name, size):
+    code = SOURCES[name]
+    chunks = [code[i:i + size] for i in range(0, len(code), size)]
+    assert (FeatureExtractor.extract_features_streaming(chunks, ["tb 0101"], ["0101"], ["0111"]) ==
+            FeatureExtractor.extract_features(code, "tb 0101", "0101", "0111"))
+
+
+ALIASED_VCD = """$timescale 1ns $end
+$scope module tb $end
+$var wire 1 ! clk $end
+$var wire 1 " a $end
+$var wire 1 # y $end
+$scope module uut $end
+$var wire 1 ! clk $end
+$var wire 1 " a $end
+$var wire 1 # y $end
+$upscope $end
+$upscope $end
+$enddefinitions $end
+#0
+0!
+0"
+0#
+#5
+1!
+#7
+1"
+#9
+1#
+#10
+0!
+#15
+1!
+#17
+0"
+#19
+0#
+#20
+0!
+"""
+
+
+def _single_scope(vcd):
+    # The same dump with the uut scope (and its aliases) removed
+    lines = vcd.splitlines()
+    start = lines.index('$scope module uut $end')
+    return '\n'.join(lines[:start] + lines[start + 5:])
+
+
+def test_timing_features_count_aliases_once():
+    from src.vcd_reader import parse_vcd
+    aliased = parse_vcd(ALIASED_VCD.splitlines())
+    single = parse_vcd(_single_scope(ALIASED_VCD).splitlines())
+    assert len(aliased.names()) == 6 and len(single.names()) == 3
+    features = FeatureExtractor.extract_timing_features(aliased, ['a', 'clk'], ['y'])
+    assert features['input_transitions'] == 2
+    assert features == FeatureExtractor.extract_timing_features(single, ['a', 'clk'], ['y'])
+    # Only a and y toggle as data: one toggle each per clock cycle
+    assert features['toggle_rate'] == 1.0
+    assert features['propagation_delay'] == 2.0
@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.logic_sim import ONES, ZERO, LogicSimulator, UnsupportedDesign, parse_design
+
+
+def sweep(verilog_code):
+    # Exhaustive sweep: lane p drives input bit j (inputs in port order, LSB first) with (p >> j) & 1
+    return LogicSimulator(verilog_code).sweep()[0]
+
+
+def table(n_bits, row):
+    # Hand-computed reference: row(p) -> output bits (MSB first) for every lane p
+    return ''.join(row(p) for p in range(2 ** n_bits))
+
+
+def run_cycles(verilog_code, inputs):
+    # One lane; inputs: list over cycles of {net: int}. Returns the output rows sampled before
+    # each clock edge.
+    design = LogicSimulator(verilog_code)
+    stimulus = [{net: [np.full(1, ONES if (value >> i) & 1 else ZERO)
+                       for i in range(design.width(net))]
+                 for net, value in cycle.items()} for cycle in inputs]
+    out = design.format(design.run(stimulus, 1), 1)
+    width = len(out) // len(inputs)
+    return [out[i:i + width] for i in range(0, len(out), width)]
+
+
+def test_gates():
+    code = "module m(input a, b, output y, z);\n  and g1(y, a, b);\n  xor g2(z, a, b);\nendmodule"
+    assert sweep(code) == table(2, lambda p: f"{p & 1 & (p >> 1)}{(p & 1) ^ (p >> 1)}")
+
+
+def test_not_extends_to_target_width():
+    code = "module m(input a, output [3:0] y);\n  assign y = ~a;\nendmodule"
+    assert sweep(code) == '11111110'
+
+
+def test_bitwise_operands_extend_before_inverting():
+    code = "module m(input a, input [1:0] b, output [3:0] y);\n  assign y = ~a & ~b;\nendmodule"
+    assert sweep(code) == table(3, lambda p: f"{~(p & 1) & ~(p >> 1) & 0xF:04b}")
+
+
+def test_add_keeps_carry():
+    code = "module m(input [1:0] a, b, output [2:0] s);\n  assign s = a + b;\nendmodule"
+    assert sweep(code) == table(4, lambda p: f"{(p & 3) + (p >> 2):03b}")
+
+
+def test_negate_in_context_width():
+    code = "module m(input [1:0] a, output [2:0] y);\n  assign y = -a;\nendmodule"
+    assert sweep(code) == table(2, lambda p: f"{-p & 7:03b}")
+
+
+def test_compare_and_reduce():
+    code = ("module m(input [1:0] a, b, output lt, ge, eq, r);\n"
+            "  assign lt = a < b;\n  assign ge = a >= b;\n  assign eq = a == b;\n"
+            "  assign r = ^a;\nendmodule")
+    assert sweep(code) == table(4, lambda p: ''.join(str(int(v)) for v in (
+        (p & 3) < (p >> 2), (p & 3) >= (p >> 2), (p & 3) == (p >> 2), bin(p & 3).count('1') & 1)))
+
+
+def test_mux_and_concat():
+    code = ("module m(input s, input [1:0] a, output [3:0] y);\n"
+            "  assign y = s ? {a, 2'b01} : {2{a[0]}};\nendmodule")
+    assert sweep(code) == table(3, lambda p: f"{(p >> 1) << 2 | 1:04b}" if p & 1 else
+                                f"{3 * ((p >> 1) & 1):04b}")
+
+
+def test_blocking_assignments_take_effect_immediately():
+    code = ("module m(input clk, input a, output reg q);\n  reg t;\n"
+            "  always @(posedge clk) begin\n    t = a;\n    q = t;\n  end\nendmodule")
+    assert run_cycles(code, [{'a': 1}, {'a': 0}, {'a': 1}, {'a': 1}]) == ['0', '1', '0', '1']
+
+
+def test_non_blocking_assignments_form_a_pipeline():
+    code = ("module m(input clk, input a, output reg q);\n  reg t;\n"
+            "  always @(posedge clk) begin\n    t <= a;\n    q <= t;\n  end\nendmodule")
+    assert run_cycles(code, [{'a': 1}, {'a': 0}, {'a': 1}, {'a': 1}]) == ['0', '0', '1', '0']
+
+
+def test_part_select_write_in_always_block():
+    code = ("module m(input clk, input d, output reg [1:0] q);\n"
+            "  always @(posedge clk) q[0] <= d;\nendmodule")
+    assert run_cycles(code, [{'d': 1}, {'d': 0}, {'d': 1}]) == ['00', '01', '00']
+
+
+def test_if_else_register():
+    code = ("module m(input clk, input rst, input d, output reg q);\n"
+            "  always @(posedge clk) if (rst) q <= 1'b0; else q <= d;\nendmodule")
+    cycles = [{'rst': 0, 'd': 1}, {'rst': 1, 'd': 1}, {'rst': 0, 'd': 1}, {'rst': 0, 'd': 0}]
+    assert run_cycles(code, cycles) == ['0', '1', '0', '1']
+
+
+def test_blocking_write_inside_if():
+    code = ("module m(input clk, input s, input a, output reg q);\n  reg t;\n"
+            "  always @(posedge clk) begin\n    t = 1'b0;\n    if (s) t = a;\n    q = t;\n  end\nendmodule")
+    cycles = [{'s': 1, 'a': 1}, {'s': 0, 'a': 1}, {'s': 1, 'a': 0}, {'s': 0, 'a': 0}]
+    assert run_cycles(code, cycles) == ['0', '1', '0', '0']
+
+
+def test_undeclared_net_is_unsupported():
+    with pytest.raises(UnsupportedDesign):
+        parse_design("module m(input a, output y);\n  assign y = a & b;\nendmodule")
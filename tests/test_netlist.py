@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import netlist
+from src.netlist import parse, parse_stream, tokenize
+
+DESIGN = """`timescale 1ns/1ps
+// transition comment ; with a semicolon
+/* block comment ; "quoted" */
+module regs(clk, rst, d, q, z);
+  input clk, rst;
+  input [7:0] d;
+  output reg [7:0] q = 8'h00;
+  output z;
+  reg r = 1'b0;
+  wire w = 1'b1;
+  wire k;
+  assign z = 1'b0, k = d[0];
+  assign #15 y2 = 1'b1;
+  always @(posedge clk or posedge rst) begin
+    if (rst) q <= 8'h0;
+    else q <= #5 d;
+  end
+  initial $display("done ; end");
+endmodule
+
+module top(input clk, input [7:0] d, output z);
+  regs u1(.clk(clk), .rst(1'b0), .d(d), .q(), .z(z));
+endmodule
+"""
+
+
+def _summary(n):
+    return ({name: (m.ports, m.stats, m.span,
+                    sorted((k, v.kind, v.width, v.net_type, v.range, v.drivers, v.loads) for k, v in m.nets.items()),
+                    [(x.kind, x.targets, x.sources, x.constant, x.delay, x.alias) for x in m.nodes], sorted(m.delays))
+             for name, m in n.modules.items()}, n.words, n.top.name)
+
+
+def test_constant_drivers():
+    # Net declarations and continuous assigns without a delay drive constants; reg initializers do not
+    n = parse(DESIGN)
+    assert n.constants() == {"1'b0", "1'b1"}
+    regs = n.modules['regs']
+    drivers = {t: node for node in regs.nodes for t in node.targets}
+    assert drivers['z'].constant == "1'b0"
+    assert drivers['w'].constant == "1'b1"
+    assert drivers['k'].constant is None
+    assert drivers['y2'].constant is None
+    assert drivers['r'].kind == 'initial' and drivers['r'].constant is None
+    assert n.delays() == {5, 15}
+    assert n.mentions('transition')
+    assert n.top.name == 'top'
+
+
+def test_spans_index_tokenize():
+    tokens, offsets = tokenize(DESIGN)
+    for name, module in parse(DESIGN).modules.items():
+        start, body, end = module.span
+        assert tokens[start] == name and tokens[body - 1] == ';' and tokens[end] == 'endmodule'
+        assert DESIGN[offsets[end]:].startswith('endmodule')
+
+
+def test_declared_types_ranges_and_aliases():
+    code = ("module m #(parameter W = 4) (input [W-1:0] a, output reg [W-1:0] q, output y, z);\n"
+            "  wire [W - 1 : 0] t = a;\n  wire n;\n  not g(n, y);\n  assign y = ~t[0], z = n;\n"
+            "  always @(*) q = t;\nendmodule")
+    m = parse(code).modules['m']
+    assert [(m.nets[k].net_type, m.nets[k].range) for k in ('a', 'q', 't', 'y')] == [
+        (None, '[W-1:0]'), ('reg', '[W-1:0]'), ('wire', '[W-1:0]'), (None, '')]
+    aliases = {node.targets[0]: node.alias for node in m.nodes if node.alias}
+    assert aliases == {'t': ('a', False), 'n': ('y', True), 'z': ('n', False)}
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 64, 255, 256, 257, 4096])
+def test_stream_matches_whole_source(size):
+    chunks = [DESIGN[i:i + size] for i in range(0, len(DESIGN), size)]
+    assert _summary(parse_stream(chunks)) == _summary(parse(DESIGN))
+
+
+def test_cursor_release_keeps_results(monkeypatch):
+    expected = _summary(parse(DESIGN))
+    monkeypatch.setattr(netlist, 'CURSOR_RELEASE', 1)
+    assert _summary(parse_stream([DESIGN])) == expected
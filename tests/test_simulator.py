@@ -0,0 +1,139 @@
+import os
+import stat
+import sys
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.simulator import VerilogSimulator
+
+DESIGN = "module and_gate(input a, b, output y);\n  assign y = a & b;\nendmodule"
+FAULTY = "module and_gate(input a, b, output y);\n  assign y = 1'b0;\nendmodule"
+TESTBENCH = "module tb;\n  reg a, b; wire y;\n  and_gate uut(.a(a), .b(b), .y(y));\nendmodule"
+
+# The compiled "artifact" is the text the simulation prints; every compilation is logged
+IVERILOG = """#!/bin/sh
+echo "$@" >> "$STUB_LOG"
+cat "$STUB_OUTPUT" > "$2"
+"""
+VVP = """#!/bin/sh
+if [ -n "$STUB_SLEEP" ]; then sleep "$STUB_SLEEP"; fi
+if [ -n "$STUB_VCD" ]; then printf '$enddefinitions $end\\n' > dump.vcd; fi
+cat "$2"
+"""
+
+
+def _script(path, text):
+    path.write_text(text)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+
+
+@pytest.fixture
+def stubs(tmp_path, monkeypatch):
+    # Stub iverilog/vvp first on PATH; returns a function setting what the simulation prints
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    _script(bin_dir / 'iverilog', IVERILOG)
+    _script(bin_dir / 'vvp', VVP)
+    monkeypatch.delenv('IVERILOG', raising=False)
+    monkeypatch.delenv('VVP', raising=False)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv('STUB_LOG', str(tmp_path / 'compiles.log'))
+    output = tmp_path / 'output.txt'
+    monkeypatch.setenv('STUB_OUTPUT', str(output))
+    
+    def prints(text):
+        output.write_text(text)
+    prints('')
+    return prints
+
+
+def _compiles(tmp_path):
+    log = tmp_path / 'compiles.log'
+    return len(log.read_text().splitlines()) if log.exists() else 0
+
+
+def test_parse_output_self_checking():
+    output = "time=10 expected=0101 actual=0100\nexp: 11 got: 10\n"
+    assert VerilogSimulator.parse_output(output) == ('010111', '010010')
+
+
+def test_parse_output_monitor_prefers_outputs():
+    output = "a=0 b=1 y=0\na=1 b=1 y=1\n"
+    assert VerilogSimulator.parse_output(output, {'y'}) == (None, '01')
+    assert VerilogSimulator.parse_output(output) == (None, '010111')
+
+
+def test_simulate_with_stubs(stubs, tmp_path):
+    stubs("expected=01 actual=00\n")
+    sim = VerilogSimulator(cache_dir=tmp_path / 'sim', engine='iverilog')
+    assert sim.iverilog_available
+    result = sim.simulate(DESIGN, TESTBENCH, 'and_gate')
+    assert result['success'] and result['engine'] == 'iverilog'
+    assert (result['expected'], result['actual']) == ('01', '00')
+    assert result['vcd'] is None
+
+
+def test_no_self_check_has_no_reference(stubs, tmp_path):
+    stubs("y=0\ny=1\n")
+    result = VerilogSimulator(cache_dir=tmp_path / 'sim', engine='iverilog').simulate(DESIGN, TESTBENCH, 'and_gate')
+    assert result['expected'] is None
+    assert result['actual'] == '01'
+
+
+def test_golden_run_supplies_expected(stubs, tmp_path):
+    stubs("y=1\n")
+    result = VerilogSimulator(cache_dir=tmp_path / 'sim', engine='iverilog').simulate(
+        FAULTY, TESTBENCH, 'and_gate', golden_code=DESIGN)
+    assert (result['expected'], result['actual']) == ('1', '1')
+
+
+def test_compile_cache(stubs, tmp_path, monkeypatch):
+    stubs("expected=1 actual=1\n")
+    monkeypatch.setenv('STUB_VCD', '1')
+    sim = VerilogSimulator(cache_dir=tmp_path / 'sim', engine='iverilog')
+    first = sim.simulate(DESIGN, TESTBENCH, 'and_gate')
+    second = sim.simulate(DESIGN, TESTBENCH, 'and_gate')
+    assert _compiles(tmp_path) == 1
+    assert first['vcd'] == second['vcd'] and Path(second['vcd']).exists()
+    sim.simulate(FAULTY, TESTBENCH, 'and_gate')
+    assert _compiles(tmp_path) == 2
+
+
+def test_timeout(stubs, tmp_path, monkeypatch):
+    stubs("expected=1 actual=1\n")
+    monkeypatch.setenv('STUB_SLEEP', '5')
+    result = VerilogSimulator(cache_dir=tmp_path / 'sim', engine='iverilog', timeout=0.5).simulate(
+        DESIGN, TESTBENCH, 'and_gate')
+    assert not result['success']
+    assert 'timed out' in result['output']
+
+
+def test_mock_fallback_without_iverilog(tmp_path, monkeypatch):
+    monkeypatch.delenv('IVERILOG', raising=False)
+    monkeypatch.delenv('VVP', raising=False)
+    monkeypatch.setenv('PATH', str(tmp_path))
+    sim = VerilogSimulator(cache_dir=tmp_path / 'sim', engine='iverilog')
+    assert not sim.iverilog_available
+    result = sim.simulate(FAULTY, TESTBENCH, 'and_gate')
+    assert 'engine' not in result
+    assert (result['expected'], result['actual']) == ('01011', '00000')
+
+
+def test_logic_engine_falls_back_on_unsupported_design(tmp_path):
+    design = "module m(input a, output y);\n  assign y = a & b;\nendmodule"
+    result = VerilogSimulator(cache_dir=tmp_path / 'sim', engine='logic').simulate(design, '', 'm')
+    assert 'engine' not in result and result['success']
+
+
+def test_logic_engine_has_no_reference_without_golden(tmp_path):
+    result = VerilogSimulator(cache_dir=tmp_path / 'sim', engine='logic').simulate(FAULTY, TESTBENCH, 'and_gate')
+    assert result['engine'] == 'logic'
+    assert result['expected'] is None
+    assert result['actual'] == '0000'
+
+
+def test_logic_engine_golden_supplies_expected(tmp_path):
+    result = VerilogSimulator(cache_dir=tmp_path / 'sim', engine='logic').simulate(
+        FAULTY, TESTBENCH, 'and_gate', golden_code=DESIGN)
+    assert (result['expected'], result['actual']) == ('0001', '0000')
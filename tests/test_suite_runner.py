@@ -0,0 +1,55 @@
+import json
+import sys
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.suite_runner import discover_jobs, extract_upload
+
+DESIGN = b"module m(input a, output y);\n  assign y = a;\nendmodule"
+TESTBENCH = b"module tb;\n  reg a; wire y;\n  m uut(.a(a), .y(y));\nendmodule"
+
+
+def _manifest(entries):
+    return ('jobs.json', json.dumps(entries).encode())
+
+
+def test_upload_manifest_resolves_inside_directory(tmp_path):
+    files = [('m.v', DESIGN), ('tb_m.v', TESTBENCH),
+             _manifest([{'name': 'first', 'design': 'm.v', 'testbench': 'tb_m.v'}])]
+    jobs = extract_upload(files, tmp_path / 'upload')
+    root = (tmp_path / 'upload').resolve()
+    assert jobs == [{'name': 'first', 'design': str(root / 'm.v'), 'testbench': str(root / 'tb_m.v')}]
+
+
+def test_upload_without_manifest_pairs_testbenches(tmp_path):
+    jobs = extract_upload([('m.v', DESIGN), ('tb_m.v', TESTBENCH)], tmp_path / 'upload')
+    assert [(job['name'], Path(job['testbench']).name) for job in jobs] == [('m', 'tb_m.v')]
+
+
+@pytest.mark.parametrize('design', ['/etc/passwd', '../../x.v', 'sub/../../m.v'])
+def test_upload_manifest_cannot_escape(tmp_path, design):
+    files = [('m.v', DESIGN), ('tb_m.v', TESTBENCH), _manifest([{'design': design, 'testbench': 'tb_m.v'}])]
+    with pytest.raises(ValueError, match='outside the upload'):
+        extract_upload(files, tmp_path / 'upload')
+
+
+@pytest.mark.parametrize('manifest', [
+    _manifest({'design': 'm.v', 'testbench': 'tb_m.v'}),
+    _manifest(['m.v']),
+    _manifest([{'design': 'm.v'}]),
+    ('jobs.json', b'{not json'),
+    ('jobs.csv', b'file,bench\nm.v,tb_m.v\n'),
+])
+def test_malformed_manifest_is_a_value_error(tmp_path, manifest):
+    with pytest.raises(ValueError):
+        extract_upload([('m.v', DESIGN), manifest], tmp_path / 'upload')
+
+
+def test_local_manifest_may_point_outside(tmp_path):
+    (tmp_path / 'designs').mkdir()
+    manifest = tmp_path / 'suite' / 'jobs.csv'
+    manifest.parent.mkdir()
+    manifest.write_text('design,testbench\n../designs/m.v,../designs/tb_m.v\n')
+    jobs = discover_jobs(manifest)
+    assert Path(jobs[0]['design']).resolve() == (tmp_path / 'designs' / 'm.v').resolve()
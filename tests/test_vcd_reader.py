@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+import numpy as np
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.vcd_reader import UNKNOWN, parse_vcd
+
+VCD = """$timescale 1ns $end
+$scope module tb $end
+$var wire 1 ! a $end
+$var wire 4 " bus $end
+$upscope $end
+$enddefinitions $end
+#0
+x!
+bxxxx "
+#5
+1!
+b0011 "
+#10
+z!
+b01z1 "
+#20
+0!
+b1111 "
+"""
+
+
+def _trace(vcd, name):
+    trace = vcd[name]
+    return trace.times.tolist(), trace.values.tolist()
+
+
+def test_unknown_is_one_code_for_every_width():
+    vcd = parse_vcd(VCD.splitlines())
+    assert _trace(vcd, 'tb.a') == ([0, 5, 10, 20], [UNKNOWN, 1, UNKNOWN, 0])
+    assert _trace(vcd, 'tb.bus') == ([0, 5, 10, 20], [UNKNOWN, 3, UNKNOWN, 15])
+    assert vcd['tb.a'].value_at(np.array([-1, 7])).tolist() == [UNKNOWN, 1]
+
+
+def test_change_at_window_start_replaces_replayed_value():
+    vcd = parse_vcd(VCD.splitlines(), t_start=10)
+    assert _trace(vcd, 'tb.a') == ([10, 20], [UNKNOWN, 0])
+    assert _trace(vcd, 'tb.bus') == ([10, 20], [UNKNOWN, 15])
+
+
+def test_value_before_window_is_replayed_at_start():
+    vcd = parse_vcd(VCD.splitlines(), t_start=7, t_end=15)
+    assert _trace(vcd, 'tb.a') == ([7, 10], [1, UNKNOWN])
+    assert _trace(vcd, 'tb.bus') == ([7, 10], [3, UNKNOWN])
+    assert vcd.end_time == 15
@@ -0,0 +1,16 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import waveform_generator
+from src.waveform_generator import WaveformGenerator
+
+
+def test_renders_concurrently_in_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(waveform_generator, 'VISUALIZATIONS_DIR', tmp_path)
+    data = {'time': [0, 10, 20, 30], 'a': [0, 1, 1, 0], 'y': [0, 0, 1, 1]}
+    with ThreadPoolExecutor(4) as pool:
+        paths = list(pool.map(lambda i: WaveformGenerator._plot(data, f'c{i}', preview=True), range(8)))
+    assert sorted(p.name for p in paths) == sorted(f'c{i}_waveform_preview.png' for i in range(8))
+    assert all(p.read_bytes().startswith(b'\x89PNG') for p in paths)
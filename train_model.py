@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 """Train the VLSI fault detection model"""
+import argparse
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -7,12 +8,17 @@ sys.path.insert(0, str(Path(__file__).parent))
 from src.fault_detector import VLSIFaultDetector
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--search', action='store_true',
+                        help="cross-validate several model families and pick on accuracy and latency")
+    args = parser.parse_args()
+    
     print("="*80)
     print("🚀 TRAINING VLSI FAULT DETECTION MODEL")
     print("="*80)
     
     detector = VLSIFaultDetector()
-    accuracy = detector.train()
+    accuracy = detector.train(search=args.search)
     
     print(f"\n✅ Training complete! Best accuracy: {accuracy*100:.2f}%")
     print("="*80)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Incrementally update the fault detection model from newly labelled circuits"""
+import argparse
+import csv
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.fault_detector import VLSIFaultDetector
+from src.training_store import TrainingStore
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--labels', help="CSV of feature columns plus a fault_type column to append first")
+    parser.add_argument('--trees', type=int, default=None, help="trees to add in this update")
+    args = parser.parse_args()
+    
+    detector = VLSIFaultDetector()
+    if not detector.load_model(prefer_compact=False):
+        print("Model not found. Run train_model.py first.")
+        return 1
+    
+    store = TrainingStore(feature_names=detector.feature_names)
+    if args.labels:
+        with open(args.labels, newline='') as f:
+            rows = list(csv.DictReader(f))
+        features = [{name: float(row[name]) for name in detector.feature_names} for row in rows]
+        segment = store.append(features, [row['fault_type'] for row in rows], source=args.labels)
+        print(f"Appended {len(rows)} rows as segment {segment}")
+    
+    print("="*80)
+    print("🔁 UPDATING VLSI FAULT DETECTION MODEL")
+    print("="*80)
+    kwargs = {'n_trees': args.trees} if args.trees else {}
+    accuracy = detector.update(store, **kwargs)
+    if accuracy is not None:
+        print(f"\n✅ Update complete! Accuracy on new rows: {accuracy*100:.2f}%")
+    print("="*80)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())